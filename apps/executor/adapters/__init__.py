@@ -1,5 +1,16 @@
 from .input import DesktopInputExecutor
-from .screen import ScreenAdapter, capture_screen
-from .window import get_active_window_info
+from .screen import CAPTURE_PROFILES, CaptureProfile, DeltaScreenCapture, ScreenAdapter, capture_screen
+from .settle import SettleDetector
+from .window import get_active_window_bounds, get_active_window_info
 
-__all__ = ["capture_screen", "DesktopInputExecutor", "ScreenAdapter", "get_active_window_info"]
+__all__ = [
+    "CAPTURE_PROFILES",
+    "CaptureProfile",
+    "capture_screen",
+    "DeltaScreenCapture",
+    "DesktopInputExecutor",
+    "ScreenAdapter",
+    "SettleDetector",
+    "get_active_window_bounds",
+    "get_active_window_info",
+]
@@ -3,16 +3,19 @@ from __future__ import annotations
 import logging
 import time
 
-from pydantic import TypeAdapter
+from packages.contracts.models import DesktopAction, parse_action
+from packages.contracts.normalization import scale_action_coordinates
 
-from packages.contracts.models import DesktopAction
+from .settle import SettleDetector
 
 logger = logging.getLogger("executor.input")
 
 
 class DesktopInputExecutor:
-    def __init__(self, dry_run: bool = True) -> None:
+    def __init__(self, dry_run: bool = True, settle: SettleDetector | None = None) -> None:
         self.dry_run = dry_run
+        # With a detector, `wait` returns as soon as the screen changes and settles; `seconds` is the ceiling.
+        self.settle = settle
         self._pyautogui = None
         if not dry_run:
             try:
@@ -20,9 +23,18 @@ class DesktopInputExecutor:
             except ImportError as exc:
                 raise RuntimeError("pyautogui required for non-dry-run mode") from exc
             self._pyautogui = pyautogui
+        self._capture_size: tuple[int, int] | None = None
+        self._physical_size: tuple[int, int] | None = None
+
+    def set_coordinate_space(self, capture_size: tuple[int, int], physical_size: tuple[int, int]) -> None:
+        """Declare the image space planner coordinates refer to and the physical desktop size."""
+        self._capture_size = capture_size
+        self._physical_size = physical_size
 
     def execute(self, action: DesktopAction | dict) -> str:
-        parsed = TypeAdapter(DesktopAction).validate_python(action)
+        parsed = parse_action(action)
+        if self._capture_size and self._physical_size:
+            parsed = scale_action_coordinates(parsed, self._capture_size, self._physical_size)
         if self.dry_run:
             logger.info("dry-run execute action=%s", parsed.action)
             return f"dry-run:{parsed.action}"
@@ -51,6 +63,9 @@ class DesktopInputExecutor:
                 pg.moveTo(fx, fy)
                 pg.dragTo(tx, ty, duration=0.2, button="left")
             case "wait":
+                if self.settle is not None:
+                    settled = self.settle.wait(timeout_seconds=parsed.parameters.seconds, require_change=True)
+                    return "executed:wait settled" if settled else "executed:wait"
                 time.sleep(parsed.parameters.seconds)
             case "screenshot":
                 pass
@@ -1,23 +1,161 @@
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
-from io import BytesIO
+from dataclasses import dataclass, field
+from typing import Literal
+from uuid import uuid4
 
-from PIL import ImageGrab
+from PIL import Image, ImageGrab
+
+from packages.perception.image_utils import diff_tiles, downscale, encode_image
+
+
+@dataclass(slots=True, frozen=True)
+class CaptureProfile:
+    """How a grabbed desktop is reduced and encoded before upload.
+
+    `quality` applies to WebP and JPEG; `png_compress_level` (0-9) to PNG only.
+    """
+
+    codec: Literal["png", "webp", "jpeg"] = "png"
+    png_compress_level: int = 6
+    quality: int = 85
+    max_long_edge: int | None = None
+    grayscale: bool = False
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        if self.max_long_edge:
+            image = downscale(image, self.max_long_edge)
+        if self.grayscale:
+            image = image.convert("L")
+        return image
+
+    def encode(self, image: Image.Image) -> bytes:
+        return encode_image(image, self.codec, self.quality, self.png_compress_level)
+
+
+CAPTURE_PROFILES = {
+    "lossless": CaptureProfile(),
+    "balanced": CaptureProfile(codec="webp", quality=80, max_long_edge=2560),
+    "fast": CaptureProfile(codec="jpeg", quality=70, max_long_edge=1920, grayscale=True),
+}
+
+
+@dataclass(slots=True)
+class TileAdapter:
+    x: int
+    y: int
+    width: int
+    height: int
+    image_bytes: bytes
 
 
 @dataclass(slots=True)
 class ScreenAdapter:
-    image_base64: str
+    image_bytes: bytes
     width: int
     height: int
+    physical_width: int | None = None
+    physical_height: int | None = None
+    image_format: str = "png"
+    mode: str = "full"
+    frame_id: str | None = None
+    base_frame_id: str | None = None
+    tiles: list[TileAdapter] = field(default_factory=list)
 
+    @property
+    def image_base64(self) -> str:
+        return base64.b64encode(self.image_bytes).decode("ascii")
 
-def capture_screen() -> ScreenAdapter:
-    image = ImageGrab.grab(all_screens=True)
+
+def grab_screen() -> Image.Image:
+    """The whole virtual desktop at physical resolution, as RGB."""
+    return ImageGrab.grab(all_screens=True).convert("RGB")
+
+
+def _full_frame(
+    image: Image.Image,
+    physical_size: tuple[int, int],
+    profile: CaptureProfile,
+    frame_id: str | None = None,
+) -> ScreenAdapter:
     width, height = image.size
-    buf = BytesIO()
-    image.save(buf, format="PNG")
-    encoded = base64.b64encode(buf.getvalue()).decode("ascii")
-    return ScreenAdapter(image_base64=encoded, width=width, height=height)
+    return ScreenAdapter(
+        image_bytes=profile.encode(image),
+        width=width,
+        height=height,
+        physical_width=physical_size[0],
+        physical_height=physical_size[1],
+        image_format=profile.codec,
+        frame_id=frame_id,
+    )
+
+
+def capture_screen(profile: CaptureProfile | None = None) -> ScreenAdapter:
+    profile = profile or CAPTURE_PROFILES["lossless"]
+    raw = grab_screen()
+    return _full_frame(profile.prepare(raw), raw.size, profile)
+
+
+class DeltaScreenCapture:
+    """Stateful capturer that only encodes tiles changed since the previous frame.
+
+    The first capture, captures after `reset()` and captures where more than
+    `max_dirty_ratio` of the screen changed are sent as full frames. Frames are
+    diffed after the profile has downscaled them.
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 128,
+        max_dirty_ratio: float = 0.6,
+        profile: CaptureProfile | None = None,
+    ) -> None:
+        self.tile_size = tile_size
+        self.max_dirty_ratio = max_dirty_ratio
+        self.profile = profile or CAPTURE_PROFILES["lossless"]
+        self._previous: Image.Image | None = None
+        self._previous_id: str | None = None
+
+    def reset(self) -> None:
+        self._previous = None
+        self._previous_id = None
+
+    def capture(self) -> ScreenAdapter:
+        raw = grab_screen()
+        image = self.profile.prepare(raw)
+        frame_id = uuid4().hex
+        previous, base_frame_id = self._previous, self._previous_id
+        self._previous, self._previous_id = image, frame_id
+
+        if previous is None or base_frame_id is None or previous.size != image.size:
+            return _full_frame(image, raw.size, self.profile, frame_id)
+
+        width, height = image.size
+        boxes = diff_tiles(previous, image, self.tile_size)
+        dirty_area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes)
+        if dirty_area > self.max_dirty_ratio * width * height:
+            return _full_frame(image, raw.size, self.profile, frame_id)
+
+        tiles = [
+            TileAdapter(
+                x=x1,
+                y=y1,
+                width=x2 - x1,
+                height=y2 - y1,
+                image_bytes=self.profile.encode(image.crop((x1, y1, x2, y2))),
+            )
+            for x1, y1, x2, y2 in boxes
+        ]
+        return ScreenAdapter(
+            image_bytes=b"",
+            width=width,
+            height=height,
+            physical_width=raw.width,
+            physical_height=raw.height,
+            image_format=self.profile.codec,
+            mode="delta",
+            frame_id=frame_id,
+            base_frame_id=base_frame_id,
+            tiles=tiles,
+        )
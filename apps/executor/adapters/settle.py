@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from PIL import Image
+
+from .screen import CaptureProfile, grab_screen
+
+
+@dataclass(slots=True)
+class SettleDetector:
+    """Polls cheap low-resolution frame hashes until the screen stops changing.
+
+    A frame is downscaled to `hash_edge` pixels on its long side and grayscale
+    with the capture profile code, then quantised to 16 levels before hashing,
+    so antialiasing noise does not count as change. The screen counts as
+    settled once `stable_polls` consecutive polls hash the same.
+    """
+
+    timeout_seconds: float = 2.0
+    poll_interval: float = 0.1
+    stable_polls: int = 2
+    hash_edge: int = 64
+    grab: Callable[[], Image.Image] = field(default=grab_screen)
+    _reduce: CaptureProfile = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._reduce = CaptureProfile(max_long_edge=self.hash_edge, grayscale=True)
+
+    def frame_hash(self) -> bytes:
+        small = self._reduce.prepare(self.grab())
+        quantised = small.point(lambda value: value >> 4)
+        return hashlib.blake2b(quantised.tobytes(), digest_size=8).digest()
+
+    def wait(self, timeout_seconds: float | None = None, require_change: bool = False) -> bool:
+        """Block until the screen is stable or the ceiling elapses; returns whether it settled.
+
+        With `require_change`, the screen must first differ from its state at call
+        time, which suits explicit `wait` actions that expect something to load.
+        """
+        deadline = time.monotonic() + (self.timeout_seconds if timeout_seconds is None else timeout_seconds)
+        previous = self.frame_hash()
+        changed = not require_change
+        stable = 0
+        while time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            current = self.frame_hash()
+            if current != previous:
+                changed = True
+                stable = 0
+                previous = current
+                continue
+            stable += 1
+            if changed and stable >= self.stable_polls:
+                return True
+        return False
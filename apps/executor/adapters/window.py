@@ -24,3 +24,21 @@ def get_active_window_info() -> str | None:
     pid = wintypes.DWORD()
     user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
     return f"{title} (pid={pid.value})"
+
+
+def get_active_window_bounds() -> tuple[int, int, int, int] | None:
+    """Best-effort active window rectangle relative to the full virtual-screen capture."""
+    windll = getattr(ctypes, "windll", None)
+    if windll is None:
+        return None
+    user32 = windll.user32
+    hwnd = user32.GetForegroundWindow()
+    if not hwnd:
+        return None
+    rect = wintypes.RECT()
+    if not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    # Captures span all monitors and start at the virtual screen origin.
+    origin_x = user32.GetSystemMetrics(76)  # SM_XVIRTUALSCREEN
+    origin_y = user32.GetSystemMetrics(77)  # SM_YVIRTUALSCREEN
+    return (rect.left - origin_x, rect.top - origin_y, rect.right - origin_x, rect.bottom - origin_y)
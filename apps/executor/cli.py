@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import argparse
 import logging
-from dataclasses import asdict
+from dataclasses import asdict, replace
 
+from apps.executor.adapters import CAPTURE_PROFILES, CaptureProfile, SettleDetector
 from apps.executor.client import PlannerApiClient
 from apps.executor.logging_utils import configure_logging
 from apps.executor.runner import run_session
@@ -19,27 +20,44 @@ logger = logging.getLogger("executor.cli")
 
 
 def _cmd_start_session(args: argparse.Namespace) -> None:
-    client = PlannerApiClient(args.api_url)
-    req = StartSessionRequest(task=args.task, constraints=Constraints(max_steps=args.max_steps))
-    session = client.start_session(req)
+    constraints = Constraints(max_steps=args.max_steps, perception_level=args.perception_level)
+    req = StartSessionRequest(task=args.task, constraints=constraints)
+    with PlannerApiClient(args.api_url, http2=args.http2, wire_codec=args.wire_codec) as client:
+        session = client.start_session(req)
     state = SessionRuntimeState(session_id=session.session_id, task=args.task)
     save_session_state(state)
     print(session.session_id)
 
 
+def _capture_profile(args: argparse.Namespace) -> CaptureProfile:
+    profile = CAPTURE_PROFILES[args.capture_profile]
+    overrides = {
+        "codec": args.capture_codec,
+        "quality": args.capture_quality,
+        "max_long_edge": args.capture_max_edge,
+        "grayscale": True if args.capture_grayscale else None,
+    }
+    return replace(profile, **{key: value for key, value in overrides.items() if value is not None})
+
+
 def _cmd_run(args: argparse.Namespace) -> None:
     state = load_session_state(args.session_id)
     if not state:
         raise SystemExit(f"Session {args.session_id} not found in local state.")
-    client = PlannerApiClient(args.api_url)
-    constraints = Constraints(max_steps=args.max_steps)
-    new_state = run_session(
-        client=client,
-        state=state,
-        constraints=constraints,
-        dry_run=args.dry_run,
-        max_retries=args.max_retries,
-    )
+    constraints = Constraints(max_steps=args.max_steps, perception_level=args.perception_level)
+    with PlannerApiClient(
+        args.api_url, binary_upload=args.binary_upload, http2=args.http2, wire_codec=args.wire_codec
+    ) as client:
+        new_state = run_session(
+            client=client,
+            state=state,
+            constraints=constraints,
+            dry_run=args.dry_run,
+            max_retries=args.max_retries,
+            capture_mode=args.capture_mode,
+            capture_profile=_capture_profile(args),
+            settle=SettleDetector(timeout_seconds=args.settle_timeout) if args.settle_timeout > 0 else None,
+        )
     print(asdict(new_state))
 
 
@@ -47,11 +65,11 @@ def _cmd_confirm(args: argparse.Namespace) -> None:
     state = load_session_state(args.session_id)
     if not state:
         raise SystemExit(f"Session {args.session_id} not found in local state.")
-    client = PlannerApiClient(args.api_url)
-    result = client.confirm(
-        session_id=args.session_id,
-        req=ConfirmRequest(confirmation_id=args.confirmation_id, approved=not args.reject),
-    )
+    with PlannerApiClient(args.api_url, http2=args.http2, wire_codec=args.wire_codec) as client:
+        result = client.confirm(
+            session_id=args.session_id,
+            req=ConfirmRequest(confirmation_id=args.confirmation_id, approved=not args.reject),
+        )
     if result.status == "approved":
         state.pending_confirmation_id = None
         save_session_state(state)
@@ -67,17 +85,36 @@ def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Desktop Agent Executor CLI")
     parser.add_argument("--api-url", default="http://localhost:8001")
     parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--http2", action="store_true", help="negotiate HTTP/2 with the planner (needs httpx[http2])")
+    parser.add_argument(
+        "--wire-codec", choices=["json", "msgpack"], default="json", help="API body encoding (msgpack needs the fast-wire extra)"
+    )
     sub = parser.add_subparsers(dest="command", required=True)
 
     start = sub.add_parser("start-session")
     start.add_argument("--task", required=True)
     start.add_argument("--max-steps", type=int, default=50)
+    start.add_argument("--perception-level", choices=["none", "captcha-only", "full"], default=None)
     start.set_defaults(func=_cmd_start_session)
 
     run = sub.add_parser("run")
     run.add_argument("--session-id", required=True)
     run.add_argument("--max-steps", type=int, default=50)
+    run.add_argument("--perception-level", choices=["none", "captcha-only", "full"], default=None)
     run.add_argument("--max-retries", type=int, default=1)
+    run.add_argument("--capture-mode", choices=["full", "delta"], default="full")
+    run.add_argument("--binary-upload", action="store_true", help="send screenshots as raw binary parts")
+    run.add_argument("--capture-profile", choices=sorted(CAPTURE_PROFILES), default="lossless")
+    run.add_argument("--capture-codec", choices=["png", "webp", "jpeg"])
+    run.add_argument("--capture-quality", type=int)
+    run.add_argument("--capture-max-edge", type=int, help="downscale so the longest edge is at most this")
+    run.add_argument("--capture-grayscale", action="store_true")
+    run.add_argument(
+        "--settle-timeout",
+        type=float,
+        default=2.0,
+        help="max seconds to wait for the screen to settle after an action (0 disables)",
+    )
     run.add_argument("--dry-run", action="store_true", default=True)
     run.add_argument("--no-dry-run", action="store_false", dest="dry_run")
     run.set_defaults(func=_cmd_run)
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from typing import TypeVar
+
 import httpx
+from pydantic import BaseModel
 
+from packages.contracts.codecs import CODECS, JSON_CODEC, codec_for_content_type
 from packages.contracts.models import (
     ConfirmRequest,
     ConfirmResponse,
@@ -10,30 +14,91 @@ from packages.contracts.models import (
     TurnRequest,
     TurnResponse,
 )
+from packages.contracts.wire import TURN_FRAME_CONTENT_TYPE, encode_turn_frame, turn_request_to_json
+
+M = TypeVar("M", bound=BaseModel)
 
 
 class PlannerApiClient:
-    def __init__(self, base_url: str, timeout_seconds: float = 20.0) -> None:
+    """Planner API client backed by one long-lived, keep-alive connection pool.
+
+    Use as a context manager or call `close()` when done. `http2=True` needs the
+    optional `h2` package (`pip install httpx[http2]`). `wire_codec="msgpack"`
+    sends and asks for MessagePack bodies (needs the `fast-wire` extra).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 20.0,
+        binary_upload: bool = False,
+        max_connections: int = 4,
+        max_keepalive_connections: int = 2,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+        transport: httpx.BaseTransport | None = None,
+        wire_codec: str = "json",
+    ) -> None:
+        if wire_codec not in CODECS:
+            raise ValueError(f"wire codec not available: {wire_codec} (msgpack needs the fast-wire extra)")
         self.base_url = base_url.rstrip("/")
         self.timeout_seconds = timeout_seconds
+        self.binary_upload = binary_upload
+        self.codec = CODECS[wire_codec]
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            http2=http2,
+            transport=transport,
+            headers={"Accept": self.codec.media_type},
+        )
+
+    def __enter__(self) -> "PlannerApiClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._client.close()
+
+    def _post(self, path: str, payload: dict) -> httpx.Response:
+        resp = self._client.post(
+            path, content=self.codec.dumps(payload), headers={"Content-Type": self.codec.media_type}
+        )
+        resp.raise_for_status()
+        return resp
+
+    @staticmethod
+    def _decode(resp: httpx.Response, model: type[M]) -> M:
+        codec = codec_for_content_type(resp.headers.get("content-type")) or JSON_CODEC
+        return codec.decode_model(resp.content, model)
 
     def start_session(self, req: StartSessionRequest) -> StartSessionResponse:
-        with httpx.Client(timeout=self.timeout_seconds) as client:
-            resp = client.post(f"{self.base_url}/v1/session/start", json=req.model_dump(mode="json"))
-            resp.raise_for_status()
-            return StartSessionResponse.model_validate(resp.json())
+        resp = self._post("/v1/session/start", req.model_dump(mode="json"))
+        return self._decode(resp, StartSessionResponse)
 
     def turn(self, req: TurnRequest) -> TurnResponse:
-        with httpx.Client(timeout=self.timeout_seconds) as client:
-            resp = client.post(f"{self.base_url}/v1/turn", json=req.model_dump(mode="json", by_alias=True))
+        if self.binary_upload:
+            chunks = encode_turn_frame(req)
+            resp = self._client.post(
+                "/v1/turn/binary",
+                content=chunks,
+                headers={
+                    "Content-Type": TURN_FRAME_CONTENT_TYPE,
+                    "Content-Length": str(sum(len(chunk) for chunk in chunks)),
+                },
+            )
             resp.raise_for_status()
-            return TurnResponse.model_validate(resp.json())
+        else:
+            resp = self._post("/v1/turn", turn_request_to_json(req))
+        return self._decode(resp, TurnResponse)
 
     def confirm(self, session_id: str, req: ConfirmRequest) -> ConfirmResponse:
-        with httpx.Client(timeout=self.timeout_seconds) as client:
-            resp = client.post(
-                f"{self.base_url}/v1/session/{session_id}/confirm",
-                json=req.model_dump(mode="json"),
-            )
-            resp.raise_for_status()
-            return ConfirmResponse.model_validate(resp.json())
+        resp = self._post(f"/v1/session/{session_id}/confirm", req.model_dump(mode="json"))
+        return self._decode(resp, ConfirmResponse)
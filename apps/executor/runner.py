@@ -1,9 +1,18 @@
 from __future__ import annotations
 
 import logging
-import time
 
-from apps.executor.adapters import DesktopInputExecutor, capture_screen, get_active_window_info
+import httpx
+
+from apps.executor.adapters import (
+    CaptureProfile,
+    DeltaScreenCapture,
+    DesktopInputExecutor,
+    SettleDetector,
+    capture_screen,
+    get_active_window_bounds,
+    get_active_window_info,
+)
 from apps.executor.client import PlannerApiClient
 from apps.executor.logging_utils import TraceAdapter
 from apps.executor.state import SessionRuntimeState, save_session_state
@@ -14,39 +23,91 @@ from packages.policy import evaluate_executor_policy
 logger = logging.getLogger("executor.runner")
 
 
+def _capture_bounds(
+    bounds: tuple[int, int, int, int] | None,
+    capture_size: tuple[int, int],
+    physical_size: tuple[int, int],
+) -> tuple[int, int, int, int] | None:
+    """Map a physical-pixel rectangle into capture pixels, clipped to the frame."""
+    if bounds is None:
+        return None
+    sx = capture_size[0] / physical_size[0]
+    sy = capture_size[1] / physical_size[1]
+    left, top = max(0, int(bounds[0] * sx)), max(0, int(bounds[1] * sy))
+    right, bottom = min(capture_size[0], round(bounds[2] * sx)), min(capture_size[1], round(bounds[3] * sy))
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right, bottom)
+
+
 def run_session(
     client: PlannerApiClient,
     state: SessionRuntimeState,
     constraints: Constraints,
     dry_run: bool = True,
     max_retries: int = 1,
+    capture_mode: str = "full",
+    capture_profile: CaptureProfile | None = None,
+    settle: SettleDetector | None = None,
 ) -> SessionRuntimeState:
-    executor = DesktopInputExecutor(dry_run=dry_run)
+    executor = DesktopInputExecutor(dry_run=dry_run, settle=settle)
+    capturer = DeltaScreenCapture(profile=capture_profile) if capture_mode == "delta" else None
     retries = 0
+    # Set after a 409 forced a full frame; a second 409 in a row is an error, not a lost base frame.
+    resent_full_frame = False
 
     while True:
-        screen = capture_screen()
+        screen = capturer.capture() if capturer else capture_screen(capture_profile)
+        physical_size = (screen.physical_width or screen.width, screen.physical_height or screen.height)
+        executor.set_coordinate_space((screen.width, screen.height), physical_size)
         active_window = get_active_window_info()
+        active_window_bounds = _capture_bounds(get_active_window_bounds(), (screen.width, screen.height), physical_size)
         trace_id = new_trace_id()
         log = TraceAdapter(logger, {"trace_id": trace_id})
+        # Raw bytes go into the request as-is; the client base64-encodes them only for JSON uploads.
+        screen_payload = {
+            "image_bytes": screen.image_bytes or None,
+            "width": screen.width,
+            "height": screen.height,
+            "physical_width": physical_size[0],
+            "physical_height": physical_size[1],
+            "image_format": screen.image_format,
+        }
+        if capturer:
+            screen_payload.update(
+                mode=screen.mode,
+                frame_id=screen.frame_id,
+                base_frame_id=screen.base_frame_id,
+                tiles=[
+                    {"x": tile.x, "y": tile.y, "width": tile.width, "height": tile.height, "image_bytes": tile.image_bytes}
+                    for tile in screen.tiles
+                ],
+            )
         req = TurnRequest(
             session_id=state.session_id,
             task=state.task,
-            screen={
-                "image_base64": screen.image_base64,
-                "width": screen.width,
-                "height": screen.height,
-            },
+            screen=screen_payload,
             context=TurnContext(
                 step_index=state.step_index,
                 last_action=state.last_action,
                 last_result=state.last_result,
                 active_window=active_window,
+                active_window_bounds=active_window_bounds,
                 trace_id=trace_id,
             ),
             constraints=constraints,
         )
-        response = client.turn(req)
+        try:
+            response = client.turn(req)
+        except httpx.HTTPStatusError as exc:
+            # The planner lost our base frame (restart or eviction); resend a full capture once.
+            if capturer and exc.response.status_code == 409 and not resent_full_frame:
+                log.info("planner requested full frame; resetting delta capture")
+                capturer.reset()
+                resent_full_frame = True
+                continue
+            raise
+        resent_full_frame = False
         action = response.action
         fingerprint = action_fingerprint(action)
 
@@ -57,6 +118,7 @@ def run_session(
             reasoning=response.reasoning,
             active_window=active_window,
             constraints=constraints,
+            session_id=state.session_id,
         )
 
         if response.confirmation_required or policy.status == "confirm":
@@ -86,12 +148,12 @@ def run_session(
         if action.action == "fail":
             return state
 
-        if action.action == "wait":
-            time.sleep(min(2.0, action.parameters.seconds))
-
         if action.action == "screenshot":
             continue
 
+        if settle is not None and action.action != "wait":
+            settle.wait()
+
         # Basic retry strategy if planner gives repeated no-progress wait actions.
         if action.action == "wait":
             retries += 1
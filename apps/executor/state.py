@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Whole-file JSON written by earlier versions; imported once into the journal.
 STATE_FILE = Path(".executor_state.json")
+JOURNAL_FILE = Path(".executor_state.jsonl")
 
 
 @dataclass(slots=True)
@@ -37,34 +49,200 @@ class SessionRuntimeState:
         return obj
 
 
-def _read_state() -> dict[str, Any]:
-    if not STATE_FILE.exists():
-        return {}
-    return json.loads(STATE_FILE.read_text(encoding="utf-8"))
-
-
-def _write_state(data: dict[str, Any]) -> None:
-    STATE_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+def _encode(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class StateJournal:
+    """Append-only journal of executor session states, one JSON record per line.
+
+    A save appends a single `put` record (a delete, a `delete` record) and
+    fsyncs it, so a step costs one small write however many sessions the file
+    holds. A crash can only tear the line being written; replay skips it and
+    keeps the last complete record per session. Once the journal holds more
+    than `compact_ratio` records per live session (and at least `compact_min`)
+    it is rewritten with one line per session into a temporary file that
+    atomically replaces it. A missing journal is seeded from the legacy
+    `legacy_path` JSON file, which is left in place.
+
+    Several executor processes may share a journal: every call holds an
+    exclusive OS lock on a `.lock` file next to it while it replays what other
+    processes appended and writes its own record, and appends reopen the
+    journal by name, so none lands in a file that compaction has replaced.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = JOURNAL_FILE,
+        legacy_path: str | Path | None = STATE_FILE,
+        compact_min: int = 256,
+        compact_ratio: float = 4.0,
+        durable: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path is not None else None
+        self.compact_min = compact_min
+        self.compact_ratio = compact_ratio
+        self.durable = durable
+        self._states: dict[str, dict[str, Any]] = {}
+        self._records = 0
+        self._offset = 0
+        self._inode: int | None = None
+        self._torn = False
+        self._lock = threading.Lock()
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the thread lock and the cross-process file lock."""
+        with self._lock, self._lock_path.open("a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            else:
+                fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK gives up after about 10 s
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _reset(self) -> None:
+        self._states.clear()
+        self._records = 0
+        self._offset = 0
+        self._inode = None
+        self._torn = False
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "put":
+            self._states[record["session_id"]] = record["state"]
+        elif op == "delete":
+            self._states.pop(record["session_id"], None)
+        self._records += 1
+
+    def _refresh(self) -> None:
+        """Replay records appended since the last call; start over if the file was replaced."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._reset()
+            if self.legacy_path is not None and self.legacy_path.exists():
+                self._import_legacy()
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with self.path.open("rb") as fh:
+            fh.seek(self._offset)
+            data = fh.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line torn by a crash mid-append
+            if isinstance(record, dict):
+                self._apply(record)
+        self._offset += end
+        self._torn = end < len(data)
+
+    def _import_legacy(self) -> None:
+        data = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+        self._states = {session_id: state for session_id, state in data.items() if state}
+        self._compact()
+
+    def _write_synced(self, path: Path, mode: str, data: bytes) -> None:
+        with path.open(mode) as fh:
+            fh.write(data)
+            fh.flush()
+            if self.durable:
+                os.fsync(fh.fileno())
+
+    def _append(self, record: dict[str, Any]) -> None:
+        line = _encode(record)
+        if self._torn:
+            line = b"\n" + line
+        self._write_synced(self.path, "ab", line)
+        if self._inode is None:
+            self._inode = self.path.stat().st_ino
+        self._offset += len(line)
+        self._torn = False
+        self._apply(record)
+        if self._records >= self.compact_min and self._records > self.compact_ratio * max(1, len(self._states)):
+            self._compact()
+
+    def _compact(self) -> None:
+        data = b"".join(
+            _encode({"op": "put", "session_id": session_id, "state": state})
+            for session_id, state in self._states.items()
+        )
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        self._write_synced(tmp, "wb", data)
+        os.replace(tmp, self.path)
+        self._records = len(self._states)
+        self._offset = len(data)
+        self._inode = self.path.stat().st_ino
+        self._torn = False
+
+    def get(self, session_id: str) -> dict[str, Any] | None:
+        with self._locked():
+            self._refresh()
+            return self._states.get(session_id)
+
+    def put(self, session_id: str, state: dict[str, Any]) -> None:
+        with self._locked():
+            self._refresh()
+            self._append({"op": "put", "session_id": session_id, "state": state})
+
+    def delete(self, session_id: str) -> bool:
+        with self._locked():
+            self._refresh()
+            if session_id not in self._states:
+                return False
+            self._append({"op": "delete", "session_id": session_id})
+            return True
+
+    def compact(self) -> None:
+        with self._locked():
+            self._refresh()
+            self._compact()
+
+
+_default_journal: StateJournal | None = None
+_default_lock = threading.Lock()
+
+
+def default_state_journal() -> StateJournal:
+    global _default_journal
+    if _default_journal is None:
+        with _default_lock:
+            if _default_journal is None:
+                _default_journal = StateJournal()
+    return _default_journal
 
 
 def save_session_state(state: SessionRuntimeState) -> None:
-    all_state = _read_state()
-    all_state[state.session_id] = state.to_dict()
-    _write_state(all_state)
+    default_state_journal().put(state.session_id, state.to_dict())
 
 
 def load_session_state(session_id: str) -> SessionRuntimeState | None:
-    all_state = _read_state()
-    raw = all_state.get(session_id)
+    raw = default_state_journal().get(session_id)
     if not raw:
         return None
     return SessionRuntimeState.from_dict(raw)
 
 
 def delete_session_state(session_id: str) -> bool:
-    all_state = _read_state()
-    if session_id not in all_state:
-        return False
-    del all_state[session_id]
-    _write_state(all_state)
-    return True
+    return default_state_journal().delete(session_id)
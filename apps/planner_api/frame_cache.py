@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PIL import Image
+
+from packages.perception import PerceptionSnapshot
+from packages.perception.image_utils import Box
+
+
+def _image_nbytes(image: Image.Image) -> int:
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+@dataclass(slots=True)
+class CachedFrame:
+    frame_id: str
+    image: Image.Image
+    digest: str
+    size: int
+    snapshot: PerceptionSnapshot | None = None
+    # Area the snapshot's OCR was limited to, if any.
+    roi: Box | None = None
+
+
+class FrameCache:
+    """Process-local LRU of the last full frame per session, bounded by decoded bytes.
+
+    Delta captures are rebuilt on top of the cached frame; a miss means the
+    executor has to resend a full capture. The frame's perception snapshot rides
+    along so the next frame can be read incrementally.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict[str, CachedFrame] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, frame_id: str) -> CachedFrame | None:
+        with self._lock:
+            entry = self._frames.get(session_id)
+            if entry is None or entry.frame_id != frame_id:
+                return None
+            self._frames.move_to_end(session_id)
+            return entry
+
+    def latest(self, session_id: str) -> CachedFrame | None:
+        """The session's last frame, whatever its id."""
+        with self._lock:
+            entry = self._frames.get(session_id)
+            if entry is not None:
+                self._frames.move_to_end(session_id)
+            return entry
+
+    def put(
+        self,
+        session_id: str,
+        frame_id: str,
+        image: Image.Image,
+        digest: str,
+        snapshot: PerceptionSnapshot | None = None,
+        roi: Box | None = None,
+    ) -> None:
+        size = _image_nbytes(image)
+        with self._lock:
+            self._discard_locked(session_id)
+            if size > self.max_bytes:
+                return
+            self._frames[session_id] = CachedFrame(
+                frame_id=frame_id, image=image, digest=digest, size=size, snapshot=snapshot, roi=roi
+            )
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._discard_locked(session_id)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._frames), "bytes": self._bytes}
+
+    def _discard_locked(self, session_id: str) -> None:
+        entry = self._frames.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
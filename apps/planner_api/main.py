@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 from apps.planner_api.logging_utils import configure_logging
-from apps.planner_api.providers import CloudVLMProvider, PlannerProvider
+from apps.planner_api.negotiation import NegotiatedRoute, negotiated_response
+from apps.planner_api.providers import AsyncCloudVLMProvider, AsyncPlannerProvider, PlannerProvider
 from apps.planner_api.service import PlannerService
-from apps.planner_api.session_store import SessionStore
+from apps.planner_api.session_sqlite import SqliteSessionStore
+from apps.planner_api.session_store import SessionBackend, SessionLimits, SessionStore
 from packages.contracts.models import (
     ConfirmRequest,
     ConfirmResponse,
@@ -14,28 +21,138 @@ from packages.contracts.models import (
     TurnRequest,
     TurnResponse,
 )
+from packages.contracts.wire import TURN_FRAME_CONTENT_TYPE, decode_turn_frame
+from packages.perception import OCRPreprocess, PerceptionCache, TermMatcher
 
 configure_logging()
 
-def create_app(provider: PlannerProvider | None = None, session_store: SessionStore | None = None) -> FastAPI:
-    app = FastAPI(title="Desktop Agent Planner API", version="0.1.0")
-    service = PlannerService(provider=provider or CloudVLMProvider(), session_store=session_store or SessionStore())
+
+def _perception_cache_from_env() -> PerceptionCache | None:
+    """Build the perception cache from `DESKTOP_AGENT_PERCEPTION_CACHE_*` env vars; size 0 disables it."""
+    size_mb = int(os.getenv("DESKTOP_AGENT_PERCEPTION_CACHE_MB", "").strip() or 64)
+    if size_mb <= 0:
+        return None
+    near_bits = os.getenv("DESKTOP_AGENT_PERCEPTION_CACHE_NEAR_BITS", "").strip()
+    scope = os.getenv("DESKTOP_AGENT_PERCEPTION_CACHE_SCOPE", "").strip() or "session"
+    if scope not in {"session", "global"}:
+        raise ValueError(f"invalid DESKTOP_AGENT_PERCEPTION_CACHE_SCOPE: {scope}")
+    return PerceptionCache(
+        max_bytes=size_mb * 1024 * 1024,
+        near_duplicate_bits=int(near_bits) if near_bits else None,
+        scope=scope,
+    )
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in {"1", "true", "yes"}
+
+
+def _ocr_preprocess_from_env() -> OCRPreprocess | None:
+    """Build OCR preprocessing from `DESKTOP_AGENT_OCR_*` env vars; off unless `DESKTOP_AGENT_OCR_PREPROCESS` is set."""
+    if not _env_flag("DESKTOP_AGENT_OCR_PREPROCESS"):
+        return None
+    max_edge = os.getenv("DESKTOP_AGENT_OCR_MAX_EDGE", "").strip()
+    return OCRPreprocess(
+        max_long_edge=int(max_edge) if max_edge else None,
+        active_window_only=_env_flag("DESKTOP_AGENT_OCR_ACTIVE_WINDOW_ONLY"),
+    )
+
+
+def _term_matcher_from_env() -> TermMatcher | None:
+    """Extend the default UI vocabulary with files listed in `DESKTOP_AGENT_UI_VOCAB` (os.pathsep-separated)."""
+    paths = [path for path in os.getenv("DESKTOP_AGENT_UI_VOCAB", "").split(os.pathsep) if path.strip()]
+    return TermMatcher.from_files(*paths) if paths else None
+
+
+def _session_store_from_env() -> SessionBackend:
+    """Build the session store from `DESKTOP_AGENT_SESSION_*` env vars; unset limits are off.
+
+    With `DESKTOP_AGENT_SESSION_DB` set, sessions live in that SQLite file and are
+    shared by every planner worker on the host; otherwise they stay in memory.
+    """
+
+    def _number(name: str) -> float | None:
+        raw = os.getenv(name, "").strip()
+        return float(raw) if raw else None
+
+    max_sessions = _number("DESKTOP_AGENT_MAX_SESSIONS")
+    limits = SessionLimits(
+        ttl_seconds=_number("DESKTOP_AGENT_SESSION_TTL"),
+        idle_seconds=_number("DESKTOP_AGENT_SESSION_IDLE"),
+        max_sessions=int(max_sessions) if max_sessions is not None else None,
+        confirmation_ttl_seconds=_number("DESKTOP_AGENT_CONFIRMATION_TTL"),
+        sweep_interval=_number("DESKTOP_AGENT_SESSION_SWEEP_INTERVAL") or 30.0,
+    )
+    db_path = os.getenv("DESKTOP_AGENT_SESSION_DB", "").strip()
+    if db_path:
+        return SqliteSessionStore(db_path, limits)
+    return SessionStore(limits)
+
+
+def create_app(
+    provider: PlannerProvider | AsyncPlannerProvider | None = None,
+    session_store: SessionBackend | None = None,
+) -> FastAPI:
+    sessions = session_store or _session_store_from_env()
+    service = PlannerService(
+        provider=provider or AsyncCloudVLMProvider(),
+        session_store=sessions,
+        perception_cache=_perception_cache_from_env(),
+        incremental_ocr=_env_flag("DESKTOP_AGENT_INCREMENTAL_OCR"),
+        ocr_preprocess=_ocr_preprocess_from_env(),
+        snap_radius=int(os.getenv("DESKTOP_AGENT_SNAP_RADIUS", "").strip() or 0) or None,
+        term_matcher=_term_matcher_from_env(),
+        loop_guard=int(os.getenv("DESKTOP_AGENT_LOOP_GUARD", "").strip() or 0) or None,
+    )
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        sessions.start_sweeper()
+        yield
+        sessions.close()
+        await service.aclose()
+
+    app = FastAPI(title="Desktop Agent Planner API", version="0.1.0", lifespan=lifespan)
 
     @app.get("/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
-    @app.post("/v1/session/start", response_model=StartSessionResponse)
-    def start_session(req: StartSessionRequest) -> StartSessionResponse:
-        return service.start_session(req)
+    @app.get("/v1/stats")
+    def stats() -> dict:
+        return service.stats()
+
+    # Bodies and responses on these routes may be JSON or MessagePack (see packages.contracts.codecs).
+    negotiated = APIRouter(route_class=NegotiatedRoute)
+
+    @negotiated.post("/v1/session/start", response_model=StartSessionResponse)
+    def start_session(req: StartSessionRequest, request: Request) -> Response:
+        return negotiated_response(service.start_session(req), request)
+
+    @negotiated.post("/v1/session/{session_id}/confirm", response_model=ConfirmResponse)
+    def confirm_action(session_id: str, req: ConfirmRequest, request: Request) -> Response:
+        return negotiated_response(service.confirm(session_id, req), request)
+
+    @negotiated.post("/v1/turn", response_model=TurnResponse)
+    async def turn(req: TurnRequest, request: Request) -> Response:
+        return negotiated_response(await service.turn_async(req), request)
 
-    @app.post("/v1/session/{session_id}/confirm", response_model=ConfirmResponse)
-    def confirm_action(session_id: str, req: ConfirmRequest) -> ConfirmResponse:
-        return service.confirm(session_id, req)
+    app.include_router(negotiated)
 
-    @app.post("/v1/turn", response_model=TurnResponse)
-    def turn(req: TurnRequest) -> TurnResponse:
-        return service.turn(req)
+    @app.post(
+        "/v1/turn/binary",
+        response_model=TurnResponse,
+        openapi_extra={"requestBody": {"content": {TURN_FRAME_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}}}},
+    )
+    async def turn_binary(request: Request) -> Response:
+        """Same as `/v1/turn`, with images sent as raw length-prefixed parts."""
+        try:
+            req = decode_turn_frame(await request.body())
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors(include_url=False)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return negotiated_response(await service.turn_async(req), request)
 
     return app
 
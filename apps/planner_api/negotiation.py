@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from packages.contracts.codecs import JSON_MEDIA_TYPE, Codec, codec_for_content_type, negotiate
+
+
+class _DecodedRequest(Request):
+    """Request whose body is parsed with the negotiated codec instead of stdlib `json`."""
+
+    codec: Codec
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = self.codec.loads(await self.body())
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Route that accepts any available codec's request bodies (by `Content-Type`).
+
+    FastAPI still validates the body against the endpoint's model, so the
+    OpenAPI schema is unchanged; non-JSON bodies are presented to it as JSON.
+    Unsupported content types are answered with 415.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            codec = codec_for_content_type(request.headers.get("content-type"))
+            if codec is None:
+                raise HTTPException(status_code=415, detail="unsupported content type")
+            scope = request.scope
+            if codec.media_type != JSON_MEDIA_TYPE:
+                headers = [(k, v) for k, v in scope["headers"] if k != b"content-type"]
+                scope = {**scope, "headers": [*headers, (b"content-type", JSON_MEDIA_TYPE.encode())]}
+            decoded = _DecodedRequest(scope, request.receive)
+            decoded.codec = codec
+            return await handler(decoded)
+
+        return route_handler
+
+
+def negotiated_response(model: BaseModel, request: Request) -> Response:
+    """Serialise `model` with the codec the client's `Accept` header prefers."""
+    codec = negotiate(request.headers.get("accept"))
+    return Response(content=codec.encode_model(model), media_type=codec.media_type)
@@ -1,4 +1,15 @@
-from .base import PlannerProvider, ProviderInput, ProviderOutput
-from .cloud_vlm import CloudVLMProvider
+from .base import AsyncPlannerProvider, PlannerProvider, ProviderInput, ProviderOutput
+from .cloud_vlm import AsyncCloudVLMProvider, CloudVLMProvider
+from .shaping import RequestBudget, RequestShaper, ShapedRequest
 
-__all__ = ["PlannerProvider", "ProviderInput", "ProviderOutput", "CloudVLMProvider"]
+__all__ = [
+    "AsyncCloudVLMProvider",
+    "AsyncPlannerProvider",
+    "PlannerProvider",
+    "ProviderInput",
+    "ProviderOutput",
+    "CloudVLMProvider",
+    "RequestBudget",
+    "RequestShaper",
+    "ShapedRequest",
+]
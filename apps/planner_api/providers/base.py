@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Protocol
 
+from apps.planner_api.step_history import StepRecord
 from packages.contracts.models import DesktopAction
+from packages.perception.frame import Frame
 
 
 @dataclass(slots=True)
@@ -15,8 +17,17 @@ class ProviderInput:
     active_window: str | None
     ocr_text: list[str]
     candidate_text: list[str]
-    image_base64: str
+    frame: Frame
     last_result_message: str | None
+    active_window_bounds: tuple[int, int, int, int] | None = None
+    # Content digest of this turn's frame and the session's latest steps, oldest first.
+    screen_digest: str | None = None
+    recent_steps: list[StepRecord] = field(default_factory=list)
+
+    @property
+    def image_base64(self) -> str:
+        """The screenshot as base64, shared with (not copied from) the turn's frame."""
+        return self.frame.base64
 
 
 @dataclass(slots=True)
@@ -31,3 +42,8 @@ class ProviderOutput:
 class PlannerProvider(Protocol):
     def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
         ...
+
+
+class AsyncPlannerProvider(Protocol):
+    async def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
+        ...
@@ -1,24 +1,60 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 
 import httpx
 
 from packages.contracts.models import DesktopAction
 
-from .base import PlannerProvider, ProviderInput, ProviderOutput
+from .base import AsyncPlannerProvider, PlannerProvider, ProviderInput, ProviderOutput
+from .shaping import RequestBudget, RequestShaper, ShapedRequest
 
 
-class CloudVLMProvider(PlannerProvider):
-    """Cloud provider adapter with deterministic fallback.
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else default
 
-    If env var `DESKTOP_AGENT_VLM_URL` is not set, returns a deterministic local stub.
-    """
 
-    def __init__(self, timeout_seconds: float = 15.0) -> None:
+class _CloudVLMBase:
+    """Configuration, request building and stub planning shared by the sync and async adapters."""
+
+    def __init__(
+        self,
+        timeout_seconds: float = 15.0,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float = 30.0,
+        http2: bool | None = None,
+        transport: httpx.BaseTransport | httpx.AsyncBaseTransport | None = None,
+        budget: RequestBudget | None = None,
+    ) -> None:
         self._url = os.getenv("DESKTOP_AGENT_VLM_URL", "").strip()
         self._api_key = os.getenv("DESKTOP_AGENT_VLM_API_KEY", "").strip()
         self._timeout = timeout_seconds
+        self._limits = httpx.Limits(
+            max_connections=max_connections or _env_int("DESKTOP_AGENT_VLM_MAX_CONNECTIONS", 64),
+            max_keepalive_connections=max_keepalive_connections or _env_int("DESKTOP_AGENT_VLM_MAX_KEEPALIVE", 32),
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 is None:
+            http2 = os.getenv("DESKTOP_AGENT_VLM_HTTP2", "").strip().lower() in {"1", "true", "yes"}
+        self._http2 = http2
+        self._transport = transport
+        self._shaper = RequestShaper(budget or RequestBudget.from_env())
+
+    def _client_options(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self._api_key:
+            headers["Authorization"] = f"Bearer {self._api_key}"
+        return {
+            "timeout": self._timeout,
+            "limits": self._limits,
+            "http2": self._http2,
+            "headers": headers,
+            "transport": self._transport,
+        }
 
     def _stub(self, payload: ProviderInput) -> ProviderOutput:
         if payload.step_index == 0:
@@ -48,40 +84,100 @@ class CloudVLMProvider(PlannerProvider):
             expected_outcome="updated screen state",
         )
 
-    def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
-        if not self._url:
-            return self._stub(payload)
-
-        headers = {"Content-Type": "application/json"}
-        if self._api_key:
-            headers["Authorization"] = f"Bearer {self._api_key}"
-
-        request_payload = {
+    def _request_body(self, payload: ProviderInput, shaped: ShapedRequest) -> dict:
+        return {
             "task": payload.task,
             "step_index": payload.step_index,
             "screen": {
-                "image_base64": payload.image_base64,
-                "width": payload.width,
-                "height": payload.height,
+                "image_base64": shaped.image_base64,
+                "image_format": shaped.image_format,
+                "width": shaped.width,
+                "height": shaped.height,
             },
             "active_window": payload.active_window,
-            "ocr_text": payload.ocr_text[:200],
-            "candidates": payload.candidate_text[:200],
+            "ocr_text": shaped.ocr_text,
+            "candidates": shaped.candidate_text,
             "last_result_message": payload.last_result_message,
+            "recent_steps": [step.to_dict(payload.screen_digest) for step in payload.recent_steps],
             "requirements": {
                 "single_action_only": True,
                 "unsupported_actions": ["speak"],
             },
         }
-        with httpx.Client(timeout=self._timeout) as client:
-            response = client.post(self._url, json=request_payload, headers=headers)
-            response.raise_for_status()
-            body = response.json()
 
+    @staticmethod
+    def _parse_output(body: dict, shaped: ShapedRequest) -> ProviderOutput:
         return ProviderOutput(
             observation=body["observation"],
             reasoning=body["reasoning"],
-            action=body["action"],
+            action=shaped.restore_action(body["action"]),
             confidence=float(body.get("confidence", 0.5)),
             expected_outcome=body.get("expected_outcome", "state change"),
         )
+
+
+class CloudVLMProvider(_CloudVLMBase, PlannerProvider):
+    """Cloud provider adapter with deterministic fallback.
+
+    If env var `DESKTOP_AGENT_VLM_URL` is not set, returns a deterministic local stub.
+    Remote calls share one pooled keep-alive client, created on first use and
+    released by `close()`. Pool limits and HTTP/2 default to the
+    `DESKTOP_AGENT_VLM_MAX_CONNECTIONS`, `DESKTOP_AGENT_VLM_MAX_KEEPALIVE` and
+    `DESKTOP_AGENT_VLM_HTTP2` env vars. Requests are fitted to `budget` (default
+    from the `DESKTOP_AGENT_VLM_*` budget env vars, see `RequestBudget.from_env`)
+    and planned coordinates are mapped back to capture space.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+
+    def _http(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_options())
+        return self._client
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
+        if not self._url:
+            return self._stub(payload)
+        shaped = self._shaper.shape(payload)
+        response = self._http().post(self._url, json=self._request_body(payload, shaped))
+        response.raise_for_status()
+        return self._parse_output(response.json(), shaped)
+
+
+class AsyncCloudVLMProvider(_CloudVLMBase, AsyncPlannerProvider):
+    """`CloudVLMProvider` counterpart whose VLM requests are awaited on the event loop.
+
+    The pooled `httpx.AsyncClient` is created on first use inside the running loop
+    and released by `aclose()`.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._client: httpx.AsyncClient | None = None
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
+        if not self._url:
+            return self._stub(payload)
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self._client_options())
+        # Decoding, resizing and re-encoding the capture is CPU-bound; keep it off the loop.
+        shaped = await asyncio.to_thread(self._shaper.shape, payload)
+        response = await self._client.post(self._url, json=self._request_body(payload, shaped))
+        response.raise_for_status()
+        return self._parse_output(response.json(), shaped)
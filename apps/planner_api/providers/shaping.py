@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import base64
+import os
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from packages.contracts.models import (
+    ClickAction,
+    DesktopAction,
+    DoubleClickAction,
+    DragAction,
+    MoveAction,
+    RightClickAction,
+)
+from packages.perception.frame import Frame
+from packages.perception.image_utils import Box, downscale, encode_image
+
+from .base import ProviderInput
+
+# Rough size of one text token for budgeting; close enough for Latin UI text.
+_CHARS_PER_TOKEN = 4
+_QUALITY_STEPS = (80, 65, 50, 35)
+_MIN_LONG_EDGE = 320
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(slots=True, frozen=True)
+class RequestBudget:
+    """Limits on what one VLM request may carry.
+
+    `codec="original"` forwards the capture untouched unless a size limit or
+    the active-window crop forces a re-encode (then JPEG is used). Text is
+    budgeted in approximate tokens across OCR strings and candidates.
+    """
+
+    max_image_bytes: int | None = None
+    max_long_edge: int | None = None
+    codec: Literal["original", "jpeg", "webp", "png"] = "original"
+    quality: int = 80
+    crop_to_active_window: bool = False
+    max_text_tokens: int = 4000
+    max_items: int = 200
+
+    @classmethod
+    def from_env(cls) -> "RequestBudget":
+        """Read `DESKTOP_AGENT_VLM_*` budget env vars; unset values keep the defaults."""
+
+        def _int(name: str) -> int | None:
+            raw = os.getenv(name, "").strip()
+            return int(raw) if raw else None
+
+        codec = os.getenv("DESKTOP_AGENT_VLM_IMAGE_CODEC", "").strip().lower() or "original"
+        if codec not in {"original", "jpeg", "webp", "png"}:
+            raise ValueError(f"invalid DESKTOP_AGENT_VLM_IMAGE_CODEC: {codec}")
+        return cls(
+            max_image_bytes=_int("DESKTOP_AGENT_VLM_MAX_IMAGE_BYTES"),
+            max_long_edge=_int("DESKTOP_AGENT_VLM_MAX_EDGE"),
+            codec=codec,
+            quality=_int("DESKTOP_AGENT_VLM_IMAGE_QUALITY") or 80,
+            crop_to_active_window=os.getenv("DESKTOP_AGENT_VLM_CROP_ACTIVE_WINDOW", "").strip().lower()
+            in {"1", "true", "yes"},
+            max_text_tokens=_int("DESKTOP_AGENT_VLM_TEXT_TOKENS") or 4000,
+        )
+
+
+@dataclass(slots=True)
+class ShapedRequest:
+    """Image and text as sent to the VLM, plus the mapping back to capture space.
+
+    A point (x, y) in the sent image is `(x / scale[0] + offset[0], y / scale[1] + offset[1])`
+    in the capture; each side is rounded on its own when downscaling, so the axes
+    get separate scales.
+    """
+
+    image_base64: str
+    image_format: str
+    width: int
+    height: int
+    ocr_text: list[str]
+    candidate_text: list[str]
+    scale: tuple[float, float] = (1.0, 1.0)
+    offset: tuple[int, int] = (0, 0)
+
+    def to_capture(self, x: int, y: int) -> tuple[int, int]:
+        return (round(x / self.scale[0]) + self.offset[0], round(y / self.scale[1]) + self.offset[1])
+
+    def restore_action(self, action: DesktopAction | dict[str, Any]) -> DesktopAction | dict[str, Any]:
+        """Map a planned action's coordinates from the sent image back to the capture."""
+        if self.scale == (1.0, 1.0) and self.offset == (0, 0):
+            return action
+        if isinstance(action, dict):
+            params = action.get("parameters")
+            if not isinstance(params, dict):
+                return action
+            params = dict(params)
+            if isinstance(params.get("x"), (int, float)) and isinstance(params.get("y"), (int, float)):
+                params["x"], params["y"] = self.to_capture(params["x"], params["y"])
+            for key in ("from", "from_", "to"):
+                point = params.get(key)
+                if isinstance(point, (list, tuple)) and len(point) == 2:
+                    params[key] = self.to_capture(*point)
+            return {**action, "parameters": params}
+        if isinstance(action, (ClickAction, DoubleClickAction, RightClickAction, MoveAction)):
+            action = action.model_copy(deep=True)
+            action.parameters.x, action.parameters.y = self.to_capture(action.parameters.x, action.parameters.y)
+        elif isinstance(action, DragAction):
+            action = action.model_copy(deep=True)
+            action.parameters.from_ = self.to_capture(*action.parameters.from_)
+            action.parameters.to = self.to_capture(*action.parameters.to)
+        return action
+
+
+def _key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _cost(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def select_text(texts: Sequence[str], task: str, max_tokens: int, max_items: int) -> list[str]:
+    """Pick the strings most relevant to `task` within `max_tokens`, deduplicated.
+
+    Strings sharing more words with the task rank first, earlier strings win
+    ties; the selection keeps the input order, so OCR stays in reading order
+    and candidates stay best score first.
+    """
+    task_words = set(_WORD.findall(task.lower()))
+    seen: set[str] = set()
+    ranked: list[tuple[int, int, str]] = []
+    for position, text in enumerate(texts):
+        key = _key(text)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        overlap = sum(1 for word in set(_WORD.findall(key)) if word in task_words)
+        ranked.append((-overlap, position, text))
+    ranked.sort()
+
+    picked: list[tuple[int, str]] = []
+    spent = 0
+    for _, position, text in ranked:
+        if len(picked) >= max_items:
+            break
+        cost = _cost(text)
+        if spent + cost > max_tokens:
+            continue
+        spent += cost
+        picked.append((position, text))
+    picked.sort()
+    return [text for _, text in picked]
+
+
+def _crop_box(bounds: Box | None, size: tuple[int, int]) -> Box | None:
+    if bounds is None:
+        return None
+    left, top = max(0, bounds[0]), max(0, bounds[1])
+    right, bottom = min(size[0], bounds[2]), min(size[1], bounds[3])
+    if right - left < 16 or bottom - top < 16 or (left, top, right, bottom) == (0, 0, *size):
+        return None
+    return (left, top, right, bottom)
+
+
+class RequestShaper:
+    """Fits a `ProviderInput` into a `RequestBudget` before it is sent to the VLM.
+
+    The image is cropped to the active window (when enabled), downscaled and
+    re-encoded, stepping quality then size down until it fits `max_image_bytes`;
+    unchanged captures are forwarded without decoding. OCR and candidate text
+    share the token budget, candidates first.
+    """
+
+    def __init__(self, budget: RequestBudget | None = None) -> None:
+        self.budget = budget or RequestBudget()
+
+    def shape(self, payload: ProviderInput) -> ShapedRequest:
+        budget = self.budget
+        candidates = select_text(payload.candidate_text, payload.task, budget.max_text_tokens // 2, budget.max_items)
+        spent = sum(_cost(text) for text in candidates)
+        ocr_text = select_text(payload.ocr_text, payload.task, budget.max_text_tokens - spent, budget.max_items)
+        shaped = self._shape_image(payload)
+        shaped.ocr_text = ocr_text
+        shaped.candidate_text = candidates
+        return shaped
+
+    def _shape_image(self, payload: ProviderInput) -> ShapedRequest:
+        budget = self.budget
+        frame: Frame = payload.frame
+        crop = None
+        if budget.crop_to_active_window:
+            crop = _crop_box(payload.active_window_bounds, (payload.width, payload.height))
+        if crop is None and budget.codec == "original" and budget.max_long_edge is None:
+            if budget.max_image_bytes is None or len(frame.view()) <= budget.max_image_bytes:
+                return ShapedRequest(frame.base64, frame.image_format, payload.width, payload.height, [], [])
+
+        if crop is not None:
+            source = frame.image.crop(crop)
+            offset = (crop[0], crop[1])
+        else:
+            source = frame.image
+            offset = (0, 0)
+        long_edge = max(source.size)
+        if budget.max_long_edge is not None:
+            long_edge = min(long_edge, budget.max_long_edge)
+        codec = "jpeg" if budget.codec == "original" else budget.codec
+        qualities = (budget.quality, *(q for q in _QUALITY_STEPS if q < budget.quality))
+        if codec == "png":
+            qualities = (budget.quality,)
+
+        while True:
+            image = frame.downscaled(long_edge) if crop is None else downscale(source, long_edge)
+            if image.mode not in {"RGB", "L"}:
+                image = image.convert("RGB")
+            for quality in qualities:
+                data = encode_image(image, codec, quality)
+                if budget.max_image_bytes is None or len(data) <= budget.max_image_bytes:
+                    break
+            fits = budget.max_image_bytes is None or len(data) <= budget.max_image_bytes
+            if fits or long_edge <= _MIN_LONG_EDGE:
+                break
+            long_edge = max(_MIN_LONG_EDGE, int(long_edge * 0.75))
+
+        return ShapedRequest(
+            image_base64=base64.b64encode(data).decode("ascii"),
+            image_format=codec,
+            width=image.width,
+            height=image.height,
+            ocr_text=[],
+            candidate_text=[],
+            scale=(image.width / source.width, image.height / source.height),
+            offset=offset,
+        )
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import inspect
 import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import HTTPException
+from PIL import Image
 
+from apps.planner_api.frame_cache import CachedFrame, FrameCache
 from apps.planner_api.logging_utils import TraceAdapter
-from apps.planner_api.providers import PlannerProvider, ProviderInput
-from apps.planner_api.session_store import SessionStore
+from apps.planner_api.providers import AsyncPlannerProvider, PlannerProvider, ProviderInput, ProviderOutput
+from apps.planner_api.session_store import SessionBackend, SessionState
+from apps.planner_api.step_history import StepHistory, StepRecord
 from packages.contracts.models import (
     ConfirmRequest,
     ConfirmResponse,
+    PerceptionLevel,
+    ScreenCapture,
+    ScreenTile,
     StartSessionRequest,
     StartSessionResponse,
     TurnRequest,
@@ -17,21 +32,98 @@ from packages.contracts.models import (
 )
 from packages.contracts.normalization import normalize_action
 from packages.contracts.utils import action_fingerprint, new_trace_id
-from packages.perception import analyze_screen
-from packages.policy.risk import classify_risk
+from packages.perception import (
+    Frame,
+    OCRPreprocess,
+    PerceptionCache,
+    PerceptionSnapshot,
+    PriorFrame,
+    TermMatcher,
+    analyze_screen,
+    captcha_detected,
+    default_ocr_pool,
+)
+from packages.perception.image_utils import Box, apply_tiles, decode_image_payload, perceptual_hash
+from packages.policy import PolicyEngine, default_policy_engine
 
 logger = logging.getLogger("planner_api.service")
 
+# Providers read at most this many candidate strings per turn.
+_PROVIDER_TEXT_LIMIT = 200
+# ...and this many of the session's latest steps.
+_PROVIDER_STEP_LIMIT = 8
+
+
+def _slot_bytes(slot: ScreenCapture | ScreenTile) -> bytes:
+    return slot.image_bytes if slot.image_bytes is not None else base64.b64decode(slot.image_base64)
 
-def _captcha_detected(ocr_text: list[str]) -> bool:
-    joined = " ".join(ocr_text).lower()
-    return "captcha" in joined or "i am not a robot" in joined
+
+def _delta_digest(base_digest: str, tiles: list[ScreenTile]) -> str:
+    """Digest of a rebuilt frame; a delta without tiles is the base frame itself."""
+    if not tiles:
+        return base_digest
+    h = hashlib.blake2b(base_digest.encode("ascii"), digest_size=16)
+    for tile in tiles:
+        h.update(struct.pack(">4I", tile.x, tile.y, tile.width, tile.height))
+        h.update(_slot_bytes(tile))
+    return h.hexdigest()
 
 
 class PlannerService:
-    def __init__(self, provider: PlannerProvider, session_store: SessionStore) -> None:
+    def __init__(
+        self,
+        provider: PlannerProvider | AsyncPlannerProvider,
+        session_store: SessionBackend,
+        frame_cache: FrameCache | None = None,
+        perception_workers: int | None = None,
+        perception_cache: PerceptionCache | None = None,
+        incremental_ocr: bool = False,
+        ocr_preprocess: OCRPreprocess | None = None,
+        snap_radius: int | None = None,
+        term_matcher: TermMatcher | None = None,
+        policy_engine: PolicyEngine | None = None,
+        loop_guard: int | None = None,
+    ) -> None:
         self.provider = provider
         self.sessions = session_store
+        self.frames = frame_cache or FrameCache()
+        self.perception_cache = perception_cache
+        # Keeps every session's last frame and tokens so OCR re-reads only changed regions.
+        self.incremental_ocr = incremental_ocr
+        self.ocr_preprocess = ocr_preprocess
+        # Clicks this close to a detected button are moved onto its centre.
+        self.snap_radius = snap_radius
+        self.term_matcher = term_matcher
+        self.policy = policy_engine or default_policy_engine()
+        # Stop, without asking the provider, once this many consecutive turns planned the
+        # same action on an unchanged screen.
+        self.loop_guard = loop_guard
+        session_store.on_evict(self._forget_session)
+        self._stage_totals: dict[str, list[float]] = {}
+        self._stage_lock = threading.Lock()
+        self._provider_is_async = inspect.iscoroutinefunction(provider.plan_next_action)
+        # Bounds how many CPU-heavy perception stages (decode, OCR, grounding) run at once.
+        self._perception_pool = ThreadPoolExecutor(
+            max_workers=perception_workers or min(8, os.cpu_count() or 1),
+            thread_name_prefix="perception",
+        )
+
+    def close(self) -> None:
+        """Release the perception pool and sync provider resources such as pooled HTTP connections."""
+        self._perception_pool.shutdown(wait=False, cancel_futures=True)
+        close = getattr(self.provider, "close", None)
+        if callable(close) and not inspect.iscoroutinefunction(close):
+            close()
+
+    async def aclose(self) -> None:
+        self._perception_pool.shutdown(wait=False, cancel_futures=True)
+        close = getattr(self.provider, "aclose", None) or getattr(self.provider, "close", None)
+        if not callable(close):
+            return
+        if inspect.iscoroutinefunction(close):
+            await close()
+        else:
+            close()
 
     def start_session(self, req: StartSessionRequest) -> StartSessionResponse:
         state = self.sessions.create(task=req.task, constraints=req.constraints)
@@ -46,25 +138,171 @@ class PlannerService:
         if not state:
             raise HTTPException(status_code=404, detail="session not found")
 
-        approved = req.approved and self.sessions.approve_confirmation(session_id, req.confirmation_id)
-        status = "approved" if approved else "not_found"
-        if not req.approved:
-            status = "rejected"
-            state.pending_confirmations.pop(req.confirmation_id, None)
+        try:
+            if req.approved:
+                approved = self.sessions.approve_confirmation(session_id, req.confirmation_id)
+                status = "approved" if approved else "not_found"
+            else:
+                self.sessions.reject_confirmation(session_id, req.confirmation_id)
+                status = "rejected"
+        except KeyError:
+            # Evicted by the sweeper since the lookup above.
+            raise HTTPException(status_code=404, detail="session not found") from None
         return ConfirmResponse(session_id=session_id, confirmation_id=req.confirmation_id, status=status)
 
-    def turn(self, req: TurnRequest) -> TurnResponse:
-        trace_id = req.context.trace_id or new_trace_id()
-        log = TraceAdapter(logger, {"trace_id": trace_id})
+    def _forget_session(self, session_id: str) -> None:
+        self.frames.discard(session_id)
+        self.policy.forget(session_id)
+        if self.perception_cache is not None:
+            self.perception_cache.discard_namespace(session_id)
+
+    def stats(self) -> dict[str, dict | None]:
+        with self._stage_lock:
+            stages = {
+                stage: {"calls": int(calls), "total_ms": round(seconds * 1000, 3)}
+                for stage, (calls, seconds) in self._stage_totals.items()
+            }
+        return {
+            "sessions": self.sessions.stats(),
+            "frame_cache": self.frames.stats(),
+            "perception_cache": self.perception_cache.stats() if self.perception_cache else None,
+            "ocr_pool": default_ocr_pool().stats(),
+            "perception_stages": stages,
+        }
+
+    def _record_stages(self, timings: dict[str, float]) -> None:
+        with self._stage_lock:
+            for stage, seconds in timings.items():
+                totals = self._stage_totals.setdefault(stage, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+
+    @staticmethod
+    def _perception_level(req: TurnRequest, session: SessionState) -> PerceptionLevel:
+        if req.constraints is not None and req.constraints.perception_level is not None:
+            return req.constraints.perception_level
+        return session.constraints.perception_level or "full"
+
+    def _resolve_frame(
+        self,
+        req: TurnRequest,
+        timings: dict[str, float],
+        perceive: bool = True,
+    ) -> tuple[Frame, str, CachedFrame | None]:
+        """Return the turn's frame, its content digest and the session's previous frame.
+
+        Delta captures are rebuilt on the cached base frame; full captures are
+        wrapped as they arrived and decoded only once something needs pixels.
+        """
+        screen = req.screen
+        if screen.mode == "delta":
+            base = self.frames.get(req.session_id, screen.base_frame_id or "")
+            if base is None or base.image.size != (screen.width, screen.height):
+                raise HTTPException(status_code=409, detail="base frame not available; resend full capture")
+            start = time.perf_counter()
+            image = apply_tiles(
+                base.image,
+                ((tile.x, tile.y, decode_image_payload(tile.image_base64, tile.image_bytes)) for tile in screen.tiles),
+            )
+            timings["decode"] = time.perf_counter() - start
+            return Frame(image=image), _delta_digest(base.digest, screen.tiles), base
+
+        frame = Frame.from_screen(screen)
+        digest = hashlib.blake2b(frame.view(), digest_size=16).hexdigest()
+        previous = self.frames.latest(req.session_id) if self.incremental_ocr and perceive else None
+        return frame, digest, previous
+
+    @staticmethod
+    def _decoded(frame: Frame, timings: dict[str, float]) -> Image.Image:
+        if frame.decoded:
+            return frame.image
+        start = time.perf_counter()
+        image = frame.image
+        timings["decode"] = timings.get("decode", 0.0) + time.perf_counter() - start
+        return image
+
+    def _ocr_roi(self, req: TurnRequest) -> Box | None:
+        """Area OCR is limited to this turn: the active window, when preprocessing asks for it."""
+        if self.ocr_preprocess is not None and self.ocr_preprocess.active_window_only:
+            return req.context.active_window_bounds
+        return None
+
+    def _analyze(
+        self,
+        req: TurnRequest,
+        frame: Frame,
+        previous: CachedFrame | None,
+        level: PerceptionLevel,
+        timings: dict[str, float],
+    ) -> PerceptionSnapshot:
+        options = {"level": level, "timings": timings}
+        if self.term_matcher is not None:
+            options["matcher"] = self.term_matcher
+        if self.ocr_preprocess is not None:
+            options["preprocess"] = self.ocr_preprocess
+            options["roi"] = self._ocr_roi(req)
+        if not self.incremental_ocr or previous is None or previous.snapshot is None:
+            return analyze_screen(req.screen, frame=frame, **options)
+        dirty = None
+        if req.screen.mode == "delta":
+            dirty = [(tile.x, tile.y, tile.x + tile.width, tile.y + tile.height) for tile in req.screen.tiles]
+        return analyze_screen(
+            req.screen,
+            frame=frame,
+            prior=PriorFrame(previous.image, previous.snapshot.tokens, previous.roi),
+            dirty=dirty,
+            **options,
+        )
+
+    def _perceive(
+        self,
+        req: TurnRequest,
+        frame: Frame,
+        digest: str,
+        previous: CachedFrame | None,
+        level: PerceptionLevel,
+        timings: dict[str, float],
+    ) -> tuple[PerceptionSnapshot, bool]:
+        """Return the frame's snapshot and whether it was read from this exact frame.
+
+        Near-duplicate cache hits were read from another frame, so they must not
+        seed the next incremental OCR pass.
+        """
+        cache = self.perception_cache
+        if cache is None:
+            return self._analyze(req, frame, previous, level, timings), True
+        # Partial snapshots are cached apart so a full-level lookup never gets one.
+        key = digest if level == "full" else f"{digest}:{level}"
+        snapshot = cache.get(key, namespace=req.session_id)
+        if snapshot is not None:
+            return snapshot, True
+
+        phash = None
+        if cache.near_duplicate_bits is not None and level == "full":
+            phash = perceptual_hash(self._decoded(frame, timings))
+            snapshot = cache.get_similar(phash, namespace=req.session_id)
+            if snapshot is not None:
+                return snapshot, False
+
+        snapshot = self._analyze(req, frame, previous, level, timings)
+        cache.put(key, snapshot, namespace=req.session_id, phash=phash)
+        return snapshot, True
+
+    # Guardrail responses below are built from constants and an already-normalized
+    # action, so they skip validation; `_finalize` still validates provider output.
+    def _session(self, req: TurnRequest) -> SessionState:
         session = self.sessions.get(req.session_id)
         if not session:
             raise HTTPException(status_code=404, detail="session not found")
+        return session
 
+    @staticmethod
+    def _check_limits(req: TurnRequest, session: SessionState, trace_id: str) -> TurnResponse | None:
         constraints = req.constraints or session.constraints
         if constraints.max_steps is not None and req.context.step_index >= constraints.max_steps:
             fail_action = {"action": "fail", "parameters": {"reason": "max_steps reached"}}
             normalized = normalize_action(fail_action, req.screen.width, req.screen.height)
-            return TurnResponse(
+            return TurnResponse.model_construct(
                 observation="Maximum steps reached.",
                 reasoning="Safety guardrail triggered.",
                 action=normalized,
@@ -73,16 +311,75 @@ class PlannerService:
                 expected_outcome="execution stops",
                 trace_id=trace_id,
             )
+        return None
 
-        perception = analyze_screen(req.screen)
-        ocr_text = [t.text for t in perception.tokens]
-        if _captcha_detected(ocr_text):
+    def _review_history(self, req: TurnRequest, digest: str) -> tuple[int, list[StepRecord]]:
+        """Attach the executor's last result to the previous step; return the stall length and recent steps."""
+        last_result = req.context.last_result
+
+        def _review(history: StepHistory) -> tuple[int, list[StepRecord]]:
+            if last_result is not None:
+                history.record_outcome(last_result.status)
+            return history.stalled(digest), history.recent(_PROVIDER_STEP_LIMIT)
+
+        try:
+            return self.sessions.update_history(req.session_id, _review)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="session not found") from None
+
+    def _prepare(
+        self, req: TurnRequest, session: SessionState, trace_id: str
+    ) -> TurnResponse | tuple[ProviderInput, PerceptionSnapshot]:
+        """CPU-bound part of a turn: frame rebuild, loop guard, perception and CAPTCHA screening.
+
+        The session's perception level decides which stages run at all.
+        """
+        level = self._perception_level(req, session)
+        timings: dict[str, float] = {}
+        frame, digest, previous = self._resolve_frame(req, timings, perceive=level != "none")
+        stalled, recent_steps = self._review_history(req, digest)
+        if self.loop_guard and stalled >= self.loop_guard:
+            TraceAdapter(logger, {"trace_id": trace_id}).warning("loop guard: %d repeats on an unchanged screen", stalled)
+            action = normalize_action(
+                {"action": "fail", "parameters": {"reason": "No progress: the same action keeps repeating."}},
+                req.screen.width,
+                req.screen.height,
+            )
+            return TurnResponse.model_construct(
+                observation="Screen unchanged after repeating the same action.",
+                reasoning="Loop guard stops the task instead of planning the same step again.",
+                action=action,
+                risk="low",
+                confidence=1.0,
+                expected_outcome="execution stops",
+                trace_id=trace_id,
+            )
+        exact = False
+        if level == "none":
+            perception = PerceptionSnapshot()
+        else:
+            perception, exact = self._perceive(req, frame, digest, previous, level, timings)
+        if req.screen.frame_id or (self.incremental_ocr and level != "none"):
+            # Only a snapshot read from these pixels may serve as the next incremental prior.
+            snapshot = perception if exact else None
+            image = self._decoded(frame, timings)
+            self.frames.put(
+                req.session_id, req.screen.frame_id or "", image, digest, snapshot=snapshot, roi=self._ocr_roi(req)
+            )
+        ocr_text = perception.token_texts
+        captcha = False
+        if level != "none":
+            start = time.perf_counter()
+            captcha = captcha_detected(ocr_text)
+            timings["captcha_scan"] = time.perf_counter() - start
+        self._record_stages(timings)
+        if captcha:
             action = normalize_action(
                 {"action": "fail", "parameters": {"reason": "CAPTCHA detected. User interaction required."}},
                 req.screen.width,
                 req.screen.height,
             )
-            return TurnResponse(
+            return TurnResponse.model_construct(
                 observation="CAPTCHA or anti-bot challenge detected.",
                 reasoning="Policy blocks captcha solving or bypass attempts.",
                 action=action,
@@ -92,42 +389,66 @@ class PlannerService:
                 trace_id=trace_id,
             )
 
-        payload = ProviderInput(
+        provider_input = ProviderInput(
             task=req.task,
             step_index=req.context.step_index,
             width=req.screen.width,
             height=req.screen.height,
             active_window=req.context.active_window,
             ocr_text=ocr_text,
-            candidate_text=[c.text for c in perception.candidates],
-            image_base64=req.screen.image_base64,
+            candidate_text=[c.text for c in perception.top_candidates(_PROVIDER_TEXT_LIMIT)],
+            frame=frame,
             last_result_message=req.context.last_result.message if req.context.last_result else None,
+            active_window_bounds=req.context.active_window_bounds,
+            screen_digest=digest,
+            recent_steps=recent_steps,
         )
+        return provider_input, perception
 
-        try:
-            result = self.provider.plan_next_action(payload)
-        except Exception as exc:
-            log.warning("provider failure: %s", exc)
-            action = normalize_action({"action": "wait", "parameters": {"seconds": 1.0}}, req.screen.width, req.screen.height)
-            return TurnResponse(
-                observation="Planner provider timeout or error.",
-                reasoning="Return a safe retry action for executor.",
-                action=action,
-                risk="low",
-                confidence=0.2,
-                expected_outcome="retry once after wait",
-                trace_id=trace_id,
-            )
+    def _provider_failure(self, req: TurnRequest, trace_id: str, log: TraceAdapter, exc: Exception) -> TurnResponse:
+        log.warning("provider failure: %s", exc)
+        action = normalize_action({"action": "wait", "parameters": {"seconds": 1.0}}, req.screen.width, req.screen.height)
+        return TurnResponse.model_construct(
+            observation="Planner provider timeout or error.",
+            reasoning="Return a safe retry action for executor.",
+            action=action,
+            risk="low",
+            confidence=0.2,
+            expected_outcome="retry once after wait",
+            trace_id=trace_id,
+        )
 
-        normalized_action = normalize_action(result.action, req.screen.width, req.screen.height)
-        risk = classify_risk(normalized_action, req.task, result.observation, result.reasoning)
-        fingerprint = action_fingerprint(normalized_action)
-        confirmation_required = risk in {"sensitive", "destructive"} and not self.sessions.is_approved(
-            req.session_id, fingerprint
+    def _finalize(
+        self,
+        req: TurnRequest,
+        result: ProviderOutput,
+        perception: PerceptionSnapshot,
+        trace_id: str,
+        log: TraceAdapter,
+        screen_digest: str,
+        started: float,
+    ) -> TurnResponse:
+        snap = None
+        if self.snap_radius:
+            snap = perception.index.snapper(self.snap_radius, kinds=("button",))
+        normalized_action = normalize_action(result.action, req.screen.width, req.screen.height, snap=snap)
+        risk = self.policy.classify_risk(
+            normalized_action, req.task, result.observation, result.reasoning, session_id=req.session_id
         )
-        confirmation_id = None
-        if confirmation_required:
-            confirmation_id = self.sessions.put_pending_confirmation(req.session_id, fingerprint)
+        fingerprint = action_fingerprint(normalized_action)
+        latency_ms = (time.perf_counter() - started) * 1000
+        try:
+            confirmation_id = self.sessions.record_step(
+                req.session_id,
+                fingerprint,
+                risk in {"sensitive", "destructive"},
+                lambda history: history.append(
+                    req.context.step_index, normalized_action.action, fingerprint, screen_digest, risk, latency_ms
+                ),
+            )
+        except KeyError:
+            raise HTTPException(status_code=404, detail="session not found") from None
+        confirmation_required = confirmation_id is not None
 
         response = TurnResponse(
             observation=result.observation,
@@ -142,3 +463,55 @@ class PlannerService:
         )
         log.info("turn produced action=%s risk=%s", response.action.action, response.risk)
         return response
+
+    def turn(self, req: TurnRequest) -> TurnResponse:
+        if self._provider_is_async:
+            raise TypeError("async providers require PlannerService.turn_async")
+        started = time.perf_counter()
+        trace_id = req.context.trace_id or new_trace_id()
+        log = TraceAdapter(logger, {"trace_id": trace_id})
+        session = self._session(req)
+        limited = self._check_limits(req, session, trace_id)
+        if limited is not None:
+            return limited
+
+        prepared = self._prepare(req, session, trace_id)
+        if isinstance(prepared, TurnResponse):
+            return prepared
+        provider_input, perception = prepared
+        try:
+            result = self.provider.plan_next_action(provider_input)
+        except Exception as exc:
+            return self._provider_failure(req, trace_id, log, exc)
+        return self._finalize(req, result, perception, trace_id, log, provider_input.screen_digest, started)
+
+    async def turn_async(self, req: TurnRequest) -> TurnResponse:
+        """Event-loop friendly `turn`.
+
+        Perception runs on the bounded perception pool; async providers are
+        awaited directly and sync providers are moved to a worker thread, as
+        are the session store reads and writes, which may wait on a database lock.
+        """
+        started = time.perf_counter()
+        trace_id = req.context.trace_id or new_trace_id()
+        log = TraceAdapter(logger, {"trace_id": trace_id})
+        session = await asyncio.to_thread(self._session, req)
+        limited = self._check_limits(req, session, trace_id)
+        if limited is not None:
+            return limited
+
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(self._perception_pool, self._prepare, req, session, trace_id)
+        if isinstance(prepared, TurnResponse):
+            return prepared
+        provider_input, perception = prepared
+        try:
+            if self._provider_is_async:
+                result = await self.provider.plan_next_action(provider_input)
+            else:
+                result = await asyncio.to_thread(self.provider.plan_next_action, provider_input)
+        except Exception as exc:
+            return self._provider_failure(req, trace_id, log, exc)
+        return await asyncio.to_thread(
+            self._finalize, req, result, perception, trace_id, log, provider_input.screen_digest, started
+        )
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import TypeVar
+from uuid import uuid4
+
+from packages.contracts.models import Constraints
+
+from .session_store import SessionLimits, SessionState, _SweptStore
+from .step_history import StepHistory
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    constraints TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    history BLOB NOT NULL DEFAULT x''
+);
+CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+CREATE TABLE IF NOT EXISTS confirmations (
+    confirmation_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS confirmations_session ON confirmations (session_id);
+CREATE INDEX IF NOT EXISTS confirmations_created ON confirmations (created);
+CREATE TABLE IF NOT EXISTS approvals (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL,
+    approved REAL NOT NULL,
+    PRIMARY KEY (session_id, fingerprint)
+);
+"""
+
+
+class SqliteSessionStore(_SweptStore):
+    """Planner sessions in a SQLite database in WAL mode, shared by worker processes on one host.
+
+    Every thread gets its own connection. Confirmation approval pops the pending
+    row and records the approval in one `BEGIN IMMEDIATE` transaction, so two
+    workers can never both approve the same confirmation. `get` serves from a
+    per-process read cache, an LRU of at most `cache_size` sessions (and never
+    more than `limits.max_sessions`), for `cache_seconds` and refreshes
+    `last_seen` at most every `touch_seconds`. Times are wall-clock, since
+    processes share them.
+
+    Any worker may delete a session, so eviction listeners also hear about
+    sessions that have vanished from the database: when `get` misses one this
+    process used, and on every `sweep`, which compares the table with what the
+    previous sweep saw.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        limits: SessionLimits | None = None,
+        cache_seconds: float = 1.0,
+        touch_seconds: float = 5.0,
+        cache_size: int = 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(limits)
+        self.path = str(path)
+        self.cache_seconds = cache_seconds
+        self.touch_seconds = touch_seconds
+        self.cache_size = min(cache_size, self.limits.max_sessions or cache_size)
+        self._clock = clock
+        self._local = threading.local()
+        self._conns: list[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._cache: OrderedDict[str, tuple[float, SessionState]] = OrderedDict()
+        # Session ids in the table at the last sweep plus those handed out since, so
+        # evictions by other workers can be noticed; rebuilt by every sweep.
+        self._known: set[str] = set()
+        self._cache_lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Each connection is used by its own thread only; `close` may close it from another.
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            with self._conns_lock:
+                self._conns.append(conn)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _invalidate(self, session_id: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(session_id, None)
+
+    def _refresh(self, session_id: str, history: StepHistory, pending: tuple[str, str, float] | None = None) -> None:
+        """Apply this process's own write to a cached session instead of dropping it."""
+        with self._cache_lock:
+            cached = self._cache.get(session_id)
+            if cached is None:
+                return
+            fetched, state = cached
+            if pending is None:
+                state = dataclasses.replace(state, history=history)
+            else:
+                confirmation_id, fingerprint, created = pending
+                state = dataclasses.replace(
+                    state,
+                    history=history,
+                    pending_confirmations={**state.pending_confirmations, confirmation_id: fingerprint},
+                    pending_since={**state.pending_since, confirmation_id: created},
+                )
+            self._cache[session_id] = (fetched, state)
+
+    def _cache_put(self, session_id: str, fetched: float, state: SessionState) -> None:
+        # Caller holds the cache lock.
+        self._cache[session_id] = (fetched, state)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _require(conn: sqlite3.Connection, session_id: str) -> None:
+        if conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is None:
+            raise KeyError(session_id)
+
+    def create(self, task: str, constraints: Constraints | None) -> SessionState:
+        now = self._clock()
+        state = SessionState(
+            session_id=uuid4().hex,
+            task=task,
+            constraints=constraints or Constraints(),
+            started=now,
+            last_seen=now,
+            history=StepHistory(self.limits.history_steps),
+        )
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, task, constraints, created_at, started, last_seen, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    state.session_id,
+                    task,
+                    state.constraints.model_dump_json(),
+                    state.created_at.isoformat(),
+                    now,
+                    now,
+                    json.dumps(state.metadata),
+                ),
+            )
+        with self._cache_lock:
+            self._known.add(state.session_id)
+        return state
+
+    def get(self, session_id: str) -> SessionState | None:
+        now = self._clock()
+        with self._cache_lock:
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                self._cache.move_to_end(session_id)
+        if cached is not None and now - cached[0] < self.cache_seconds:
+            return cached[1]
+
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT task, constraints, created_at, started, last_seen, metadata, history FROM sessions"
+            " WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            with self._cache_lock:
+                self._cache.pop(session_id, None)
+                known = session_id in self._known
+                self._known.discard(session_id)
+            if known:
+                self._notify([session_id])
+            return None
+        task, constraints, created_at, started, last_seen, metadata, history = row
+        if now - last_seen >= self.touch_seconds:
+            conn.execute("UPDATE sessions SET last_seen = ? WHERE session_id = ?", (now, session_id))
+            last_seen = now
+        pending = conn.execute(
+            "SELECT confirmation_id, fingerprint, created FROM confirmations WHERE session_id = ? ORDER BY created",
+            (session_id,),
+        ).fetchall()
+        approved = conn.execute(
+            "SELECT fingerprint, approved FROM approvals WHERE session_id = ? ORDER BY approved", (session_id,)
+        ).fetchall()
+        state = SessionState(
+            session_id=session_id,
+            task=task,
+            constraints=Constraints.model_validate_json(constraints),
+            created_at=datetime.fromisoformat(created_at),
+            pending_confirmations={cid: fingerprint for cid, fingerprint, _ in pending},
+            approved_fingerprints=dict(approved),
+            metadata=json.loads(metadata),
+            started=started,
+            last_seen=last_seen,
+            pending_since={cid: created for cid, _, created in pending},
+            history=StepHistory.from_bytes(history, self.limits.history_steps),
+        )
+        with self._cache_lock:
+            self._cache_put(session_id, now, state)
+            self._known.add(session_id)
+        return state
+
+    def put_pending_confirmation(self, session_id: str, fingerprint: str) -> str:
+        confirmation_id = uuid4().hex
+        with self._transaction() as conn:
+            self._require(conn, session_id)
+            conn.execute(
+                "INSERT INTO confirmations (confirmation_id, session_id, fingerprint, created) VALUES (?, ?, ?, ?)",
+                (confirmation_id, session_id, fingerprint, self._clock()),
+            )
+        self._invalidate(session_id)
+        return confirmation_id
+
+    def approve_confirmation(self, session_id: str, confirmation_id: str) -> bool:
+        with self._transaction() as conn:
+            self._require(conn, session_id)
+            row = conn.execute(
+                "SELECT fingerprint FROM confirmations WHERE confirmation_id = ? AND session_id = ?",
+                (confirmation_id, session_id),
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM confirmations WHERE confirmation_id = ?", (confirmation_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO approvals (session_id, fingerprint, approved) VALUES (?, ?, ?)",
+                (session_id, row[0], self._clock()),
+            )
+            conn.execute(
+                "DELETE FROM approvals WHERE session_id = ? AND fingerprint NOT IN"
+                " (SELECT fingerprint FROM approvals WHERE session_id = ? ORDER BY approved DESC LIMIT ?)",
+                (session_id, session_id, self.limits.max_approved),
+            )
+        self._invalidate(session_id)
+        return True
+
+    def reject_confirmation(self, session_id: str, confirmation_id: str) -> bool:
+        with self._transaction() as conn:
+            self._require(conn, session_id)
+            deleted = conn.execute(
+                "DELETE FROM confirmations WHERE confirmation_id = ? AND session_id = ?", (confirmation_id, session_id)
+            ).rowcount
+        self._invalidate(session_id)
+        return deleted > 0
+
+    def is_approved(self, session_id: str, fingerprint: str) -> bool:
+        conn = self._conn()
+        self._require(conn, session_id)
+        row = conn.execute(
+            "SELECT 1 FROM approvals WHERE session_id = ? AND fingerprint = ?", (session_id, fingerprint)
+        ).fetchone()
+        return row is not None
+
+    def update_history(self, session_id: str, fn: Callable[[StepHistory], T]) -> T:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT history FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(session_id)
+            history = StepHistory.from_bytes(row[0], self.limits.history_steps)
+            result = fn(history)
+            data = history.to_bytes()
+            if data != row[0]:
+                conn.execute("UPDATE sessions SET history = ? WHERE session_id = ?", (data, session_id))
+        if data != row[0]:
+            self._refresh(session_id, history)
+        return result
+
+    def record_step(
+        self, session_id: str, fingerprint: str, confirm: bool, fn: Callable[[StepHistory], None]
+    ) -> str | None:
+        pending = None
+        with self._transaction() as conn:
+            row = conn.execute("SELECT history FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(session_id)
+            if confirm and not conn.execute(
+                "SELECT 1 FROM approvals WHERE session_id = ? AND fingerprint = ?", (session_id, fingerprint)
+            ).fetchone():
+                pending = (uuid4().hex, fingerprint, self._clock())
+                conn.execute(
+                    "INSERT INTO confirmations (confirmation_id, session_id, fingerprint, created) VALUES (?, ?, ?, ?)",
+                    (pending[0], session_id, fingerprint, pending[2]),
+                )
+            history = StepHistory.from_bytes(row[0], self.limits.history_steps)
+            fn(history)
+            conn.execute("UPDATE sessions SET history = ? WHERE session_id = ?", (history.to_bytes(), session_id))
+        self._refresh(session_id, history, pending)
+        return pending[0] if pending is not None else None
+
+    def sweep(self) -> list[str]:
+        """Expire stale sessions and confirmations; returns the session ids this call evicted."""
+        limits = self.limits
+        now = self._clock()
+        evicted: list[str] = []
+        with self._transaction() as conn:
+            for reason, column, limit in (
+                ("evicted_ttl", "started", limits.ttl_seconds),
+                ("evicted_idle", "last_seen", limits.idle_seconds),
+            ):
+                if limit is None:
+                    continue
+                query = f"SELECT session_id FROM sessions WHERE {column} < ?"
+                ids = [row[0] for row in conn.execute(query, (now - limit,))]
+                self._delete(conn, ids)
+                self._counters[reason] += len(ids)
+                evicted += ids
+            if limits.max_sessions is not None:
+                ids = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT session_id FROM sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?", (limits.max_sessions,)
+                    )
+                ]
+                self._delete(conn, ids)
+                self._counters["evicted_lru"] += len(ids)
+                evicted += ids
+            if limits.confirmation_ttl_seconds is not None:
+                expired = conn.execute(
+                    "DELETE FROM confirmations WHERE created < ?", (now - limits.confirmation_ttl_seconds,)
+                ).rowcount
+                self._counters["expired_confirmations"] += expired
+        with self._cache_lock:
+            self._cache.clear()
+            # Ids handed out while the table is read are collected in the fresh set.
+            previous, self._known = self._known, set()
+        current = {row[0] for row in self._conn().execute("SELECT session_id FROM sessions")}
+        with self._cache_lock:
+            self._known |= current
+        vanished = previous - current - set(evicted)
+        self._notify(evicted + list(vanished))
+        return evicted
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, session_ids: list[str]) -> None:
+        conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(session_id,) for session_id in session_ids])
+
+    def close(self) -> None:
+        super().close()
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self) -> dict[str, int]:
+        conn = self._conn()
+        (sessions,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        (pending,) = conn.execute("SELECT COUNT(*) FROM confirmations").fetchone()
+        (approved,) = conn.execute("SELECT COUNT(*) FROM approvals").fetchone()
+        (pages,) = conn.execute("PRAGMA page_count").fetchone()
+        (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+        return {
+            "sessions": sessions,
+            "bytes": pages * page_size,
+            "pending_confirmations": pending,
+            "approved_fingerprints": approved,
+            **self._counters,
+        }
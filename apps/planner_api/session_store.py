@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+import heapq
+import logging
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Protocol, TypeVar
 from uuid import uuid4
 
 from packages.contracts.models import Constraints
 
+from .step_history import StepHistory
+
+logger = logging.getLogger("planner_api.session_store")
+
+# Rough retained size of a session and of its per-confirmation entries, in bytes.
+_SESSION_OVERHEAD = 1200
+_ENTRY_OVERHEAD = 180
+
+T = TypeVar("T")
+
 
 @dataclass(slots=True)
 class SessionState:
@@ -15,41 +32,308 @@ class SessionState:
     constraints: Constraints
     created_at: datetime = field(default_factory=lambda: datetime.now(tz=timezone.utc))
     pending_confirmations: dict[str, str] = field(default_factory=dict)
-    approved_fingerprints: set[str] = field(default_factory=set)
+    # Insertion-ordered fingerprint -> approval time (monotonic), so the oldest can be dropped.
+    approved_fingerprints: dict[str, float] = field(default_factory=dict)
     metadata: dict[str, Any] = field(default_factory=dict)
+    # Monotonic clock readings used for expiry.
+    started: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    pending_since: dict[str, float] = field(default_factory=dict)
+    history: StepHistory = field(default_factory=StepHistory)
+
+    @property
+    def nbytes(self) -> int:
+        entries = len(self.pending_confirmations) + len(self.approved_fingerprints)
+        return _SESSION_OVERHEAD + sys.getsizeof(self.task) + entries * _ENTRY_OVERHEAD + self.history.nbytes
+
+
+@dataclass(slots=True)
+class SessionLimits:
+    """Bounds on what the store retains; `None` disables a limit.
+
+    `ttl_seconds` caps a session's age, `idle_seconds` the time since it was
+    last used, `max_sessions` the count (least recently used go first) and
+    `confirmation_ttl_seconds` how long a confirmation stays pending.
+    `history_steps` is how many recent steps each session remembers.
+    """
+
+    ttl_seconds: float | None = None
+    idle_seconds: float | None = None
+    max_sessions: int | None = None
+    confirmation_ttl_seconds: float | None = None
+    max_approved: int = 1024
+    history_steps: int = 64
+    sweep_interval: float = 30.0
+
+
+class SessionBackend(Protocol):
+    """What the planner needs from a session store.
+
+    `approve_confirmation` must pop the pending confirmation and record the
+    approval atomically, and `update_history` must apply `fn` to the session's
+    step history and keep its changes atomically. `record_step` does a turn's
+    writes in one go: with `confirm` set and `fingerprint` not yet approved it
+    adds a pending confirmation and returns its id (None otherwise), then
+    applies `fn` to the history. Methods taking a `session_id` raise
+    `KeyError` for an unknown session, except `get`, which returns None.
+    """
+
+    limits: SessionLimits
+
+    def create(self, task: str, constraints: Constraints | None) -> SessionState: ...
+
+    def get(self, session_id: str) -> SessionState | None: ...
+
+    def put_pending_confirmation(self, session_id: str, fingerprint: str) -> str: ...
+
+    def approve_confirmation(self, session_id: str, confirmation_id: str) -> bool: ...
+
+    def reject_confirmation(self, session_id: str, confirmation_id: str) -> bool: ...
+
+    def is_approved(self, session_id: str, fingerprint: str) -> bool: ...
+
+    def update_history(self, session_id: str, fn: Callable[[StepHistory], T]) -> T: ...
+
+    def record_step(
+        self, session_id: str, fingerprint: str, confirm: bool, fn: Callable[[StepHistory], None]
+    ) -> str | None: ...
+
+    def on_evict(self, listener: Callable[[str], None]) -> None: ...
+
+    def sweep(self) -> list[str]: ...
+
+    def start_sweeper(self) -> None: ...
+
+    def close(self) -> None: ...
 
+    def stats(self) -> dict[str, int]: ...
+
+
+class _SweptStore(ABC):
+    """Eviction listeners and the background sweeper thread shared by session stores."""
+
+    def __init__(self, limits: SessionLimits | None) -> None:
+        self.limits = limits or SessionLimits()
+        self._listeners: list[Callable[[str], None]] = []
+        self._counters = {"evicted_ttl": 0, "evicted_idle": 0, "evicted_lru": 0, "expired_confirmations": 0}
+        self._stop = threading.Event()
+        self._sweeper: threading.Thread | None = None
+
+    @abstractmethod
+    def sweep(self) -> list[str]: ...
+
+    def on_evict(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, evicted: list[str]) -> None:
+        for session_id in evicted:
+            for listener in self._listeners:
+                try:
+                    listener(session_id)
+                except Exception:
+                    logger.exception("session eviction listener failed")
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.limits.sweep_interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("session sweep failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+
+class _Stripe:
+    __slots__ = ("lock", "sessions")
 
-class SessionStore:
     def __init__(self) -> None:
-        self._sessions: dict[str, SessionState] = {}
+        self.lock = threading.Lock()
+        self.sessions: dict[str, SessionState] = {}
+
+
+class SessionStore(_SweptStore):
+    """In-memory planner sessions, bounded by `SessionLimits` and safe to share across threads.
+
+    Sessions are spread over `stripes` independently locked shards by session
+    id, so turns and confirmations for unrelated sessions never wait on each
+    other while every read-modify-write of one session stays atomic.
+
+    Expiry and eviction run in `sweep()`, driven by a background thread
+    (`start_sweeper`) rather than on the request path, so limits may be briefly
+    exceeded between sweeps. Listeners added with `on_evict` hear about every
+    removed session id.
+    """
+
+    def __init__(
+        self,
+        limits: SessionLimits | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        stripes: int = 64,
+    ) -> None:
+        super().__init__(limits)
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._clock = clock
+        self._stripes = tuple(_Stripe() for _ in range(stripes))
+        self._sweep_lock = threading.Lock()
+
+    @property
+    def stripes(self) -> int:
+        return len(self._stripes)
+
+    def _stripe(self, session_id: str) -> _Stripe:
+        return self._stripes[hash(session_id) % len(self._stripes)]
 
     def create(self, task: str, constraints: Constraints | None) -> SessionState:
         session_id = uuid4().hex
+        now = self._clock()
         state = SessionState(
             session_id=session_id,
             task=task,
             constraints=constraints or Constraints(),
+            started=now,
+            last_seen=now,
+            history=StepHistory(self.limits.history_steps),
         )
-        self._sessions[session_id] = state
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            stripe.sessions[session_id] = state
         return state
 
     def get(self, session_id: str) -> SessionState | None:
-        return self._sessions.get(session_id)
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            state = stripe.sessions.get(session_id)
+            if state is not None:
+                state.last_seen = self._clock()
+            return state
 
     def put_pending_confirmation(self, session_id: str, fingerprint: str) -> str:
-        session = self._sessions[session_id]
         confirmation_id = uuid4().hex
-        session.pending_confirmations[confirmation_id] = fingerprint
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            session = stripe.sessions[session_id]
+            session.pending_confirmations[confirmation_id] = fingerprint
+            session.pending_since[confirmation_id] = self._clock()
         return confirmation_id
 
     def approve_confirmation(self, session_id: str, confirmation_id: str) -> bool:
-        session = self._sessions[session_id]
-        fingerprint = session.pending_confirmations.pop(confirmation_id, None)
-        if not fingerprint:
-            return False
-        session.approved_fingerprints.add(fingerprint)
-        return True
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            session = stripe.sessions[session_id]
+            fingerprint = session.pending_confirmations.pop(confirmation_id, None)
+            session.pending_since.pop(confirmation_id, None)
+            if not fingerprint:
+                return False
+            approved = session.approved_fingerprints
+            approved.pop(fingerprint, None)
+            approved[fingerprint] = self._clock()
+            while len(approved) > self.limits.max_approved:
+                del approved[next(iter(approved))]
+            return True
+
+    def reject_confirmation(self, session_id: str, confirmation_id: str) -> bool:
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            session = stripe.sessions[session_id]
+            session.pending_since.pop(confirmation_id, None)
+            return session.pending_confirmations.pop(confirmation_id, None) is not None
 
     def is_approved(self, session_id: str, fingerprint: str) -> bool:
-        session = self._sessions[session_id]
-        return fingerprint in session.approved_fingerprints
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            return fingerprint in stripe.sessions[session_id].approved_fingerprints
+
+    def update_history(self, session_id: str, fn: Callable[[StepHistory], T]) -> T:
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            return fn(stripe.sessions[session_id].history)
+
+    def record_step(
+        self, session_id: str, fingerprint: str, confirm: bool, fn: Callable[[StepHistory], None]
+    ) -> str | None:
+        stripe = self._stripe(session_id)
+        with stripe.lock:
+            session = stripe.sessions[session_id]
+            confirmation_id = None
+            if confirm and fingerprint not in session.approved_fingerprints:
+                confirmation_id = uuid4().hex
+                session.pending_confirmations[confirmation_id] = fingerprint
+                session.pending_since[confirmation_id] = self._clock()
+            fn(session.history)
+            return confirmation_id
+
+    def sweep(self) -> list[str]:
+        """Expire stale sessions and confirmations; returns the evicted session ids.
+
+        Stripes are locked one at a time, so requests keep flowing on the
+        others while a sweep runs.
+        """
+        limits = self.limits
+        evicted: list[str] = []
+        with self._sweep_lock:
+            now = self._clock()
+            for stripe in self._stripes:
+                with stripe.lock:
+                    for session_id, state in list(stripe.sessions.items()):
+                        if limits.ttl_seconds is not None and now - state.started > limits.ttl_seconds:
+                            reason = "evicted_ttl"
+                        elif limits.idle_seconds is not None and now - state.last_seen > limits.idle_seconds:
+                            reason = "evicted_idle"
+                        else:
+                            if limits.confirmation_ttl_seconds is not None:
+                                self._expire_confirmations(state, now - limits.confirmation_ttl_seconds)
+                            continue
+                        del stripe.sessions[session_id]
+                        self._counters[reason] += 1
+                        evicted.append(session_id)
+            if limits.max_sessions is not None:
+                evicted += self._evict_lru(limits.max_sessions)
+        self._notify(evicted)
+        return evicted
+
+    def _evict_lru(self, max_sessions: int) -> list[str]:
+        seen: list[tuple[float, str]] = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                seen.extend((state.last_seen, session_id) for session_id, state in stripe.sessions.items())
+        excess = len(seen) - max_sessions
+        if excess <= 0:
+            return []
+        evicted = []
+        for _, session_id in heapq.nsmallest(excess, seen):
+            stripe = self._stripe(session_id)
+            with stripe.lock:
+                if stripe.sessions.pop(session_id, None) is not None:
+                    self._counters["evicted_lru"] += 1
+                    evicted.append(session_id)
+        return evicted
+
+    def _expire_confirmations(self, state: SessionState, cutoff: float) -> None:
+        stale = [cid for cid, since in state.pending_since.items() if since < cutoff]
+        for confirmation_id in stale:
+            del state.pending_since[confirmation_id]
+            state.pending_confirmations.pop(confirmation_id, None)
+        self._counters["expired_confirmations"] += len(stale)
+
+    def stats(self) -> dict[str, int]:
+        totals = {"sessions": 0, "bytes": 0, "pending_confirmations": 0, "approved_fingerprints": 0}
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals["sessions"] += len(stripe.sessions)
+                for state in stripe.sessions.values():
+                    totals["bytes"] += state.nbytes
+                    totals["pending_confirmations"] += len(state.pending_confirmations)
+                    totals["approved_fingerprints"] += len(state.approved_fingerprints)
+        return {**totals, **self._counters}
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, get_args
+
+import numpy as np
+
+from packages.contracts.models import ACTION_TYPES, ActionResult, RiskLevel
+
+ACTION_NAMES: tuple[str, ...] = tuple(get_args(cls.model_fields["action"].annotation)[0] for cls in ACTION_TYPES)
+RISKS: tuple[str, ...] = get_args(RiskLevel)
+# Code 0 means the executor has not reported back yet.
+OUTCOMES: tuple[str, ...] = ("pending", *get_args(ActionResult.model_fields["status"].annotation))
+
+STEP_DTYPE = np.dtype(
+    [
+        ("step_index", "<i4"),
+        ("action_fp", "<u8"),
+        ("screen_hash", "<u8"),
+        ("latency_ms", "<f4"),
+        ("action", "u1"),
+        ("risk", "u1"),
+        ("outcome", "u1"),
+    ]
+)
+
+
+def hash_prefix(hex_digest: str) -> int:
+    """The first 64 bits of a hex digest, as stored in a step record."""
+    return int(hex_digest[:16], 16)
+
+
+@dataclass(slots=True, frozen=True)
+class StepRecord:
+    step_index: int
+    action: str
+    action_fp: int
+    screen_hash: int
+    risk: str
+    latency_ms: float
+    outcome: str
+
+    def to_dict(self, screen_digest: str | None = None) -> dict[str, Any]:
+        """Provider-facing view; with `screen_digest`, also says whether the step saw that screen."""
+        data: dict[str, Any] = {
+            "step_index": self.step_index,
+            "action": self.action,
+            "risk": self.risk,
+            "latency_ms": round(self.latency_ms, 1),
+            "outcome": self.outcome,
+        }
+        if screen_digest is not None:
+            data["same_screen"] = self.screen_hash == hash_prefix(screen_digest)
+        return data
+
+
+class StepHistory:
+    """Fixed-size ring buffer of a session's recent planner steps.
+
+    Each step is one packed `STEP_DTYPE` row (about 30 bytes): 64-bit prefixes
+    of the action fingerprint and screen digest, small codes for action type,
+    risk and outcome, and the turn latency. Queries are vectorised over the
+    buffer, so they cost the same however the session got there. Not
+    thread-safe; session stores guard it with the session's lock.
+    """
+
+    __slots__ = ("_rows", "_next", "_count")
+
+    def __init__(self, capacity: int = 64) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._rows = np.zeros(capacity, dtype=STEP_DTYPE)
+        self._next = 0
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self._rows.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _ordered(self) -> np.ndarray:
+        """Rows oldest first."""
+        if self._count < self.capacity:
+            return self._rows[: self._count]
+        return np.roll(self._rows, -self._next)
+
+    def append(
+        self,
+        step_index: int,
+        action: str,
+        action_fingerprint: str,
+        screen_digest: str,
+        risk: str,
+        latency_ms: float,
+    ) -> None:
+        self._rows[self._next] = (
+            step_index,
+            hash_prefix(action_fingerprint),
+            hash_prefix(screen_digest),
+            latency_ms,
+            ACTION_NAMES.index(action),
+            RISKS.index(risk),
+            0,
+        )
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def record_outcome(self, status: str) -> bool:
+        """Attach the executor's result to the newest step still pending; False if there is none."""
+        if not self._count:
+            return False
+        last = (self._next - 1) % self.capacity
+        if self._rows[last]["outcome"] != 0:
+            return False
+        self._rows[last]["outcome"] = OUTCOMES.index(status)
+        return True
+
+    def count(self, action_fingerprint: str, screen_digest: str) -> int:
+        """How many retained steps planned this exact action on this exact screen."""
+        rows = self._rows[: self._count]
+        matches = (rows["action_fp"] == hash_prefix(action_fingerprint)) & (
+            rows["screen_hash"] == hash_prefix(screen_digest)
+        )
+        return int(np.count_nonzero(matches))
+
+    def stalled(self, screen_digest: str) -> int:
+        """Length of the newest run of steps that repeated one action on this screen without failing.
+
+        A run of N means the planner's last N answers on an unchanged screen were
+        all the same action, and the executor carried each one out (or has not
+        reported back) without the screen changing.
+        """
+        if not self._count:
+            return 0
+        rows = self._ordered()[::-1]
+        screen = hash_prefix(screen_digest)
+        same = (
+            (rows["screen_hash"] == screen)
+            & (rows["action_fp"] == rows["action_fp"][0])
+            & np.isin(rows["outcome"], (0, OUTCOMES.index("executed")))
+        )
+        breaks = np.flatnonzero(~same)
+        return int(breaks[0]) if breaks.size else len(rows)
+
+    def recent(self, n: int | None = None) -> list[StepRecord]:
+        """The newest `n` steps (all by default), oldest first."""
+        rows = self._ordered()
+        if n is not None:
+            rows = rows[-n:] if n > 0 else rows[:0]
+        return [
+            StepRecord(
+                step_index=int(row["step_index"]),
+                action=ACTION_NAMES[row["action"]],
+                action_fp=int(row["action_fp"]),
+                screen_hash=int(row["screen_hash"]),
+                risk=RISKS[row["risk"]],
+                latency_ms=float(row["latency_ms"]),
+                outcome=OUTCOMES[row["outcome"]],
+            )
+            for row in rows
+        ]
+
+    def to_bytes(self) -> bytes:
+        """Packed rows oldest first, for stores that persist sessions."""
+        return self._ordered().tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, capacity: int = 64) -> "StepHistory":
+        history = cls(capacity)
+        rows = np.frombuffer(data, dtype=STEP_DTYPE)[-capacity:]
+        history._rows[: len(rows)] = rows
+        history._count = len(rows)
+        history._next = len(rows) % capacity
+        return history
@@ -0,0 +1,66 @@
+"""Microbenchmark for the per-turn contracts chain: normalize -> fingerprint -> execute.
+
+Compares the compiled module-level adapter path with building a fresh
+`TypeAdapter(DesktopAction)` at every step, as the chain used to.
+
+    python -m benchmarks.bench_contracts [--iterations N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import time
+
+from pydantic import TypeAdapter
+
+from apps.executor.adapters.input import DesktopInputExecutor
+from packages.contracts.models import DesktopAction
+from packages.contracts.normalization import normalize_action
+from packages.contracts.utils import action_fingerprint
+
+ACTION = {"action": "click", "parameters": {"x": 640, "y": 360}}
+
+
+def _uncompiled_chain() -> None:
+    action = TypeAdapter(DesktopAction).validate_python(ACTION)
+    payload = TypeAdapter(DesktopAction).dump_python(action, mode="json", by_alias=True)
+    hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+    TypeAdapter(DesktopAction).validate_python(action)
+
+
+def _compiled_chain(executor: DesktopInputExecutor) -> None:
+    action = normalize_action(ACTION, 1280, 720)
+    action_fingerprint(action)
+    executor.execute(action)
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    executor = DesktopInputExecutor(dry_run=True)
+    action = normalize_action(ACTION, 1280, 720)
+    results = {
+        "uncompiled_chain_us": _per_call_us(_uncompiled_chain, max(1, args.iterations // 10)),
+        "compiled_chain_us": _per_call_us(lambda: _compiled_chain(executor), args.iterations),
+        "normalize_us": _per_call_us(lambda: normalize_action(ACTION, 1280, 720), args.iterations),
+        "fingerprint_us": _per_call_us(lambda: action_fingerprint(action), args.iterations),
+        "execute_us": _per_call_us(lambda: executor.execute(action), args.iterations),
+    }
+    for name, value in results.items():
+        print(f"{name:>22}: {value:10.1f}")
+    print(f"{'speedup':>22}: {results['uncompiled_chain_us'] / results['compiled_chain_us']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
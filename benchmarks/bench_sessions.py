@@ -0,0 +1,72 @@
+"""Multi-threaded stress benchmark for the in-memory planner session store.
+
+Each thread drives its own sessions through the turn/confirm cycle
+(get -> put_pending_confirmation -> approve_confirmation -> is_approved), as
+FastAPI's threadpool does for concurrent executors. Runs with one stripe (a
+single global lock) and with the default striping, for each thread count.
+On a GIL build the store's critical sections are short enough that
+throughput stays roughly flat either way; striping is what lets it scale on
+free-threaded interpreters.
+
+    python -m benchmarks.bench_sessions [--threads 1,2,4,8] [--ops N] [--sessions N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+
+from apps.planner_api.session_store import SessionLimits, SessionStore
+
+
+def _worker(store: SessionStore, session_ids: list[str], ops: int, barrier: threading.Barrier) -> None:
+    barrier.wait()
+    for i in range(ops):
+        session_id = session_ids[i % len(session_ids)]
+        store.get(session_id)
+        confirmation_id = store.put_pending_confirmation(session_id, f"fp-{i % 64}")
+        store.approve_confirmation(session_id, confirmation_id)
+        store.is_approved(session_id, "fp-0")
+
+
+def _run(stripes: int, threads: int, ops: int, sessions_per_thread: int) -> float:
+    """Turn/confirm cycles per second across all threads."""
+    store = SessionStore(SessionLimits(max_approved=64), stripes=stripes)
+    session_ids = [
+        [store.create("bench", None).session_id for _ in range(sessions_per_thread)] for _ in range(threads)
+    ]
+    barrier = threading.Barrier(threads + 1)
+    workers = [
+        threading.Thread(target=_worker, args=(store, ids, ops, barrier), daemon=True) for ids in session_ids
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,2,4,8", help="comma-separated thread counts")
+    parser.add_argument("--ops", type=int, default=20000, help="turn/confirm cycles per thread")
+    parser.add_argument("--sessions", type=int, default=16, help="sessions per thread")
+    args = parser.parse_args()
+
+    default_stripes = SessionStore().stripes
+    results = []
+    for threads in (int(value) for value in args.threads.split(",")):
+        row = {"threads": threads}
+        for label, stripes in (("global_lock", 1), ("striped", default_stripes)):
+            row[f"{label}_cycles_per_s"] = round(_run(stripes, threads, args.ops, args.sessions))
+        results.append(row)
+    for row in results:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,35 @@
 """Shared contracts for planner and executor."""
 
 from .models import (
+    ACTION_TYPES,
+    DESKTOP_ACTION_ADAPTER,
     ActionResult,
     Constraints,
     DesktopAction,
+    PerceptionLevel,
     RiskLevel,
     ScreenCapture,
+    ScreenTile,
     StartSessionRequest,
     StartSessionResponse,
     TurnContext,
     TurnRequest,
     TurnResponse,
+    parse_action,
 )
-from .normalization import normalize_action
+from .normalization import normalize_action, scale_action_coordinates
 from .utils import action_fingerprint, new_trace_id
 
 __all__ = [
+    "ACTION_TYPES",
+    "DESKTOP_ACTION_ADAPTER",
     "ActionResult",
     "Constraints",
     "DesktopAction",
+    "PerceptionLevel",
     "RiskLevel",
     "ScreenCapture",
+    "ScreenTile",
     "StartSessionRequest",
     "StartSessionResponse",
     "TurnContext",
@@ -29,4 +38,6 @@ __all__ = [
     "action_fingerprint",
     "new_trace_id",
     "normalize_action",
+    "parse_action",
+    "scale_action_coordinates",
 ]
@@ -0,0 +1,108 @@
+"""Wire codecs for planner API bodies, chosen by content negotiation.
+
+JSON is always available (encoded and parsed with `orjson` when installed,
+pydantic's JSON serializer otherwise); MessagePack needs the optional
+`msgpack` package (`pip install .[fast-wire]`). Either way the pydantic
+models in `models` define and validate the payloads.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@dataclass(slots=True, frozen=True)
+class Codec:
+    name: str
+    media_type: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+    def encode_model(self, model: BaseModel) -> bytes:
+        if self.media_type == JSON_MEDIA_TYPE and orjson is None:
+            return model.model_dump_json(by_alias=True).encode("utf-8")
+        return self.dumps(model.model_dump(mode="json", by_alias=True))
+
+    def decode_model(self, data: bytes, model: type[M]) -> M:
+        if self.media_type == JSON_MEDIA_TYPE:
+            return model.model_validate_json(data)
+        return model.model_validate(self.loads(data))
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+JSON_CODEC = Codec(
+    name="json",
+    media_type=JSON_MEDIA_TYPE,
+    dumps=orjson.dumps if orjson is not None else _json_dumps,
+    loads=orjson.loads if orjson is not None else json.loads,
+)
+MSGPACK_CODEC = (
+    Codec(
+        name="msgpack",
+        media_type=MSGPACK_MEDIA_TYPE,
+        dumps=msgpack.packb,
+        loads=lambda data: msgpack.unpackb(data, raw=False),
+    )
+    if msgpack is not None
+    else None
+)
+CODECS: dict[str, Codec] = {codec.name: codec for codec in (JSON_CODEC, MSGPACK_CODEC) if codec is not None}
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def codec_for_content_type(content_type: str | None) -> Codec | None:
+    """Codec for a request body; a missing content type means JSON, an unknown one None."""
+    media_type = _media_type(content_type or JSON_MEDIA_TYPE)
+    if media_type == JSON_MEDIA_TYPE or media_type.endswith("+json"):
+        return JSON_CODEC
+    if media_type in _MSGPACK_ALIASES:
+        return MSGPACK_CODEC
+    return None
+
+
+def negotiate(accept: str | None) -> Codec:
+    """Best available codec for an `Accept` header, by q-value then header order; JSON by default."""
+    best: tuple[float, int, Codec] | None = None
+    for position, entry in enumerate((accept or "").split(",")):
+        media_type, *params = entry.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codec = codec_for_content_type(media_type) if media_type.strip() else None
+        if codec is None or q <= 0:
+            continue
+        if best is None or q > best[0]:
+            best = (q, position, codec)
+    return best[2] if best is not None else JSON_CODEC
@@ -3,7 +3,8 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Annotated, Literal, Union
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
+from pydantic.json_schema import SkipJsonSchema
 
 SUPPORTED_ACTIONS = [
     "click",
@@ -21,6 +22,8 @@ SUPPORTED_ACTIONS = [
 ]
 UNSUPPORTED_ACTIONS = ["speak"]
 RiskLevel = Literal["low", "sensitive", "destructive"]
+# How much of the perception pipeline the planner runs per turn.
+PerceptionLevel = Literal["none", "captcha-only", "full"]
 
 
 class ClickParams(BaseModel):
@@ -144,6 +147,29 @@ DesktopAction = Annotated[
     ],
     Field(discriminator="action"),
 ]
+ACTION_TYPES = (
+    ClickAction,
+    DoubleClickAction,
+    RightClickAction,
+    TypeAction,
+    HotkeyAction,
+    ScrollAction,
+    MoveAction,
+    DragAction,
+    WaitAction,
+    ScreenshotAction,
+    DoneAction,
+    FailAction,
+)
+# Built once at import; constructing a TypeAdapter compiles the whole union schema.
+DESKTOP_ACTION_ADAPTER: TypeAdapter[DesktopAction] = TypeAdapter(DesktopAction)
+
+
+def parse_action(data: DesktopAction | dict) -> DesktopAction:
+    """Validate `data` as a `DesktopAction`; typed actions are returned as-is, without revalidation."""
+    if isinstance(data, ACTION_TYPES):
+        return data
+    return DESKTOP_ACTION_ADAPTER.validate_python(data)
 
 
 class ActionResult(BaseModel):
@@ -158,10 +184,47 @@ class ActionResult(BaseModel):
     timestamp: datetime = Field(default_factory=lambda: datetime.now(tz=timezone.utc))
 
 
+class ScreenTile(BaseModel):
+    x: int = Field(ge=0)
+    y: int = Field(ge=0)
+    width: int = Field(gt=0)
+    height: int = Field(gt=0)
+    image_base64: str = ""
+    # Raw encoded image carried as a binary part instead of base64; never serialized.
+    image_bytes: SkipJsonSchema[bytes | None] = Field(default=None, exclude=True, repr=False)
+
+    @model_validator(mode="after")
+    def validate_payload(self):
+        if not self.image_base64 and not self.image_bytes:
+            raise ValueError("tile requires image_base64 or binary image data")
+        return self
+
+
 class ScreenCapture(BaseModel):
-    image_base64: str = Field(min_length=1)
+    image_base64: str = ""
+    image_bytes: SkipJsonSchema[bytes | None] = Field(default=None, exclude=True, repr=False)
     width: int = Field(gt=0)
     height: int = Field(gt=0)
+    # Size of the captured desktop when the image was downscaled; coordinates stay in image space.
+    physical_width: int | None = Field(default=None, gt=0)
+    physical_height: int | None = Field(default=None, gt=0)
+    image_format: Literal["png", "webp", "jpeg"] = "png"
+    mode: Literal["full", "delta"] = "full"
+    frame_id: str | None = Field(default=None, max_length=128)
+    base_frame_id: str | None = Field(default=None, max_length=128)
+    tiles: list[ScreenTile] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def validate_payload(self):
+        if self.mode == "full" and not self.image_base64 and not self.image_bytes:
+            raise ValueError("image_base64 or binary image data required for full captures")
+        if self.mode == "delta":
+            if not self.base_frame_id:
+                raise ValueError("base_frame_id required for delta captures")
+            for tile in self.tiles:
+                if tile.x + tile.width > self.width or tile.y + tile.height > self.height:
+                    raise ValueError("tile outside capture bounds")
+        return self
 
 
 class TurnContext(BaseModel):
@@ -169,12 +232,16 @@ class TurnContext(BaseModel):
     last_action: DesktopAction | None = None
     last_result: ActionResult | None = None
     active_window: str | None = None
+    # left, top, right, bottom of the active window in capture pixels.
+    active_window_bounds: tuple[int, int, int, int] | None = None
     trace_id: str | None = None
 
 
 class Constraints(BaseModel):
     blocked_apps: list[str] = Field(default_factory=list)
     max_steps: int | None = Field(default=50, ge=1, le=1000)
+    # None on a turn keeps the session's level; a session without one runs "full".
+    perception_level: PerceptionLevel | None = None
 
 
 class TurnRequest(BaseModel):
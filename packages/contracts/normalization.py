@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from typing import Any
 
-from pydantic import TypeAdapter
-
 from .models import (
+    ClickAction,
     DesktopAction,
+    DoubleClickAction,
     DragAction,
     HotkeyAction,
     MoveAction,
+    RightClickAction,
     SUPPORTED_ACTIONS,
     ScrollAction,
     TypeAction,
+    parse_action,
 )
 
 HOTKEY_ALLOWED = {
@@ -60,9 +63,48 @@ def _clamp_coord(value: int, max_value: int) -> int:
     return max(0, min(value, max_value))
 
 
-def normalize_action(action_data: DesktopAction | dict[str, Any], width: int, height: int) -> DesktopAction:
-    adapter = TypeAdapter(DesktopAction)
-    action = adapter.validate_python(action_data)
+def scale_action_coordinates(
+    action: DesktopAction,
+    capture_size: tuple[int, int],
+    physical_size: tuple[int, int],
+) -> DesktopAction:
+    """Map coordinates from capture (image) space to physical screen pixels.
+
+    Returns a copy; the input action is left in capture space.
+    """
+    if capture_size == physical_size:
+        return action
+    scale_x = physical_size[0] / capture_size[0]
+    scale_y = physical_size[1] / capture_size[1]
+    max_x = max(0, physical_size[0] - 1)
+    max_y = max(0, physical_size[1] - 1)
+
+    def _map(x: int, y: int) -> tuple[int, int]:
+        return (_clamp_coord(round(x * scale_x), max_x), _clamp_coord(round(y * scale_y), max_y))
+
+    scaled = action.model_copy(deep=True)
+    if isinstance(scaled, (ClickAction, DoubleClickAction, RightClickAction, MoveAction)):
+        scaled.parameters.x, scaled.parameters.y = _map(scaled.parameters.x, scaled.parameters.y)
+    elif isinstance(scaled, DragAction):
+        scaled.parameters.from_ = _map(*scaled.parameters.from_)
+        scaled.parameters.to = _map(*scaled.parameters.to)
+    return scaled
+
+
+def normalize_action(
+    action_data: DesktopAction | dict[str, Any],
+    width: int,
+    height: int,
+    snap: Callable[[int, int], tuple[int, int] | None] | None = None,
+) -> DesktopAction:
+    """Validate and clamp an action to a `width` x `height` capture.
+
+    `snap` may move click points (e.g. onto the nearest UI candidate centre); it
+    returns the new point or None to keep it. Coordinates stay in capture
+    space; the executor maps them to physical pixels with
+    `scale_action_coordinates`.
+    """
+    action = parse_action(action_data)
 
     if action.action not in SUPPORTED_ACTIONS:
         raise ValueError(f"unsupported action for v1: {action.action}")
@@ -79,6 +121,12 @@ def normalize_action(action_data: DesktopAction | dict[str, Any], width: int, he
         action.parameters.x = _clamp_coord(action.parameters.x, max_x)
         action.parameters.y = _clamp_coord(action.parameters.y, max_y)
 
+    if snap is not None and isinstance(action, (ClickAction, DoubleClickAction, RightClickAction)):
+        snapped = snap(action.parameters.x, action.parameters.y)
+        if snapped is not None:
+            action.parameters.x = _clamp_coord(int(snapped[0]), max_x)
+            action.parameters.y = _clamp_coord(int(snapped[1]), max_y)
+
     if isinstance(action, DragAction):
         fx, fy = action.parameters.from_
         tx, ty = action.parameters.to
@@ -5,9 +5,7 @@ import json
 import uuid
 from datetime import datetime, timezone
 
-from pydantic import TypeAdapter
-
-from .models import DesktopAction
+from .models import DESKTOP_ACTION_ADAPTER, DesktopAction
 
 
 def new_trace_id() -> str:
@@ -16,6 +14,6 @@ def new_trace_id() -> str:
 
 
 def action_fingerprint(action: DesktopAction) -> str:
-    payload = TypeAdapter(DesktopAction).dump_python(action, mode="json", by_alias=True)
+    payload = DESKTOP_ACTION_ADAPTER.dump_python(action, mode="json", by_alias=True)
     encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
     return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,100 @@
+"""Length-prefixed binary framing for turn requests.
+
+A turn frame is a sequence of parts, each prefixed with a big-endian `uint32`
+length. The first part is the JSON-encoded `TurnRequest` with every image slot
+left empty; the remaining parts are the raw encoded images, in slot order: the
+full screen image (full captures only), then each tile.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import struct
+from typing import Any
+
+from .models import ScreenCapture, ScreenTile, TurnRequest
+
+TURN_FRAME_CONTENT_TYPE = "application/vnd.desktop-agent.turn-frame"
+
+_LENGTH = struct.Struct(">I")
+
+
+def _image_models(screen: ScreenCapture) -> list[ScreenCapture | ScreenTile]:
+    models: list[ScreenCapture | ScreenTile] = [screen] if screen.mode == "full" else []
+    return models + list(screen.tiles)
+
+
+def _image_slots(payload: Any) -> list[dict[str, Any]]:
+    screen = payload.get("screen") if isinstance(payload, dict) else None
+    if not isinstance(screen, dict):
+        return []
+    slots = [screen] if screen.get("mode", "full") == "full" else []
+    tiles = screen.get("tiles")
+    if isinstance(tiles, list):
+        slots.extend(tile for tile in tiles if isinstance(tile, dict))
+    return slots
+
+
+def _raw_image(model: ScreenCapture | ScreenTile) -> bytes:
+    if model.image_bytes is not None:
+        return model.image_bytes
+    return base64.b64decode(model.image_base64)
+
+
+def turn_request_to_json(req: TurnRequest) -> dict[str, Any]:
+    """Dump a request for the JSON endpoint, inlining binary images as base64."""
+    payload = req.model_dump(mode="json", by_alias=True)
+    for slot, model in zip(_image_slots(payload), _image_models(req.screen)):
+        if not slot["image_base64"]:
+            slot["image_base64"] = base64.b64encode(_raw_image(model)).decode("ascii")
+    return payload
+
+
+def encode_turn_frame(req: TurnRequest) -> list[bytes]:
+    """Encode a request as turn-frame chunks, ready to be streamed as a request body."""
+    payload = req.model_dump(mode="json", by_alias=True)
+    images: list[bytes] = []
+    for slot, model in zip(_image_slots(payload), _image_models(req.screen)):
+        slot["image_base64"] = ""
+        images.append(_raw_image(model))
+
+    header = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    chunks = [_LENGTH.pack(len(header)), header]
+    for raw in images:
+        chunks.append(_LENGTH.pack(len(raw)))
+        chunks.append(raw)
+    return chunks
+
+
+def decode_turn_frame(body: bytes) -> TurnRequest:
+    """Decode a turn frame; raises `ValueError` on malformed framing.
+
+    Image parts are handed to the model as raw bytes, so no base64 step happens
+    on the receiving side.
+    """
+    view = memoryview(body)
+    offset = 0
+
+    def next_part() -> memoryview:
+        nonlocal offset
+        if offset + _LENGTH.size > len(view):
+            raise ValueError("truncated turn frame")
+        (size,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + size > len(view):
+            raise ValueError("truncated turn frame")
+        part = view[offset : offset + size]
+        offset += size
+        return part
+
+    try:
+        payload = json.loads(bytes(next_part()))
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"invalid turn frame header: {exc}") from exc
+    for slot in _image_slots(payload):
+        if not slot.get("image_base64"):
+            slot["image_bytes"] = bytes(next_part())
+    if offset != len(view):
+        raise ValueError("unexpected trailing data in turn frame")
+    return TurnRequest.model_validate(payload)
@@ -0,0 +1,5 @@
+"""Compiled multi-pattern matching."""
+
+from .aho_corasick import Automaton, Match
+
+__all__ = ["Automaton", "Match"]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+S = TypeVar("S", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(frozen=True, slots=True)
+class Match(Generic[V]):
+    start: int
+    end: int
+    value: V
+
+
+class Automaton(Generic[S, V]):
+    """Aho-Corasick automaton over sequences of any hashable symbol.
+
+    Symbols can be characters (match inside a string) or whole words (match
+    phrases in a token stream). Add patterns, then `build()` once; a scan is
+    linear in the input length plus the number of matches.
+    """
+
+    def __init__(self, patterns: Iterable[tuple[Sequence[S], V]] = ()) -> None:
+        self._goto: list[dict[S, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Per state: (pattern length, value) of every pattern ending there, via output links.
+        self._out: list[list[tuple[int, V]]] = [[]]
+        self._built = False
+        self._count = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern: Sequence[S], value: V) -> None:
+        if self._built:
+            raise RuntimeError("automaton is already built")
+        if not pattern:
+            raise ValueError("empty pattern")
+        state = 0
+        for symbol in pattern:
+            nxt = self._goto[state].get(symbol)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][symbol] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+        self._count += 1
+
+    def build(self) -> "Automaton[S, V]":
+        """Compute failure links; returns self so construction can be chained."""
+        if self._built:
+            return self
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(symbol, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def iter_matches(self, sequence: Iterable[S]) -> Iterator[Match[V]]:
+        """Yield every (possibly overlapping) match, ordered by end position."""
+        if not self._built:
+            raise RuntimeError("call build() before matching")
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, symbol in enumerate(sequence):
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for length, value in out[state]:
+                yield Match(start=index - length + 1, end=index + 1, value=value)
+
+    def feed(self, sequence: Iterable[S], state: int = 0) -> tuple[list[Match[V]], int]:
+        """Resumable scan: matches in `sequence` starting from `state`, and the state reached.
+
+        Feeding a text in pieces, passing each returned state to the next call,
+        finds the same matches as scanning the concatenation (positions are
+        relative to each piece, so a match spanning pieces has a negative start).
+        """
+        if not self._built:
+            raise RuntimeError("call build() before matching")
+        goto, fail, out = self._goto, self._fail, self._out
+        matches: list[Match[V]] = []
+        for index, symbol in enumerate(sequence):
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for length, value in out[state]:
+                matches.append(Match(start=index - length + 1, end=index + 1, value=value))
+        return matches, state
+
+    def longest_matches(self, sequence: Sequence[S]) -> list[Match[V]]:
+        """Non-overlapping matches, preferring the earliest start and then the longest pattern."""
+        best: dict[int, Match[V]] = {}
+        for match in self.iter_matches(sequence):
+            current = best.get(match.start)
+            if current is None or match.end > current.end:
+                best[match.start] = match
+        chosen: list[Match[V]] = []
+        cursor = 0
+        for start in sorted(best):
+            if start >= cursor:
+                chosen.append(best[start])
+                cursor = best[start].end
+        return chosen
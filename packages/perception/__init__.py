@@ -1,14 +1,35 @@
 """Perception pipeline for OCR and UI grounding."""
 
-from .grounding import UICandidate, generate_ui_candidates
-from .ocr import OCRToken, extract_ocr_tokens
-from .pipeline import PerceptionSnapshot, analyze_screen
+from .cache import PerceptionCache
+from .frame import Frame
+from .grounding import TermMatcher, UICandidate, cluster_lines, generate_ui_candidates, load_vocabulary
+from .incremental import PriorFrame, extract_ocr_tokens_incremental
+from .ocr import OCRToken, OCRWorkerPool, default_ocr_pool, extract_ocr_tokens, extract_ocr_tokens_batch
+from .pipeline import PerceptionRun, PerceptionSnapshot, analyze_screen, captcha_detected
+from .preprocess import OCRPreprocess, extract_ocr_tokens_preprocessed, text_regions
+from .spatial import CandidateGrid
 
 __all__ = [
+    "Frame",
+    "CandidateGrid",
+    "OCRPreprocess",
     "OCRToken",
+    "OCRWorkerPool",
+    "PerceptionCache",
+    "PerceptionRun",
     "UICandidate",
     "PerceptionSnapshot",
+    "PriorFrame",
+    "TermMatcher",
+    "default_ocr_pool",
     "extract_ocr_tokens",
+    "extract_ocr_tokens_batch",
+    "extract_ocr_tokens_incremental",
+    "extract_ocr_tokens_preprocessed",
     "generate_ui_candidates",
     "analyze_screen",
+    "captcha_detected",
+    "cluster_lines",
+    "load_vocabulary",
+    "text_regions",
 ]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
+
+from .pipeline import PerceptionSnapshot
+
+
+def snapshot_nbytes(snapshot: PerceptionSnapshot) -> int:
+    """Approximate retained size of a snapshot, used for the cache byte budget."""
+    return snapshot.nbytes
+
+
+@dataclass(slots=True)
+class _Entry:
+    snapshot: PerceptionSnapshot
+    size: int
+
+
+class PerceptionCache:
+    """Content-addressed LRU of perception results, bounded by approximate bytes.
+
+    Entries are keyed by a digest of the encoded frame. With `near_duplicate_bits`
+    set, a miss falls back to the closest entry whose perceptual hash differs by at
+    most that many bits; keep it small, since a small dialog can move few bits.
+    Only the `similar_window` most recently stored hashes of a namespace are
+    scanned, so the lookup stays cheap however large the cache grows.
+    `scope="session"` keeps entries of different sessions apart.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        near_duplicate_bits: int | None = None,
+        scope: Literal["session", "global"] = "session",
+        similar_window: int = 64,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.near_duplicate_bits = near_duplicate_bits
+        self.scope = scope
+        self.similar_window = similar_window
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        # Per namespace, the perceptual hashes of its newest entries, oldest first.
+        self._phashes: dict[str, OrderedDict[tuple[str, str], int]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, digest: str, namespace: str) -> tuple[str, str]:
+        return (namespace if self.scope == "session" else "", digest)
+
+    def get(self, digest: str, namespace: str = "") -> PerceptionSnapshot | None:
+        key = self._key(digest, namespace)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.snapshot
+
+    def get_similar(self, phash: int, namespace: str = "") -> PerceptionSnapshot | None:
+        """Near-duplicate lookup, meant for after `get` missed; counted in `near_hits`."""
+        if self.near_duplicate_bits is None:
+            return None
+        scope_ns = namespace if self.scope == "session" else ""
+        with self._lock:
+            best_key: tuple[str, str] | None = None
+            best_distance = self.near_duplicate_bits + 1
+            for key, candidate in self._phashes.get(scope_ns, {}).items():
+                distance = (candidate ^ phash).bit_count()
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.near_hits += 1
+            return self._entries[best_key].snapshot
+
+    def put(self, digest: str, snapshot: PerceptionSnapshot, namespace: str = "", phash: int | None = None) -> None:
+        key = self._key(digest, namespace)
+        size = snapshot_nbytes(snapshot)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(snapshot=snapshot, size=size)
+            self._bytes += size
+            if phash is not None:
+                window = self._phashes.setdefault(key[0], OrderedDict())
+                window[key] = phash
+                if len(window) > self.similar_window:
+                    window.popitem(last=False)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        # Caller holds the lock.
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        window = self._phashes.get(key[0])
+        if window is not None:
+            window.pop(key, None)
+            if not window:
+                del self._phashes[key[0]]
+
+    def discard_namespace(self, namespace: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == namespace]:
+                self._remove(key)
+            self._phashes.pop(namespace, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
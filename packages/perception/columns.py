@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Sequence
+
+import numpy as np
+
+from .ocr import OCRToken
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, best first, ties broken by lower index.
+
+    Same order as the first `k` entries of a stable descending sort, without
+    sorting everything.
+    """
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == n:
+        return np.argsort(-scores, kind="stable")
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(above)]
+    picked = np.concatenate([above, ties])
+    return picked[np.lexsort((picked, -scores[picked]))]
+
+
+class TokenColumns:
+    """OCR tokens stored as parallel arrays: interned texts, (n, 4) int32 boxes, float64 confidences."""
+
+    __slots__ = ("texts", "bboxes", "confidences")
+
+    def __init__(self, texts: list[str], bboxes: np.ndarray, confidences: np.ndarray) -> None:
+        self.texts = texts
+        self.bboxes = bboxes
+        self.confidences = confidences
+
+    @classmethod
+    def from_tokens(cls, tokens: Sequence[OCRToken]) -> "TokenColumns":
+        n = len(tokens)
+        return cls(
+            texts=[sys.intern(token.text) for token in tokens],
+            bboxes=np.array([token.bbox for token in tokens], dtype=np.int32).reshape(n, 4),
+            confidences=np.fromiter((token.confidence for token in tokens), dtype=np.float64, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bboxes.nbytes + self.confidences.nbytes + sys.getsizeof(self.texts)
+
+    def to_tokens(self) -> list[OCRToken]:
+        return [
+            OCRToken(text=text, bbox=tuple(bbox), confidence=confidence)
+            for text, bbox, confidence in zip(self.texts, self.bboxes.tolist(), self.confidences.tolist())
+        ]
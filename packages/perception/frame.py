@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from packages.contracts.models import ScreenCapture
+
+from .image_utils import decode_image_bytes, downscale
+
+
+class Frame:
+    """One request's screenshot, created once and shared by every stage of a turn.
+
+    The encoded bytes are held once (or the base64 text they arrived as); the
+    decoded image, base64 text and downscaled variants are derived on first use
+    and cached, so perception, the CAPTCHA scan and providers never decode or
+    copy the same screenshot twice.
+    """
+
+    __slots__ = ("image_format", "_data", "_base64", "_image", "_variants")
+
+    def __init__(
+        self,
+        data: bytes | None = None,
+        *,
+        base64_text: str | None = None,
+        image: Image.Image | None = None,
+        image_format: str = "png",
+    ) -> None:
+        if data is None and not base64_text and image is None:
+            raise ValueError("frame needs bytes, base64 text or an image")
+        self.image_format = image_format
+        self._data = data
+        self._base64 = base64_text or None
+        self._image = image
+        self._variants: dict[int, Image.Image] = {}
+
+    @classmethod
+    def from_screen(cls, screen: ScreenCapture) -> "Frame":
+        """Wrap a full capture's payload without copying it."""
+        return cls(screen.image_bytes, base64_text=screen.image_base64, image_format=screen.image_format)
+
+    @property
+    def data(self) -> bytes:
+        """Encoded image bytes; a frame built from an image is encoded as PNG on first use."""
+        if self._data is None:
+            if self._base64 is not None:
+                self._data = base64.b64decode(self._base64)
+            else:
+                buf = BytesIO()
+                self._image.save(buf, format="PNG")
+                self._data = buf.getvalue()
+                self.image_format = "png"
+        return self._data
+
+    def view(self) -> memoryview:
+        return memoryview(self.data)
+
+    @property
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("ascii")
+        return self._base64
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded RGB image."""
+        if self._image is None:
+            self._image = decode_image_bytes(self.data)
+        return self._image
+
+    @property
+    def decoded(self) -> bool:
+        return self._image is not None
+
+    def downscaled(self, max_long_edge: int) -> Image.Image:
+        """The image shrunk so its long edge is at most `max_long_edge`; cached per size."""
+        image = self.image
+        if max(image.size) <= max_long_edge:
+            return image
+        variant = self._variants.get(max_long_edge)
+        if variant is None:
+            variant = self._variants[max_long_edge] = downscale(image, max_long_edge)
+        return variant
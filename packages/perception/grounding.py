@@ -1,14 +1,29 @@
 from __future__ import annotations
 
+import functools
+import sys
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Literal
 
+import numpy as np
+
+from packages.matching import Automaton, Match
+
+from .columns import TokenColumns, top_k_indices
 from .ocr import OCRToken
 
+CandidateKind = Literal["button", "input", "text"]
+DEFAULT_VOCABULARY = Path(__file__).with_name("vocab") / "default.txt"
+KINDS: tuple[CandidateKind, ...] = ("text", "button", "input")
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_MIN_SCORES = np.array([0.0, 0.6, 0.55])
+
 
 @dataclass(slots=True)
 class UICandidate:
-    kind: Literal["button", "input", "text"]
+    kind: CandidateKind
     center: tuple[int, int]
     text: str
     bbox: tuple[int, int, int, int]
@@ -37,31 +52,208 @@ INPUT_TERMS = {
 }
 
 
-def _center(bbox: tuple[int, int, int, int]) -> tuple[int, int]:
-    x1, y1, x2, y2 = bbox
-    return ((x1 + x2) // 2, (y1 + y2) // 2)
+def _word(text: str) -> str:
+    return text.lower().strip(".,;:!?\"'()[]")
 
 
-def generate_ui_candidates(tokens: list[OCRToken], width: int, height: int) -> list[UICandidate]:
-    _ = (width, height)
-    candidates: list[UICandidate] = []
-    for token in tokens:
-        lowered = token.text.lower()
-        kind: Literal["button", "input", "text"] = "text"
-        score = token.confidence
-        if lowered in BUTTON_TERMS:
-            kind = "button"
-            score = max(0.6, score)
-        elif lowered in INPUT_TERMS or lowered.endswith(":"):
-            kind = "input"
-            score = max(0.55, score)
-        candidates.append(
-            UICandidate(
-                kind=kind,
-                center=_center(token.bbox),
-                text=token.text,
-                bbox=token.bbox,
-                score=score,
-            )
+def load_vocabulary(path: str | Path) -> list[tuple[str, CandidateKind]]:
+    """Read "<kind> <phrase>" lines; blank lines and `#` comments are skipped."""
+    terms: list[tuple[str, CandidateKind]] = []
+    for line_no, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        kind, _, phrase = line.partition(" ")
+        if kind not in {"button", "input"} or not phrase.strip():
+            raise ValueError(f"{path}:{line_no}: expected '<button|input> <phrase>'")
+        terms.append((phrase.strip(), kind))
+    return terms
+
+
+class TermMatcher:
+    """Compiled UI vocabulary, matched word by word over OCR lines in one pass.
+
+    When a phrase is listed under both kinds, the first one added wins.
+    """
+
+    def __init__(self, terms: Iterable[tuple[str, CandidateKind]]) -> None:
+        automaton: Automaton[str, CandidateKind] = Automaton()
+        for phrase, kind in terms:
+            words = tuple(word for word in (_word(part) for part in phrase.split()) if word)
+            if words:
+                automaton.add(words, kind)
+        self._automaton = automaton.build()
+
+    def __len__(self) -> int:
+        return len(self._automaton)
+
+    @classmethod
+    def from_files(cls, *paths: str | Path) -> "TermMatcher":
+        """Built-in terms followed by the vocabulary files, in order."""
+        return cls([*_builtin_terms(), *(term for path in paths for term in load_vocabulary(path))])
+
+    def match(self, words: Sequence[str]) -> list[Match[CandidateKind]]:
+        """Leftmost-longest, non-overlapping matches over already-normalised words."""
+        return self._automaton.longest_matches(words)
+
+
+def _builtin_terms() -> list[tuple[str, CandidateKind]]:
+    terms: list[tuple[str, CandidateKind]] = [(term, "button") for term in sorted(BUTTON_TERMS)]
+    terms += [(term, "input") for term in sorted(INPUT_TERMS)]
+    return terms + load_vocabulary(DEFAULT_VOCABULARY)
+
+
+@functools.cache
+def default_matcher() -> TermMatcher:
+    return TermMatcher(_builtin_terms())
+
+
+class CandidateColumns:
+    """UI candidates as parallel arrays, in generation order (not sorted).
+
+    `kinds` holds indexes into `KINDS`; use `top_k` / `to_candidates` to get
+    score-ordered `UICandidate` views.
+    """
+
+    __slots__ = ("kinds", "texts", "bboxes", "scores")
+
+    def __init__(self, kinds: np.ndarray, texts: list[str], bboxes: np.ndarray, scores: np.ndarray) -> None:
+        self.kinds = kinds
+        self.texts = texts
+        self.bboxes = bboxes
+        self.scores = scores
+
+    @classmethod
+    def from_candidates(cls, candidates: Sequence[UICandidate]) -> "CandidateColumns":
+        n = len(candidates)
+        return cls(
+            kinds=np.fromiter((_KIND_CODES[c.kind] for c in candidates), dtype=np.uint8, count=n),
+            texts=[c.text for c in candidates],
+            bboxes=np.array([c.bbox for c in candidates], dtype=np.int32).reshape(n, 4),
+            scores=np.fromiter((c.score for c in candidates), dtype=np.float64, count=n),
         )
-    return sorted(candidates, key=lambda c: c.score, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.bboxes[:, :2] + self.bboxes[:, 2:]) // 2
+
+    @property
+    def nbytes(self) -> int:
+        return self.kinds.nbytes + self.bboxes.nbytes + self.scores.nbytes + sys.getsizeof(self.texts)
+
+    def top_k(self, k: int) -> np.ndarray:
+        return top_k_indices(self.scores, k)
+
+    def to_candidates(self, indexes: Iterable[int] | None = None) -> list[UICandidate]:
+        """Materialise candidates; by default all of them, best score first."""
+        order = self.top_k(len(self)) if indexes is None else np.asarray(list(indexes), dtype=np.intp)
+        bboxes = self.bboxes[order].tolist()
+        centers = self.centers[order].tolist()
+        return [
+            UICandidate(kind=KINDS[kind], center=tuple(center), text=self.texts[i], bbox=tuple(bbox), score=score)
+            for i, kind, center, bbox, score in zip(
+                order.tolist(), self.kinds[order].tolist(), centers, bboxes, self.scores[order].tolist()
+            )
+        ]
+
+
+def _line_runs(bboxes: np.ndarray, gap_factor: float = 1.0) -> list[list[int]]:
+    if not len(bboxes):
+        return []
+    middles = (bboxes[:, 1] + bboxes[:, 3]) / 2
+    order = np.lexsort((bboxes[:, 0], middles)).tolist()
+    boxes = bboxes.tolist()
+    mids = middles.tolist()
+
+    lines: list[list[int]] = []
+    top = bottom = 0
+    for i in order:
+        x1, y1, x2, y2 = boxes[i]
+        if lines and top <= mids[i] <= bottom:
+            lines[-1].append(i)
+            top, bottom = min(top, y1), max(bottom, y2)
+        else:
+            lines.append([i])
+            top, bottom = y1, y2
+
+    runs: list[list[int]] = []
+    for line in lines:
+        line.sort(key=lambda i: boxes[i][0])
+        run = [line[0]]
+        for i in line[1:]:
+            prev = boxes[run[-1]]
+            box = boxes[i]
+            height = max(prev[3] - prev[1], box[3] - box[1], 1)
+            if box[0] - prev[2] > gap_factor * height:
+                runs.append(run)
+                run = []
+            run.append(i)
+        runs.append(run)
+    return runs
+
+
+def cluster_lines(tokens: Sequence[OCRToken], gap_factor: float = 1.0) -> list[list[OCRToken]]:
+    """Group tokens into runs of adjacent words on the same text line, left to right.
+
+    Tokens share a line when their vertical centre falls inside the line's band;
+    a line is split where the horizontal gap exceeds `gap_factor` x the word height.
+    """
+    bboxes = np.array([token.bbox for token in tokens], dtype=np.int32).reshape(len(tokens), 4)
+    return [[tokens[i] for i in run] for run in _line_runs(bboxes, gap_factor)]
+
+
+def ground_columns(tokens: TokenColumns, matcher: TermMatcher | None = None) -> CandidateColumns:
+    """Columnar grounding: phrase candidates for multi-word vocabulary hits, then one per token.
+
+    Kinds come from the vocabulary, except that a single token ending in a colon
+    ("Save:", "Name:") is always a field label, so an input; scores are raised
+    to each kind's floor in one vectorised step.
+    """
+    matcher = matcher or default_matcher()
+    words = [_word(text) for text in tokens.texts]
+    kinds = np.fromiter((text.endswith(":") for text in tokens.texts), dtype=np.uint8, count=len(tokens))
+    kinds *= _KIND_CODES["input"]
+
+    phrase_kinds: list[int] = []
+    phrase_texts: list[str] = []
+    phrase_boxes: list[np.ndarray] = []
+    phrase_conf: list[float] = []
+    for run in _line_runs(tokens.bboxes):
+        for match in matcher.match([words[i] for i in run]):
+            members = run[match.start : match.end]
+            if len(members) == 1:
+                if not tokens.texts[members[0]].endswith(":"):
+                    kinds[members[0]] = _KIND_CODES[match.value]
+                continue
+            boxes = tokens.bboxes[members]
+            phrase_kinds.append(_KIND_CODES[match.value])
+            phrase_texts.append(" ".join(tokens.texts[i] for i in members))
+            phrase_boxes.append(np.concatenate([boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)]))
+            phrase_conf.append(float(tokens.confidences[members].min()))
+
+    all_kinds = np.concatenate([np.array(phrase_kinds, dtype=np.uint8), kinds])
+    confidences = np.concatenate([np.array(phrase_conf, dtype=np.float64), tokens.confidences])
+    bboxes = np.concatenate([np.array(phrase_boxes, dtype=np.int32).reshape(-1, 4), tokens.bboxes])
+    return CandidateColumns(
+        kinds=all_kinds,
+        texts=phrase_texts + tokens.texts,
+        bboxes=bboxes,
+        scores=np.maximum(confidences, _MIN_SCORES[all_kinds]),
+    )
+
+
+def generate_ui_candidates(
+    tokens: list[OCRToken],
+    width: int,
+    height: int,
+    matcher: TermMatcher | None = None,
+) -> list[UICandidate]:
+    """Score every token, plus phrase candidates for multi-word vocabulary hits, best first.
+
+    `matcher` replaces the default vocabulary (built-in terms and `vocab/default.txt`).
+    """
+    _ = (width, height)
+    return ground_columns(TokenColumns.from_tokens(tokens), matcher).to_candidates()
@@ -1,17 +1,129 @@
 from __future__ import annotations
 
 import base64
+from collections.abc import Iterable
 from io import BytesIO
 
-from PIL import Image
+from PIL import Image, ImageChops
 
+Box = tuple[int, int, int, int]
 
-def decode_base64_image(image_base64: str) -> Image.Image:
-    raw = base64.b64decode(image_base64)
+
+def decode_image_bytes(raw: bytes) -> Image.Image:
     return Image.open(BytesIO(raw)).convert("RGB")
 
 
+def decode_base64_image(image_base64: str) -> Image.Image:
+    return decode_image_bytes(base64.b64decode(image_base64))
+
+
+def decode_image_payload(image_base64: str, image_bytes: bytes | None = None) -> Image.Image:
+    """Decode an image slot that carries either raw bytes or base64 text."""
+    if image_bytes is not None:
+        return decode_image_bytes(image_bytes)
+    return decode_base64_image(image_base64)
+
+
 def encode_image_to_base64(image: Image.Image, fmt: str = "PNG") -> str:
     buf = BytesIO()
     image.save(buf, format=fmt)
     return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def encode_image(image: Image.Image, codec: str = "png", quality: int = 85, png_compress_level: int = 6) -> bytes:
+    """Encode for upload: `quality` applies to WebP and JPEG, `png_compress_level` (0-9) to PNG."""
+    buf = BytesIO()
+    if codec == "png":
+        image.save(buf, format="PNG", compress_level=png_compress_level)
+    elif codec == "webp":
+        image.save(buf, format="WEBP", quality=quality, method=0)
+    else:
+        image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def downscale(image: Image.Image, max_long_edge: int) -> Image.Image:
+    """`image` shrunk so its long edge is at most `max_long_edge`; returned as-is when it already fits."""
+    if max(image.size) <= max_long_edge:
+        return image
+    ratio = max_long_edge / max(image.size)
+    size = (max(1, round(image.width * ratio)), max(1, round(image.height * ratio)))
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def boxes_intersect(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def box_union(a: Box, b: Box) -> Box:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def merge_boxes(boxes: Iterable[Box]) -> list[Box]:
+    """Merge overlapping boxes into their bounding boxes until none overlap."""
+    merged: list[Box] = []
+    for box in boxes:
+        while True:
+            hit = next((i for i, other in enumerate(merged) if boxes_intersect(box, other)), None)
+            if hit is None:
+                break
+            box = box_union(box, merged.pop(hit))
+        merged.append(box)
+    return merged
+
+
+def diff_tiles(previous: Image.Image, current: Image.Image, tile_size: int = 128) -> list[Box]:
+    """Return `(x1, y1, x2, y2)` boxes of the fixed grid tiles that changed.
+
+    Both frames must share size and mode. Horizontally adjacent dirty tiles in the
+    same row are merged into a single box to keep the per-tile overhead down.
+    """
+    if previous.size != current.size or previous.mode != current.mode:
+        raise ValueError("frames must share size and mode to be diffed")
+    diff = ImageChops.difference(previous, current)
+    changed = diff.getbbox()
+    if changed is None:
+        return []
+
+    width, height = current.size
+    left, top, right, bottom = changed
+    boxes: list[Box] = []
+    for y1 in range(top - top % tile_size, bottom, tile_size):
+        y2 = min(y1 + tile_size, height)
+        run_start: int | None = None
+        run_end = 0
+        for x1 in range(left - left % tile_size, right, tile_size):
+            x2 = min(x1 + tile_size, width)
+            if diff.crop((x1, y1, x2, y2)).getbbox() is None:
+                if run_start is not None:
+                    boxes.append((run_start, y1, run_end, y2))
+                    run_start = None
+                continue
+            if run_start is None:
+                run_start = x1
+            run_end = x2
+        if run_start is not None:
+            boxes.append((run_start, y1, run_end, y2))
+    return boxes
+
+
+def apply_tiles(base: Image.Image, tiles: Iterable[tuple[int, int, Image.Image]]) -> Image.Image:
+    """Return a copy of `base` with each `(x, y, tile)` pasted at its offset."""
+    frame = base.copy()
+    for x, y, tile in tiles:
+        if tile.mode != frame.mode:
+            tile = tile.convert(frame.mode)
+        frame.paste(tile, (x, y))
+    return frame
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 16) -> int:
+    """Difference hash (dHash) with `hash_size * hash_size` bits for near-duplicate checks."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX, reducing_gap=3.0)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
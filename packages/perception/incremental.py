@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from .image_utils import Box, boxes_intersect, diff_tiles, merge_boxes
+from .ocr import OCRToken, extract_ocr_tokens, extract_ocr_tokens_batch
+
+
+@dataclass(slots=True)
+class PriorFrame:
+    """The previous frame of a session together with the tokens OCR found on it.
+
+    `roi` is the area those tokens were read from, when OCR was limited to one.
+    """
+
+    image: Image.Image
+    tokens: list[OCRToken]
+    roi: Box | None = None
+
+
+def ocr_regions(dirty: list[Box], tokens: list[OCRToken], size: tuple[int, int], padding: int = 16) -> list[Box]:
+    """Pad dirty boxes and grow them until no previous token straddles a region edge.
+
+    Words that were partly inside a changed area are re-read whole, so merging
+    the new tokens with the untouched old ones does not split words.
+    """
+    width, height = size
+    regions = merge_boxes(
+        [
+            (max(0, x1 - padding), max(0, y1 - padding), min(width, x2 + padding), min(height, y2 + padding))
+            for x1, y1, x2, y2 in dirty
+        ]
+    )
+    boxes = np.array([token.bbox for token in tokens], dtype=np.int64).reshape(len(tokens), 4)
+    # A token absorbed into a region lies inside it from then on, so each is taken once.
+    pending = np.ones(len(boxes), dtype=bool)
+    while True:
+        grown = []
+        for x1, y1, x2, y2 in regions:
+            hit = pending & (boxes[:, 0] < x2) & (x1 < boxes[:, 2]) & (boxes[:, 1] < y2) & (y1 < boxes[:, 3])
+            if hit.any():
+                pending &= ~hit
+                inside = boxes[hit]
+                x1, y1 = min(x1, int(inside[:, 0].min())), min(y1, int(inside[:, 1].min()))
+                x2, y2 = max(x2, int(inside[:, 2].max())), max(y2, int(inside[:, 3].max()))
+            grown.append((x1, y1, x2, y2))
+        grown = merge_boxes(grown)
+        if grown == regions:
+            return regions
+        regions = grown
+
+
+def _clip(regions: list[Box], roi: Box) -> list[Box]:
+    clipped = [
+        (max(x1, roi[0]), max(y1, roi[1]), min(x2, roi[2]), min(y2, roi[3])) for x1, y1, x2, y2 in regions
+    ]
+    return [box for box in clipped if box[2] > box[0] and box[3] > box[1]]
+
+
+def extract_ocr_tokens_incremental(
+    image: Image.Image,
+    prior: PriorFrame,
+    dirty: list[Box] | None = None,
+    tile_size: int = 128,
+    padding: int = 16,
+    max_dirty_ratio: float = 0.5,
+    full_pass: Callable[[Image.Image], list[OCRToken]] | None = None,
+    read_regions: Callable[[list[Image.Image]], list[list[OCRToken]]] | None = None,
+    roi: Box | None = None,
+) -> list[OCRToken]:
+    """OCR only what changed since `prior` and reuse its tokens everywhere else.
+
+    `dirty` boxes can be passed when already known (e.g. from delta tiles);
+    otherwise the frames are diffed in `tile_size` tiles. Falls back to a full
+    pass (`full_pass`, plain OCR by default) when more than `max_dirty_ratio` of
+    the frame needs re-reading, or when `roi` differs from the area `prior` was
+    read from. Changed regions are clipped to `roi` and read with
+    `read_regions` (batched plain OCR by default), which should preprocess the
+    crops as `full_pass` does. Tokens come back ordered top-to-bottom,
+    left-to-right.
+    """
+    full_pass = full_pass or extract_ocr_tokens
+    read_regions = read_regions or extract_ocr_tokens_batch
+    if prior.image.size != image.size or prior.roi != roi:
+        return full_pass(image)
+    if dirty is None:
+        dirty = diff_tiles(prior.image.convert(image.mode), image, tile_size)
+    if not dirty:
+        return list(prior.tokens)
+
+    regions = ocr_regions(dirty, prior.tokens, image.size, padding)
+    bounds = (0, 0, image.width, image.height)
+    if roi is not None:
+        bounds = (max(0, roi[0]), max(0, roi[1]), min(image.width, roi[2]), min(image.height, roi[3]))
+        regions = _clip(regions, bounds)
+        if not regions:
+            return list(prior.tokens)
+    area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+    if area > max_dirty_ratio * (bounds[2] - bounds[0]) * (bounds[3] - bounds[1]):
+        return full_pass(image)
+
+    tokens = [token for token in prior.tokens if not any(boxes_intersect(token.bbox, region) for region in regions)]
+    crops = [image.crop(region) for region in regions]
+    for (left, top, _, _), crop_tokens in zip(regions, read_regions(crops)):
+        for token in crop_tokens:
+            x1, y1, x2, y2 = token.bbox
+            tokens.append(OCRToken(text=token.text, bbox=(x1 + left, y1 + top, x2 + left, y2 + top), confidence=token.confidence))
+    tokens.sort(key=lambda token: (token.bbox[1], token.bbox[0]))
+    return tokens
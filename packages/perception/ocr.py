@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import functools
+import os
 import shutil
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -25,24 +30,28 @@ def _normalize_conf(raw: Any) -> float:
     return max(0.0, min(1.0, val))
 
 
-def _ensure_tesseract_cmd(pytesseract_module) -> None:
+@functools.cache
+def _tesseract_cmd() -> str | None:
+    """Path to a tesseract binary outside PATH, probed once per process."""
     if shutil.which("tesseract"):
-        return
+        return None
     candidates = [
         Path(r"C:\Program Files\Tesseract-OCR\tesseract.exe"),
         Path(r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe"),
     ]
     for candidate in candidates:
         if candidate.exists():
-            pytesseract_module.pytesseract.tesseract_cmd = str(candidate)
-            return
+            return str(candidate)
+    return None
 
 
-def extract_ocr_tokens(image: Image.Image) -> list[OCRToken]:
-    """Extract OCR tokens with bounding boxes.
+def _ensure_tesseract_cmd(pytesseract_module) -> None:
+    cmd = _tesseract_cmd()
+    if cmd is not None:
+        pytesseract_module.pytesseract.tesseract_cmd = cmd
 
-    If pytesseract is unavailable, returns an empty list.
-    """
+
+def _pytesseract_tokens(image: Image.Image, lang: str) -> list[OCRToken]:
     try:
         import pytesseract
     except ImportError:
@@ -50,7 +59,7 @@ def extract_ocr_tokens(image: Image.Image) -> list[OCRToken]:
     _ensure_tesseract_cmd(pytesseract)
 
     try:
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
     except Exception as exc:
         # pytesseract can be importable while local tesseract binary is unavailable.
         if exc.__class__.__name__ in {"TesseractNotFoundError", "TesseractError"}:
@@ -69,3 +78,132 @@ def extract_ocr_tokens(image: Image.Image) -> list[OCRToken]:
         bbox = (left, top, left + width, top + height)
         tokens.append(OCRToken(text=text, bbox=bbox, confidence=_normalize_conf(data["conf"][i])))
     return tokens
+
+
+def _tesserocr_tokens(api, image: Image.Image) -> list[OCRToken]:
+    from tesserocr import RIL, iterate_level
+
+    api.SetImage(image)
+    api.Recognize()
+    tokens: list[OCRToken] = []
+    for word in iterate_level(api.GetIterator(), RIL.WORD):
+        text = (word.GetUTF8Text(RIL.WORD) or "").strip()
+        if not text:
+            continue
+        x1, y1, x2, y2 = word.BoundingBox(RIL.WORD)
+        tokens.append(OCRToken(text=text, bbox=(x1, y1, x2, y2), confidence=_normalize_conf(word.Confidence(RIL.WORD))))
+    return tokens
+
+
+def _tesserocr_available() -> bool:
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class OCRWorkerPool:
+    """Bounded pool of long-lived OCR workers.
+
+    With the optional `tesserocr` package each worker thread keeps its own warm
+    `PyTessBaseAPI` (language data loaded once). Otherwise workers drive
+    pytesseract, which still starts a tesseract process per image but never
+    more than `workers` at a time.
+    """
+
+    def __init__(self, workers: int | None = None, lang: str = "eng") -> None:
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.lang = lang
+        self.backend = "tesserocr" if _tesserocr_available() else "pytesseract"
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+        self._local = threading.local()
+        self._apis: list[Any] = []
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            from tesserocr import PyTessBaseAPI
+
+            api = PyTessBaseAPI(lang=self.lang)
+            self._local.api = api
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def _run(self, image: Image.Image) -> list[OCRToken]:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            if self.backend == "tesserocr":
+                return _tesserocr_tokens(self._api(), image)
+            return _pytesseract_tokens(image, self.lang)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def submit(self, image: Image.Image) -> Future[list[OCRToken]]:
+        with self._lock:
+            self._queued += 1
+        try:
+            return self._executor.submit(self._run, image)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    def map(self, images: Iterable[Image.Image]) -> list[list[OCRToken]]:
+        """OCR several images concurrently; results keep the input order."""
+        futures = [self.submit(image) for image in images]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict[str, int | str]:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            apis, self._apis = self._apis, []
+        for api in apis:
+            api.End()
+
+
+_default_pool: OCRWorkerPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def default_ocr_pool() -> OCRWorkerPool:
+    """Process-wide pool, sized by `DESKTOP_AGENT_OCR_WORKERS` and `DESKTOP_AGENT_OCR_LANG` on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            workers = os.getenv("DESKTOP_AGENT_OCR_WORKERS", "").strip()
+            lang = os.getenv("DESKTOP_AGENT_OCR_LANG", "").strip() or "eng"
+            _default_pool = OCRWorkerPool(workers=int(workers) if workers else None, lang=lang)
+        return _default_pool
+
+
+def extract_ocr_tokens(image: Image.Image) -> list[OCRToken]:
+    """Extract OCR tokens with bounding boxes.
+
+    If neither tesserocr nor pytesseract is usable, returns an empty list.
+    """
+    return default_ocr_pool().submit(image).result()
+
+
+def extract_ocr_tokens_batch(images: Iterable[Image.Image]) -> list[list[OCRToken]]:
+    """Extract tokens for several images at once on the shared pool, in input order."""
+    return default_ocr_pool().map(images)
@@ -1,22 +1,257 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+import time
+from collections.abc import Callable, Iterable
+from typing import TypeVar
 
-from packages.contracts.models import ScreenCapture
+from PIL import Image
 
-from .grounding import UICandidate, generate_ui_candidates
-from .image_utils import decode_base64_image
-from .ocr import OCRToken, extract_ocr_tokens
+from packages.contracts.models import PerceptionLevel, ScreenCapture
+
+from .columns import TokenColumns
+from .frame import Frame
+from .grounding import CandidateColumns, TermMatcher, UICandidate, ground_columns
+from .image_utils import Box, decode_image_payload
+from .incremental import PriorFrame, extract_ocr_tokens_incremental
+from .ocr import OCRToken, extract_ocr_tokens, extract_ocr_tokens_batch
+from .preprocess import OCRPreprocess, extract_ocr_tokens_preprocessed
+from .spatial import CandidateGrid
+
+# Rough per-object overhead of an OCRToken / UICandidate with its tuples, in bytes.
+_TOKEN_OVERHEAD = 200
+_CANDIDATE_OVERHEAD = 260
+
+T = TypeVar("T")
 
 
-@dataclass(slots=True)
 class PerceptionSnapshot:
-    tokens: list[OCRToken]
-    candidates: list[UICandidate]
+    """OCR tokens and UI candidates of one frame.
+
+    Pipeline results are held column-wise (`token_columns`, `candidate_columns`);
+    the `tokens` and `candidates` object lists are built on first access.
+    `candidates` is ordered best score first; `top_candidates(k)` selects the
+    best few without materialising the rest.
+    """
+
+    __slots__ = ("_tokens", "_candidates", "_token_columns", "_candidate_columns", "_index")
+
+    def __init__(
+        self,
+        tokens: list[OCRToken] | None = None,
+        candidates: list[UICandidate] | None = None,
+        *,
+        token_columns: TokenColumns | None = None,
+        candidate_columns: CandidateColumns | None = None,
+    ) -> None:
+        self._tokens = tokens if tokens is not None or token_columns is not None else []
+        self._candidates = candidates if candidates is not None or candidate_columns is not None else []
+        self._token_columns = token_columns
+        self._candidate_columns = candidate_columns
+        self._index: CandidateGrid | None = None
+
+    # Compared and shown like the dataclass it used to be, whichever form holds the data.
+    def __repr__(self) -> str:
+        return f"PerceptionSnapshot(tokens={self.tokens!r}, candidates={self.candidates!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PerceptionSnapshot):
+            return NotImplemented
+        return self.tokens == other.tokens and self.candidates == other.candidates
+
+    __hash__ = None  # type: ignore[assignment]
+
+    @property
+    def tokens(self) -> list[OCRToken]:
+        if self._tokens is None:
+            self._tokens = self._token_columns.to_tokens()
+        return self._tokens
+
+    @property
+    def candidates(self) -> list[UICandidate]:
+        if self._candidates is None:
+            self._candidates = self._candidate_columns.to_candidates()
+        return self._candidates
+
+    @property
+    def token_columns(self) -> TokenColumns:
+        if self._token_columns is None:
+            self._token_columns = TokenColumns.from_tokens(self._tokens)
+        return self._token_columns
+
+    @property
+    def candidate_columns(self) -> CandidateColumns:
+        if self._candidate_columns is None:
+            self._candidate_columns = CandidateColumns.from_candidates(self._candidates)
+        return self._candidate_columns
+
+    @property
+    def token_texts(self) -> list[str]:
+        if self._tokens is not None:
+            return [token.text for token in self._tokens]
+        return self._token_columns.texts
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate retained size, for cache budgets."""
+        size = 0
+        if self._token_columns is not None:
+            size += self._token_columns.nbytes + sum(len(text) for text in self._token_columns.texts)
+        if self._tokens is not None:
+            size += sys.getsizeof(self._tokens) + sum(_TOKEN_OVERHEAD + len(t.text) for t in self._tokens)
+        if self._candidate_columns is not None:
+            size += self._candidate_columns.nbytes + sum(len(text) for text in self._candidate_columns.texts)
+        if self._candidates is not None:
+            size += sys.getsizeof(self._candidates) + sum(_CANDIDATE_OVERHEAD + len(c.text) for c in self._candidates)
+        return size
+
+    def top_candidates(self, k: int) -> list[UICandidate]:
+        if self._candidates is not None:
+            return self._candidates[:k]
+        return self._candidate_columns.to_candidates(self._candidate_columns.top_k(k))
+
+    @property
+    def index(self) -> CandidateGrid:
+        """Spatial index over `candidates`, built on first use."""
+        if self._index is None:
+            self._index = CandidateGrid(self.candidates)
+        return self._index
+
+
+def captcha_detected(texts: Iterable[str]) -> bool:
+    joined = " ".join(texts).lower()
+    return "captcha" in joined or "i am not a robot" in joined
+
+
+class PerceptionRun:
+    """Perception of one frame as named stages, each computed on first access.
+
+    `decode` -> `ocr` -> `grounding`; `captcha_scan` needs only `ocr`. Seconds
+    spent in each stage are recorded in `timings`. See `analyze_screen` for the
+    OCR options.
+    """
+
+    def __init__(
+        self,
+        screen: ScreenCapture,
+        image: Image.Image | None = None,
+        prior: PriorFrame | None = None,
+        dirty: list[Box] | None = None,
+        preprocess: OCRPreprocess | None = None,
+        roi: Box | None = None,
+        matcher: TermMatcher | None = None,
+        frame: Frame | None = None,
+    ) -> None:
+        self.screen = screen
+        self.frame = frame
+        self.prior = prior
+        self.dirty = dirty
+        self.preprocess = preprocess
+        self.roi = roi
+        self.matcher = matcher
+        self.timings: dict[str, float] = {}
+        self._image = image
+        self._tokens: TokenColumns | None = None
+        self._candidates: CandidateColumns | None = None
+        self._captcha: bool | None = None
+
+    def _timed(self, stage: str, fn: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def _full_pass(self, frame: Image.Image) -> list[OCRToken]:
+        if self.preprocess is None:
+            return extract_ocr_tokens(frame)
+        return extract_ocr_tokens_preprocessed(frame, self.preprocess, roi=self.roi)
+
+    def _read_regions(self, crops: list[Image.Image]) -> list[list[OCRToken]]:
+        if self.preprocess is None:
+            return extract_ocr_tokens_batch(crops)
+        return [extract_ocr_tokens_preprocessed(crop, self.preprocess) for crop in crops]
+
+    def _ocr(self, image: Image.Image) -> TokenColumns:
+        if self.prior is None:
+            tokens = self._full_pass(image)
+        else:
+            tokens = extract_ocr_tokens_incremental(
+                image,
+                self.prior,
+                dirty=self.dirty,
+                full_pass=self._full_pass,
+                read_regions=self._read_regions,
+                roi=self.roi if self.preprocess is not None else None,
+            )
+        return TokenColumns.from_tokens(tokens)
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            if self.frame is not None:
+                frame = self.frame
+                self._image = frame.image if frame.decoded else self._timed("decode", lambda: frame.image)
+            else:
+                screen = self.screen
+                self._image = self._timed(
+                    "decode", lambda: decode_image_payload(screen.image_base64, screen.image_bytes)
+                )
+        return self._image
+
+    @property
+    def tokens(self) -> TokenColumns:
+        if self._tokens is None:
+            image = self.image
+            self._tokens = self._timed("ocr", lambda: self._ocr(image))
+        return self._tokens
+
+    @property
+    def candidates(self) -> CandidateColumns:
+        if self._candidates is None:
+            tokens = self.tokens
+            self._candidates = self._timed("grounding", lambda: ground_columns(tokens, self.matcher))
+        return self._candidates
+
+    @property
+    def captcha(self) -> bool:
+        if self._captcha is None:
+            texts = self.tokens.texts
+            self._captcha = self._timed("captcha_scan", lambda: captcha_detected(texts))
+        return self._captcha
+
+    def snapshot(self, level: PerceptionLevel = "full") -> PerceptionSnapshot:
+        """Snapshot of the stages `level` needs: nothing, OCR tokens only, or tokens and candidates."""
+        if level == "none":
+            return PerceptionSnapshot()
+        if level == "captcha-only":
+            return PerceptionSnapshot(token_columns=self.tokens)
+        return PerceptionSnapshot(token_columns=self.tokens, candidate_columns=self.candidates)
+
 
+def analyze_screen(
+    screen: ScreenCapture,
+    image: Image.Image | None = None,
+    prior: PriorFrame | None = None,
+    dirty: list[Box] | None = None,
+    preprocess: OCRPreprocess | None = None,
+    roi: Box | None = None,
+    matcher: TermMatcher | None = None,
+    level: PerceptionLevel = "full",
+    timings: dict[str, float] | None = None,
+    frame: Frame | None = None,
+) -> PerceptionSnapshot:
+    """Run OCR and grounding; pass `image` or the turn's shared `frame` to avoid decoding `screen` again.
 
-def analyze_screen(screen: ScreenCapture) -> PerceptionSnapshot:
-    image = decode_base64_image(screen.image_base64)
-    tokens = extract_ocr_tokens(image)
-    candidates = generate_ui_candidates(tokens, screen.width, screen.height)
-    return PerceptionSnapshot(tokens=tokens, candidates=candidates)
+    With `prior`, only regions that changed since that frame (or the given `dirty`
+    boxes) are re-read; see `extract_ocr_tokens_incremental`. With `preprocess`,
+    OCR goes through `extract_ocr_tokens_preprocessed`, limited to `roi`; a
+    `prior` read with a different `roi` forces a full pass.
+    `level` picks the stages to run; their timings are added to `timings`.
+    """
+    run = PerceptionRun(screen, image, prior, dirty, preprocess, roi, matcher, frame)
+    snapshot = run.snapshot(level)
+    if timings is not None:
+        for stage, seconds in run.timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+    return snapshot
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+from .image_utils import Box, downscale, merge_boxes
+from .ocr import OCRToken, extract_ocr_tokens_batch
+
+
+@dataclass(frozen=True, slots=True)
+class OCRPreprocess:
+    """How a frame is prepared before Tesseract sees it.
+
+    Regions are found on a grid of `block`-pixel cells whose share of edge pixels
+    reaches `min_density`; when they cover more than `max_region_ratio` of the
+    frame the whole frame is read instead. `active_window_only` restricts OCR to
+    the executor-reported active window rectangle.
+    """
+
+    grayscale: bool = True
+    max_long_edge: int | None = None
+    detect_regions: bool = True
+    block: int = 16
+    edge_threshold: int = 48
+    min_density: float = 0.06
+    padding: int = 4
+    max_region_ratio: float = 0.7
+    active_window_only: bool = False
+
+
+def _dense_components(dense: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """Inclusive `(c1, r1, c2, r2)` cell bounds of the 8-connected groups of True cells.
+
+    Works on horizontal runs: runs are found with numpy per row, runs touching
+    (diagonally included) a run in the next row are joined with union-find, and
+    bounds are reduced per group, so Python only loops over runs, not cells.
+    """
+    rows, cols = dense.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = dense
+    steps = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(steps == 1)
+    run_ends = np.nonzero(steps == -1)[1]  # exclusive; same row-major order as the starts
+    if not len(run_rows):
+        return []
+
+    parent = list(range(len(run_rows)))
+
+    def _find(run: int) -> int:
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    row_first = np.searchsorted(run_rows, np.arange(rows + 1))
+    for row in range(rows - 1):
+        a0, a1, b1 = row_first[row], row_first[row + 1], row_first[row + 2]
+        if a0 == a1 or a1 == b1:
+            continue
+        # Run b in the next row touches run a when b.start <= a.end and b.end >= a.start.
+        first = np.searchsorted(run_ends[a1:b1], run_starts[a0:a1], side="left")
+        last = np.searchsorted(run_starts[a1:b1], run_ends[a0:a1], side="right")
+        for offset, (lo, hi) in enumerate(zip(first.tolist(), last.tolist())):
+            root = _find(a0 + offset)
+            for other in range(a1 + lo, a1 + hi):
+                parent[_find(other)] = root
+
+    roots = np.fromiter((_find(run) for run in range(len(parent))), dtype=np.intp, count=len(parent))
+    labels, inverse = np.unique(roots, return_inverse=True)
+    c1 = np.full(len(labels), cols, dtype=np.intp)
+    r1 = np.full(len(labels), rows, dtype=np.intp)
+    c2 = np.zeros(len(labels), dtype=np.intp)
+    r2 = np.zeros(len(labels), dtype=np.intp)
+    np.minimum.at(c1, inverse, run_starts)
+    np.minimum.at(r1, inverse, run_rows)
+    np.maximum.at(c2, inverse, run_ends - 1)
+    np.maximum.at(r2, inverse, run_rows)
+    return list(zip(c1.tolist(), r1.tolist(), c2.tolist(), r2.tolist()))
+
+
+def text_regions(
+    gray: Image.Image,
+    block: int = 16,
+    edge_threshold: int = 48,
+    min_density: float = 0.06,
+    padding: int = 4,
+) -> list[Box]:
+    """Boxes around clusters of edge-dense cells, a cheap stand-in for text detection."""
+    width, height = gray.size
+    cols, rows = math.ceil(width / block), math.ceil(height / block)
+    edges = gray.filter(ImageFilter.FIND_EDGES).point(lambda value: 255 if value >= edge_threshold else 0)
+    # FIND_EDGES marks the frame border itself; blank that 1px ring out.
+    edges = ImageOps.expand(ImageOps.crop(edges, 1), border=1, fill=0)
+    density = np.frombuffer(edges.resize((cols, rows), Image.Resampling.BOX).tobytes(), dtype=np.uint8)
+    dense = density.reshape(rows, cols) >= min_density * 255
+
+    boxes = [
+        (
+            max(0, c1 * block - padding),
+            max(0, r1 * block - padding),
+            min(width, (c2 + 1) * block + padding),
+            min(height, (r2 + 1) * block + padding),
+        )
+        for c1, r1, c2, r2 in _dense_components(dense)
+    ]
+    return merge_boxes(boxes)
+
+
+def extract_ocr_tokens_preprocessed(
+    image: Image.Image,
+    config: OCRPreprocess | None = None,
+    roi: Box | None = None,
+) -> list[OCRToken]:
+    """OCR a grayscale, optionally downscaled frame, reading only likely text regions.
+
+    `roi` (e.g. the active window) limits the area considered. Token boxes are
+    mapped back to the coordinates of `image`.
+    """
+    config = config or OCRPreprocess()
+    left, top = 0, 0
+    if roi is not None:
+        x1, y1 = max(0, roi[0]), max(0, roi[1])
+        x2, y2 = min(image.width, roi[2]), min(image.height, roi[3])
+        if x2 > x1 and y2 > y1:
+            image = image.crop((x1, y1, x2, y2))
+            left, top = x1, y1
+
+    work = image.convert("L") if config.grayscale else image
+    scale = 1.0
+    if config.max_long_edge and max(work.size) > config.max_long_edge:
+        scale = config.max_long_edge / max(work.size)
+        work = downscale(work, config.max_long_edge)
+
+    full = (0, 0, work.width, work.height)
+    regions = [full]
+    if config.detect_regions:
+        gray = work if work.mode == "L" else work.convert("L")
+        regions = text_regions(gray, config.block, config.edge_threshold, config.min_density, config.padding)
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if area > config.max_region_ratio * work.width * work.height:
+            regions = [full]
+
+    tokens: list[OCRToken] = []
+    crops = [work if region == full else work.crop(region) for region in regions]
+    for (rx, ry, _, _), found in zip(regions, extract_ocr_tokens_batch(crops)):
+        for token in found:
+            x1, y1, x2, y2 = token.bbox
+            bbox = (
+                left + int((x1 + rx) / scale),
+                top + int((y1 + ry) / scale),
+                left + math.ceil((x2 + rx) / scale),
+                top + math.ceil((y2 + ry) / scale),
+            )
+            tokens.append(OCRToken(text=token.text, bbox=bbox, confidence=token.confidence))
+    tokens.sort(key=lambda token: (token.bbox[1], token.bbox[0]))
+    return tokens
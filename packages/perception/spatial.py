@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Collection, Iterable
+
+from .grounding import UICandidate
+from .image_utils import Box
+
+
+def _distance(x: int, y: int, bbox: Box) -> float:
+    """Euclidean distance from a point to a box; 0 when the point is inside."""
+    dx = max(bbox[0] - x, 0, x - bbox[2])
+    dy = max(bbox[1] - y, 0, y - bbox[3])
+    return math.hypot(dx, dy)
+
+
+class CandidateGrid:
+    """Uniform-grid spatial index over UI candidate boxes.
+
+    Each candidate is registered in every `cell`-pixel cell its box overlaps, so
+    point and rectangle queries touch only nearby cells. Results are ordered by
+    score (point, rect) or distance (nearest), like the candidate list itself.
+    """
+
+    def __init__(self, candidates: Iterable[UICandidate], cell: int = 64) -> None:
+        self.cell = cell
+        self.candidates = list(candidates)
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for i, candidate in enumerate(self.candidates):
+            x1, y1, x2, y2 = candidate.bbox
+            for cx in range(x1 // cell, x2 // cell + 1):
+                for cy in range(y1 // cell, y2 // cell + 1):
+                    self._cells.setdefault((cx, cy), []).append(i)
+        if self._cells:
+            self._min_cell = (min(cx for cx, _ in self._cells), min(cy for _, cy in self._cells))
+            self._max_cell = (max(cx for cx, _ in self._cells), max(cy for _, cy in self._cells))
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def _sorted(self, indexes: set[int]) -> list[UICandidate]:
+        return [self.candidates[i] for i in sorted(indexes, key=lambda i: (-self.candidates[i].score, i))]
+
+    def at(self, x: int, y: int) -> list[UICandidate]:
+        """Candidates whose box contains the point."""
+        found = {
+            i
+            for i in self._cells.get((x // self.cell, y // self.cell), ())
+            if _distance(x, y, self.candidates[i].bbox) == 0
+        }
+        return self._sorted(found)
+
+    def in_rect(self, box: Box) -> list[UICandidate]:
+        """Candidates whose box overlaps `box` (edges touching count)."""
+        x1, y1, x2, y2 = box
+        found: set[int] = set()
+        for cx in range(x1 // self.cell, x2 // self.cell + 1):
+            for cy in range(y1 // self.cell, y2 // self.cell + 1):
+                for i in self._cells.get((cx, cy), ()):
+                    bx1, by1, bx2, by2 = self.candidates[i].bbox
+                    if bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2:
+                        found.add(i)
+        return self._sorted(found)
+
+    def nearest(
+        self,
+        x: int,
+        y: int,
+        k: int = 1,
+        max_distance: float | None = None,
+        kinds: Collection[str] | None = None,
+    ) -> list[UICandidate]:
+        """Up to `k` candidates closest to the point (box distance), nearest first."""
+        if not self._cells or k <= 0:
+            return []
+        px, py = x // self.cell, y // self.cell
+        seen: set[int] = set()
+        best: list[tuple[float, int]] = []
+        ring = 0
+        while True:
+            for cx in range(px - ring, px + ring + 1):
+                for cy in range(py - ring, py + ring + 1):
+                    if max(abs(cx - px), abs(cy - py)) != ring:
+                        continue
+                    for i in self._cells.get((cx, cy), ()):
+                        if i in seen:
+                            continue
+                        seen.add(i)
+                        candidate = self.candidates[i]
+                        if kinds is not None and candidate.kind not in kinds:
+                            continue
+                        distance = _distance(x, y, candidate.bbox)
+                        if max_distance is None or distance <= max_distance:
+                            best.append((distance, i))
+            best.sort()
+            del best[k:]
+            # Anything not seen yet lies at least `ring * cell` pixels away.
+            reach = ring * self.cell
+            if len(best) == k and best[-1][0] <= reach:
+                break
+            if max_distance is not None and reach > max_distance:
+                break
+            if (
+                px - ring <= self._min_cell[0]
+                and py - ring <= self._min_cell[1]
+                and px + ring >= self._max_cell[0]
+                and py + ring >= self._max_cell[1]
+            ):
+                break
+            ring += 1
+        return [self.candidates[i] for _, i in best]
+
+    def snapper(self, radius: float, kinds: Collection[str] | None = None) -> Callable[[int, int], tuple[int, int] | None]:
+        """A `normalize_action` snap callable: move a point to the centre of the nearest candidate.
+
+        Points already inside a candidate, or with nothing within `radius`, are left alone.
+        """
+
+        def snap(x: int, y: int) -> tuple[int, int] | None:
+            hits = self.nearest(x, y, k=1, max_distance=radius, kinds=kinds)
+            if not hits or _distance(x, y, hits[0].bbox) == 0:
+                return None
+            return hits[0].center
+
+        return snap
@@ -1,6 +1,18 @@
 """Policy and risk evaluation."""
 
-from .engine import PolicyDecision, evaluate_executor_policy
+from .engine import PolicyDecision, PolicyEngine, default_policy_engine, evaluate_executor_policy
 from .risk import classify_risk
+from .rules import RuleHits, RuleSet, RuleSource, default_rule_source, load_rules
 
-__all__ = ["PolicyDecision", "classify_risk", "evaluate_executor_policy"]
+__all__ = [
+    "PolicyDecision",
+    "PolicyEngine",
+    "RuleHits",
+    "RuleSet",
+    "RuleSource",
+    "classify_risk",
+    "default_policy_engine",
+    "default_rule_source",
+    "evaluate_executor_policy",
+    "load_rules",
+]
@@ -0,0 +1,180 @@
+"""Re-evaluate executor policy over recorded turns and report changed decisions.
+
+Input is JSONL, one recorded turn per line::
+
+    {"action": {...}, "task": "...", "observation": "...", "reasoning": "...",
+     "active_window": "...", "constraints": {...}, "decision": {"status": "allow", "risk": "low"}}
+
+Run as ``python -m packages.policy.audit turns.jsonl --out diffs.jsonl``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any
+
+from pydantic import ValidationError
+
+from packages.contracts.models import Constraints, parse_action
+
+from .engine import PolicyEngine, default_policy_engine
+from .rules import RuleSet
+
+# Set per worker process by `_init_worker`.
+_engine: PolicyEngine | None = None
+
+
+@dataclass(slots=True)
+class AuditStats:
+    records: int = 0
+    changed: int = 0
+    unrecorded: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def add(self, other: "AuditStats") -> None:
+        self.records += other.records
+        self.changed += other.changed
+        self.unrecorded += other.unrecorded
+        self.errors += other.errors
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "records_per_second": round(self.records_per_second, 1)}
+
+
+def _make_engine(rule_paths: Sequence[str] | None) -> PolicyEngine:
+    return PolicyEngine(RuleSet.from_files(*rule_paths)) if rule_paths is not None else default_policy_engine()
+
+
+def _init_worker(rule_paths: Sequence[str] | None) -> None:
+    global _engine
+    _engine = _make_engine(rule_paths)
+
+
+def _audit_line(engine: PolicyEngine, line_no: int, line: str, stats: AuditStats) -> dict[str, Any] | None:
+    try:
+        record = json.loads(line)
+        action = parse_action(record["action"])
+        constraints = Constraints.model_validate(record["constraints"]) if record.get("constraints") else None
+        decision = engine.evaluate(
+            action,
+            record.get("task", ""),
+            record.get("observation", ""),
+            record.get("reasoning", ""),
+            record.get("active_window"),
+            constraints,
+            session_id=record.get("session_id"),
+        )
+    except (KeyError, TypeError, ValueError, ValidationError) as exc:
+        stats.errors += 1
+        return {"line": line_no, "error": str(exc).splitlines()[0]}
+
+    recorded = record.get("decision")
+    if isinstance(recorded, str):
+        recorded = {"status": recorded}
+    if not isinstance(recorded, dict) or "status" not in recorded:
+        stats.unrecorded += 1
+        return None
+    if recorded["status"] == decision.status and recorded.get("risk", decision.risk) == decision.risk:
+        return None
+    stats.changed += 1
+    return {
+        "line": line_no,
+        "recorded": {"status": recorded["status"], "risk": recorded.get("risk")},
+        "current": {"status": decision.status, "risk": decision.risk, "reason": decision.reason},
+    }
+
+
+def _audit_chunk(
+    chunk: list[tuple[int, str]], engine: PolicyEngine | None = None
+) -> tuple[list[dict[str, Any]], AuditStats]:
+    engine = engine or _engine or default_policy_engine()
+    stats = AuditStats(records=len(chunk))
+    diffs = [diff for line_no, line in chunk if (diff := _audit_line(engine, line_no, line, stats)) is not None]
+    return diffs, stats
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[list[tuple[int, str]]]:
+    numbered = ((line_no, line) for line_no, line in enumerate(lines, start=1) if line.strip())
+    while chunk := list(islice(numbered, size)):
+        yield chunk
+
+
+def audit_records(
+    lines: Iterable[str],
+    out: IO[str],
+    workers: int | None = None,
+    chunk_size: int = 1000,
+    rule_paths: Sequence[str] | None = None,
+) -> AuditStats:
+    """Evaluate every recorded turn in `lines` and write one JSON line per diff or bad record to `out`.
+
+    Chunks of `chunk_size` lines go to `workers` processes (`workers=0` runs in
+    this process) with at most two chunks per worker in flight, so memory stays
+    flat however long the input is. Diffs are written in input order.
+    `rule_paths` replaces the `DESKTOP_AGENT_POLICY_RULES` files for the audit.
+    """
+    stats = AuditStats()
+    start = time.perf_counter()
+
+    def _emit(result: tuple[list[dict[str, Any]], AuditStats]) -> None:
+        diffs, chunk_stats = result
+        for diff in diffs:
+            out.write(json.dumps(diff) + "\n")
+        stats.add(chunk_stats)
+
+    if workers == 0:
+        engine = _make_engine(rule_paths)
+        for chunk in _chunks(lines, chunk_size):
+            _emit(_audit_chunk(chunk, engine))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rule_paths,)) as pool:
+            window = 2 * workers
+            pending: deque[Future] = deque()
+            for chunk in _chunks(lines, chunk_size):
+                if len(pending) >= window:
+                    _emit(pending.popleft().result())
+                pending.append(pool.submit(_audit_chunk, chunk))
+            while pending:
+                _emit(pending.popleft().result())
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m packages.policy.audit", description=__doc__.splitlines()[0])
+    parser.add_argument("records", type=Path, help="JSONL file of recorded turns")
+    parser.add_argument("--out", type=Path, help="where to write diffs (default: stdout)")
+    parser.add_argument("--workers", type=int, help="worker processes; 0 runs in-process (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--rules", action="append", help="rule file to audit against (repeatable)")
+    args = parser.parse_args(argv)
+
+    with args.records.open(encoding="utf-8") as lines:
+        out = args.out.open("w", encoding="utf-8") if args.out else sys.stdout
+        try:
+            stats = audit_records(lines, out, workers=args.workers, chunk_size=args.chunk_size, rule_paths=args.rules)
+        finally:
+            if args.out:
+                out.close()
+    print(json.dumps(stats.to_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
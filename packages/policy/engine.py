@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import functools
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 
 from packages.contracts.models import Constraints, DesktopAction, RiskLevel
-from packages.policy.risk import classify_risk
+from packages.policy.risk import risk_from_hits
 
-BLOCK_TERMS = {"captcha", "bypass", "anti-bot", "unauthorized access"}
-CONFIRM_TERMS = {"delete", "overwrite", "system settings", "registry", "credentials"}
+# The term sets live in `rules`; they are re-exported here for existing imports.
+from .rules import BLOCK_TERMS, CONFIRM_TERMS  # noqa: F401
+from .rules import RuleHits, RuleSet, RuleSource, default_rule_source
 
 
 @dataclass(slots=True)
@@ -16,9 +20,104 @@ class PolicyDecision:
     risk: RiskLevel
 
 
-def _contains_any(text: str, terms: set[str]) -> bool:
-    lowered = text.lower()
-    return any(term in lowered for term in terms)
+@dataclass(slots=True)
+class _TaskFeatures:
+    task: str
+    rules: RuleSet
+    hits: RuleHits
+    state: int
+
+
+class PolicyEngine:
+    """Risk and executor policy over one compiled scan per step.
+
+    The task is scanned once per session (cached by `session_id`, or by the task
+    text) and the scan resumes from its automaton state over the observation and
+    reasoning, so hits are the same as scanning the joined text.
+    """
+
+    def __init__(self, rules: RuleSource | RuleSet | None = None, max_sessions: int = 4096) -> None:
+        self._source = rules if rules is not None else default_rule_source()
+        self.max_sessions = max_sessions
+        self._tasks: OrderedDict[str, _TaskFeatures] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def rules(self) -> RuleSet:
+        source = self._source
+        return source.current() if isinstance(source, RuleSource) else source
+
+    def _task_features(self, rules: RuleSet, task: str, session_id: str | None) -> _TaskFeatures:
+        key = session_id if session_id is not None else task
+        with self._lock:
+            features = self._tasks.get(key)
+            if features is not None and features.task == task and features.rules is rules:
+                self._tasks.move_to_end(key)
+                return features
+        hits, state = rules.feed(task + " ")
+        features = _TaskFeatures(task, rules, hits, state)
+        with self._lock:
+            self._tasks[key] = features
+            self._tasks.move_to_end(key)
+            while len(self._tasks) > self.max_sessions:
+                self._tasks.popitem(last=False)
+        return features
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._tasks.pop(session_id, None)
+
+    def scan(self, task: str, observation: str = "", reasoning: str = "", session_id: str | None = None) -> RuleHits:
+        """All rule hits in `f"{task} {observation} {reasoning}"`."""
+        rules = self.rules
+        features = self._task_features(rules, task, session_id)
+        hits, _ = rules.feed(f"{observation} {reasoning}", features.state)
+        return features.hits | hits
+
+    def classify_risk(
+        self,
+        action: DesktopAction,
+        task: str,
+        observation: str = "",
+        reasoning: str = "",
+        session_id: str | None = None,
+    ) -> RiskLevel:
+        return risk_from_hits(action, self.scan(task, observation, reasoning, session_id), self.rules)
+
+    def evaluate(
+        self,
+        action: DesktopAction,
+        task: str,
+        observation: str,
+        reasoning: str,
+        active_window: str | None,
+        constraints: Constraints | None,
+        session_id: str | None = None,
+    ) -> PolicyDecision:
+        rules = self.rules
+        hits = self.scan(task, observation, reasoning, session_id)
+        risk = risk_from_hits(action, hits, rules)
+
+        if "block" in hits:
+            return PolicyDecision(status="block", reason="security or anti-bot content detected", risk="destructive")
+
+        if constraints and constraints.blocked_apps and active_window:
+            win = active_window.lower()
+            if any(blocked.lower() in win for blocked in constraints.blocked_apps):
+                return PolicyDecision(status="block", reason=f"active window blocked by policy: {active_window}", risk="sensitive")
+
+        if risk in {"sensitive", "destructive"}:
+            return PolicyDecision(status="confirm", reason=f"risk level is {risk}", risk=risk)
+
+        if "confirm" in hits:
+            return PolicyDecision(status="confirm", reason="potentially destructive context", risk="sensitive")
+
+        return PolicyDecision(status="allow", reason="low risk action", risk="low")
+
+
+@functools.cache
+def default_policy_engine() -> PolicyEngine:
+    return PolicyEngine()
 
 
 def evaluate_executor_policy(
@@ -28,22 +127,8 @@ def evaluate_executor_policy(
     reasoning: str,
     active_window: str | None,
     constraints: Constraints | None,
+    session_id: str | None = None,
 ) -> PolicyDecision:
-    joined = f"{task} {observation} {reasoning}"
-    risk = classify_risk(action, task, observation, reasoning)
-
-    if _contains_any(joined, BLOCK_TERMS):
-        return PolicyDecision(status="block", reason="security or anti-bot content detected", risk="destructive")
-
-    if constraints and constraints.blocked_apps and active_window:
-        win = active_window.lower()
-        if any(blocked.lower() in win for blocked in constraints.blocked_apps):
-            return PolicyDecision(status="block", reason=f"active window blocked by policy: {active_window}", risk="sensitive")
-
-    if risk in {"sensitive", "destructive"}:
-        return PolicyDecision(status="confirm", reason=f"risk level is {risk}", risk=risk)
-
-    if _contains_any(joined, CONFIRM_TERMS):
-        return PolicyDecision(status="confirm", reason="potentially destructive context", risk="sensitive")
-
-    return PolicyDecision(status="allow", reason="low risk action", risk="low")
+    return default_policy_engine().evaluate(
+        action, task, observation, reasoning, active_window, constraints, session_id=session_id
+    )
@@ -2,29 +2,23 @@ from __future__ import annotations
 
 from packages.contracts.models import DesktopAction, RiskLevel
 
-DESTRUCTIVE_TERMS = {
-    "delete",
-    "remove",
-    "wipe",
-    "format",
-    "uninstall",
-    "drop database",
-    "reset",
-}
-SENSITIVE_TERMS = {
-    "password",
-    "otp",
-    "api key",
-    "token",
-    "secret",
-    "credential",
-    "system settings",
-}
+# The term sets live in `rules`; they are re-exported here for existing imports.
+from .rules import DESTRUCTIVE_TERMS, SENSITIVE_TERMS  # noqa: F401
+from .rules import RuleHits, RuleSet, default_rule_source
 
 
-def _contains_any(text: str, terms: set[str]) -> bool:
-    lowered = text.lower()
-    return any(term in lowered for term in terms)
+def risk_from_hits(action: DesktopAction, hits: RuleHits, rules: RuleSet) -> RiskLevel:
+    """Risk level given the rule hits of the joined task/observation/reasoning text."""
+    if "destructive" in hits:
+        return "destructive"
+    if "sensitive" in hits:
+        return "sensitive"
+    if action.action in {"hotkey"} and "delete" in getattr(action.parameters, "keys", []):
+        return "destructive"
+    if action.action == "type":
+        if "sensitive" in rules.scan(action.parameters.text):
+            return "sensitive"
+    return "low"
 
 
 def classify_risk(
@@ -33,15 +27,5 @@ def classify_risk(
     observation: str = "",
     reasoning: str = "",
 ) -> RiskLevel:
-    joined = " ".join([task, observation, reasoning]).lower()
-    if _contains_any(joined, DESTRUCTIVE_TERMS):
-        return "destructive"
-    if _contains_any(joined, SENSITIVE_TERMS):
-        return "sensitive"
-    if action.action in {"hotkey"} and "delete" in getattr(action.parameters, "keys", []):
-        return "destructive"
-    if action.action == "type":
-        text = action.parameters.text.lower()
-        if _contains_any(text, SENSITIVE_TERMS):
-            return "sensitive"
-    return "low"
+    rules = default_rule_source().current()
+    return risk_from_hits(action, rules.scan(" ".join([task, observation, reasoning])), rules)
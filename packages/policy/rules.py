@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Literal
+
+from packages.matching import Automaton, Match
+
+logger = logging.getLogger("policy.rules")
+
+RuleCategory = Literal["destructive", "sensitive", "block", "confirm"]
+CATEGORIES: tuple[RuleCategory, ...] = ("destructive", "sensitive", "block", "confirm")
+
+DESTRUCTIVE_TERMS = {
+    "delete",
+    "remove",
+    "wipe",
+    "format",
+    "uninstall",
+    "drop database",
+    "reset",
+}
+SENSITIVE_TERMS = {
+    "password",
+    "otp",
+    "api key",
+    "token",
+    "secret",
+    "credential",
+    "system settings",
+}
+BLOCK_TERMS = {"captcha", "bypass", "anti-bot", "unauthorized access"}
+CONFIRM_TERMS = {"delete", "overwrite", "system settings", "registry", "credentials"}
+
+BUILTIN_RULES: dict[RuleCategory, set[str]] = {
+    "destructive": DESTRUCTIVE_TERMS,
+    "sensitive": SENSITIVE_TERMS,
+    "block": BLOCK_TERMS,
+    "confirm": CONFIRM_TERMS,
+}
+
+
+class RuleHits:
+    """Every (category, term) found in one scan."""
+
+    __slots__ = ("matches", "categories")
+
+    def __init__(self, matches: Iterable[tuple[RuleCategory, str]] = ()) -> None:
+        self.matches = list(matches)
+        self.categories = frozenset(category for category, _ in self.matches)
+
+    def __contains__(self, category: object) -> bool:
+        return category in self.categories
+
+    def __or__(self, other: "RuleHits") -> "RuleHits":
+        return RuleHits([*self.matches, *other.matches])
+
+    def __repr__(self) -> str:
+        return f"RuleHits({self.matches!r})"
+
+    def terms(self, category: RuleCategory) -> list[str]:
+        return [term for hit, term in self.matches if hit == category]
+
+
+def load_rules(path: str | Path) -> list[tuple[RuleCategory, str]]:
+    """Read "<category> <phrase>" lines; blank lines and `#` comments are skipped."""
+    rules: list[tuple[RuleCategory, str]] = []
+    for line_no, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        category, _, phrase = line.partition(" ")
+        if category not in CATEGORIES or not phrase.strip():
+            raise ValueError(f"{path}:{line_no}: expected '<{'|'.join(CATEGORIES)}> <phrase>'")
+        rules.append((category, phrase.strip().lower()))
+    return rules
+
+
+class RuleSet:
+    """Policy terms compiled into one character-level Aho-Corasick automaton.
+
+    `scan` finds every term of every category in a single pass over the
+    lowercased text, as a substring match like the per-term `in` checks it
+    replaces.
+    """
+
+    def __init__(self, rules: Mapping[RuleCategory, Iterable[str]] | Iterable[tuple[RuleCategory, str]]) -> None:
+        if isinstance(rules, Mapping):
+            rules = [(category, term) for category, terms in rules.items() for term in sorted(terms)]
+        automaton: Automaton[str, tuple[RuleCategory, str]] = Automaton()
+        for category, term in rules:
+            term = term.lower()
+            if term:
+                automaton.add(term, (category, term))
+        self._automaton = automaton.build()
+
+    def __len__(self) -> int:
+        return len(self._automaton)
+
+    @classmethod
+    def from_files(cls, *paths: str | Path) -> "RuleSet":
+        """Built-in terms followed by the rule files, in order."""
+        builtin = [(category, term) for category, terms in BUILTIN_RULES.items() for term in sorted(terms)]
+        return cls([*builtin, *(rule for path in paths for rule in load_rules(path))])
+
+    @staticmethod
+    def _hits(matches: list[Match[tuple[RuleCategory, str]]]) -> RuleHits:
+        return RuleHits(dict.fromkeys(match.value for match in matches))
+
+    def scan(self, text: str) -> RuleHits:
+        return self._hits(self._automaton.feed(text.lower())[0])
+
+    def feed(self, text: str, state: int = 0) -> tuple[RuleHits, int]:
+        """Resumable `scan`; see `Automaton.feed`."""
+        matches, state = self._automaton.feed(text.lower(), state)
+        return self._hits(matches), state
+
+
+class RuleSource:
+    """A `RuleSet` built from rule files and rebuilt when any of them changes.
+
+    File modification times are checked at most every `check_interval` seconds;
+    if a changed file fails to parse, the previous rules stay in force.
+    """
+
+    def __init__(self, paths: Iterable[str | Path] = (), check_interval: float = 2.0) -> None:
+        self.paths = [Path(path) for path in paths]
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamp = self._mtimes()
+        self._checked = time.monotonic()
+        self._rules = RuleSet.from_files(*self.paths)
+        self.reloads = 0
+
+    def _mtimes(self) -> tuple[int | None, ...]:
+        stamps: list[int | None] = []
+        for path in self.paths:
+            try:
+                stamps.append(path.stat().st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def current(self) -> RuleSet:
+        if not self.paths or time.monotonic() - self._checked < self.check_interval:
+            return self._rules
+        with self._lock:
+            if time.monotonic() - self._checked < self.check_interval:
+                return self._rules
+            self._checked = time.monotonic()
+            stamp = self._mtimes()
+            if stamp != self._stamp:
+                self._stamp = stamp
+                try:
+                    self._rules = RuleSet.from_files(*self.paths)
+                    self.reloads += 1
+                    logger.info("reloaded %d policy rules", len(self._rules))
+                except (OSError, ValueError) as exc:
+                    logger.warning("keeping previous policy rules: %s", exc)
+        return self._rules
+
+
+@functools.cache
+def default_rule_source() -> RuleSource:
+    """Built-in terms plus the rule files in `DESKTOP_AGENT_POLICY_RULES` (os.pathsep-separated)."""
+    paths = [path for path in os.getenv("DESKTOP_AGENT_POLICY_RULES", "").split(os.pathsep) if path.strip()]
+    return RuleSource(paths)
@@ -1,5 +1,11 @@
 from __future__ import annotations
 
+import base64
+
+import httpx
+import pytest
+
+from apps.executor.adapters import ScreenAdapter
 from apps.executor.runner import run_session
 from apps.executor.state import SessionRuntimeState
 from packages.contracts.models import Constraints, TurnResponse
@@ -17,13 +23,8 @@ class FakeClient:
         return TurnResponse.model_validate(payload)
 
 
-def _mock_capture():
-    class Screen:
-        image_base64 = SAMPLE_PNG_BASE64
-        width = 1920
-        height = 1080
-
-    return Screen()
+def _mock_capture(_profile=None):
+    return ScreenAdapter(image_bytes=base64.b64decode(SAMPLE_PNG_BASE64), width=1920, height=1080)
 
 
 def test_retry_then_fail_when_wait_repeats(monkeypatch) -> None:
@@ -74,3 +75,93 @@ def test_confirmation_path_pauses(monkeypatch) -> None:
     state = SessionRuntimeState(session_id="sess2", task="delete file")
     new_state = run_session(client=client, state=state, constraints=Constraints(max_steps=10), dry_run=True)
     assert new_state.pending_confirmation_id == "c1"
+
+
+class RecordingSettle:
+    def __init__(self) -> None:
+        self.calls: list[tuple[float | None, bool]] = []
+
+    def wait(self, timeout_seconds: float | None = None, require_change: bool = False) -> bool:
+        self.calls.append((timeout_seconds, require_change))
+        return True
+
+
+def test_settle_replaces_fixed_sleeps(monkeypatch) -> None:
+    monkeypatch.setattr("apps.executor.runner.capture_screen", _mock_capture)
+    monkeypatch.setattr("apps.executor.runner.get_active_window_info", lambda: None)
+    monkeypatch.setattr("apps.executor.runner.save_session_state", lambda _state: None)
+    responses = [
+        {
+            "observation": "form",
+            "reasoning": "click",
+            "action": {"action": "click", "parameters": {"x": 10, "y": 10}},
+            "risk": "low",
+            "confidence": 0.9,
+            "expected_outcome": "clicked",
+            "trace_id": "t1",
+        },
+        {
+            "observation": "loading",
+            "reasoning": "wait",
+            "action": {"action": "wait", "parameters": {"seconds": 5}},
+            "risk": "low",
+            "confidence": 0.9,
+            "expected_outcome": "loaded",
+            "trace_id": "t2",
+        },
+        {
+            "observation": "loaded",
+            "reasoning": "finished",
+            "action": {"action": "done", "parameters": {"summary": "ok"}},
+            "risk": "low",
+            "confidence": 0.9,
+            "expected_outcome": "done",
+            "trace_id": "t3",
+        },
+    ]
+    settle = RecordingSettle()
+    state = SessionRuntimeState(session_id="sess3", task="fill form")
+    new_state = run_session(
+        client=FakeClient(responses),
+        state=state,
+        constraints=Constraints(max_steps=10),
+        dry_run=True,
+        settle=settle,
+    )
+    # The dry-run wait is not performed; only the click's post-action settle polls.
+    assert settle.calls == [(None, False)]
+    assert new_state.step_index == 3
+
+
+class ConflictClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def turn(self, req):
+        self.calls += 1
+        response = httpx.Response(409, request=httpx.Request("POST", "http://planner/v1/turn"))
+        raise httpx.HTTPStatusError("base frame missing", request=response.request, response=response)
+
+
+class CountingCapture:
+    resets = 0
+
+    def __init__(self, profile=None) -> None:
+        pass
+
+    def reset(self) -> None:
+        CountingCapture.resets += 1
+
+    def capture(self) -> ScreenAdapter:
+        return _mock_capture()
+
+
+def test_repeated_conflict_resends_one_full_frame_then_raises(monkeypatch) -> None:
+    monkeypatch.setattr("apps.executor.runner.DeltaScreenCapture", CountingCapture)
+    monkeypatch.setattr("apps.executor.runner.get_active_window_info", lambda: None)
+    client = ConflictClient()
+    state = SessionRuntimeState(session_id="sess4", task="open app")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_session(client=client, state=state, constraints=Constraints(max_steps=10), capture_mode="delta")
+    assert (client.calls, CountingCapture.resets) == (2, 1)
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import base64
+from io import BytesIO
+
+import pytest
 from fastapi.testclient import TestClient
+from PIL import Image
 
+from apps.executor.client import PlannerApiClient
 from apps.planner_api.main import create_app
+from apps.planner_api.service import PlannerService
 from apps.planner_api.providers.base import PlannerProvider, ProviderInput, ProviderOutput
-from apps.planner_api.session_store import SessionStore
+from apps.planner_api.session_sqlite import SqliteSessionStore
+from apps.planner_api.session_store import SessionLimits, SessionStore
+from packages.contracts.models import StartSessionRequest, TurnRequest
+from packages.contracts.wire import TURN_FRAME_CONTENT_TYPE, encode_turn_frame
+from packages.perception import PerceptionCache
 from packages.perception.ocr import OCRToken
 from packages.perception.pipeline import PerceptionSnapshot
 from tests.fixtures.sample_data import SAMPLE_PNG_BASE64
@@ -21,6 +32,21 @@ class MockProvider(PlannerProvider):
         )
 
 
+class AsyncMockProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
+        self.calls += 1
+        return ProviderOutput(
+            observation="Async observation",
+            reasoning="Async reasoning",
+            action={"action": "move", "parameters": {"x": 5, "y": 6}},
+            confidence=0.9,
+            expected_outcome="pointer moved",
+        )
+
+
 def _new_client() -> TestClient:
     app = create_app(provider=MockProvider(), session_store=SessionStore())
     return TestClient(app)
@@ -72,12 +98,35 @@ def test_confirmation_required_then_confirmed() -> None:
     assert second["confirmation_required"] is False
 
 
+def test_sqlite_sessions_are_shared_between_workers(tmp_path) -> None:
+    path = tmp_path / "sessions.db"
+    worker_a = TestClient(create_app(provider=MockProvider(), session_store=SqliteSessionStore(path)))
+    worker_b = TestClient(create_app(provider=MockProvider(), session_store=SqliteSessionStore(path)))
+    session_id = worker_a.post("/v1/session/start", json={"task": "delete a file"}).json()["session_id"]
+    turn_payload = {
+        "session_id": session_id,
+        "task": "delete a file",
+        "screen": {"image_base64": SAMPLE_PNG_BASE64, "width": 1920, "height": 1080},
+        "context": {"step_index": 0},
+    }
+
+    first = worker_b.post("/v1/turn", json=turn_payload).json()
+    assert first["confirmation_required"] is True
+    confirm = worker_a.post(
+        f"/v1/session/{session_id}/confirm",
+        json={"confirmation_id": first["confirmation_id"], "approved": True},
+    )
+    assert confirm.json()["status"] == "approved"
+
+    assert worker_b.post("/v1/turn", json=turn_payload).json()["confirmation_required"] is False
+
+
 def test_captcha_detection_yields_fail(monkeypatch) -> None:
     client = _new_client()
     start = client.post("/v1/session/start", json={"task": "open website"})
     session_id = start.json()["session_id"]
 
-    def fake_analyze(_screen):
+    def fake_analyze(_screen, **_kwargs):
         return PerceptionSnapshot(
             tokens=[OCRToken(text="CAPTCHA", bbox=(0, 0, 10, 10), confidence=0.99)],
             candidates=[],
@@ -96,3 +145,282 @@ def test_captcha_detection_yields_fail(monkeypatch) -> None:
     assert resp.status_code == 200
     body = resp.json()
     assert body["action"]["action"] == "fail"
+
+
+def _png_base64(image: Image.Image) -> str:
+    buf = BytesIO()
+    image.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def test_delta_turn_rebuilds_frame_from_session_cache(monkeypatch) -> None:
+    client = _new_client()
+    session_id = client.post("/v1/session/start", json={"task": "open browser"}).json()["session_id"]
+    seen = []
+
+    def fake_analyze(_screen, frame=None, **_kwargs):
+        seen.append(frame.image)
+        return PerceptionSnapshot(tokens=[], candidates=[])
+
+    monkeypatch.setattr("apps.planner_api.service.analyze_screen", fake_analyze)
+    base = Image.new("RGB", (64, 32), "white")
+    full = client.post(
+        "/v1/turn",
+        json={
+            "session_id": session_id,
+            "task": "open browser",
+            "screen": {"image_base64": _png_base64(base), "width": 64, "height": 32, "frame_id": "f1"},
+            "context": {"step_index": 0},
+        },
+    )
+    assert full.status_code == 200
+
+    tile = Image.new("RGB", (16, 16), "black")
+    delta_payload = {
+        "session_id": session_id,
+        "task": "open browser",
+        "screen": {
+            "width": 64,
+            "height": 32,
+            "mode": "delta",
+            "frame_id": "f2",
+            "base_frame_id": "f1",
+            "tiles": [{"x": 16, "y": 16, "width": 16, "height": 16, "image_base64": _png_base64(tile)}],
+        },
+        "context": {"step_index": 1},
+    }
+    delta = client.post("/v1/turn", json=delta_payload)
+    assert delta.status_code == 200
+    rebuilt = seen[-1]
+    assert rebuilt.getpixel((20, 20)) == (0, 0, 0)
+    assert rebuilt.getpixel((0, 0)) == (255, 255, 255)
+
+    stale = client.post("/v1/turn", json={**delta_payload, "screen": {**delta_payload["screen"], "base_frame_id": "f1"}})
+    assert stale.status_code == 409
+
+
+def test_binary_turn_endpoint_accepts_raw_image_part() -> None:
+    client = _new_client()
+    session_id = client.post("/v1/session/start", json={"task": "open browser"}).json()["session_id"]
+    req = TurnRequest.model_validate(
+        {
+            "session_id": session_id,
+            "task": "open browser",
+            "screen": {"image_bytes": base64.b64decode(SAMPLE_PNG_BASE64), "width": 1920, "height": 1080},
+            "context": {"step_index": 0},
+        }
+    )
+    resp = client.post(
+        "/v1/turn/binary",
+        content=b"".join(encode_turn_frame(req)),
+        headers={"Content-Type": TURN_FRAME_CONTENT_TYPE},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["action"]["action"] == "click"
+
+    bad = client.post("/v1/turn/binary", content=b"\x00\x00", headers={"Content-Type": TURN_FRAME_CONTENT_TYPE})
+    assert bad.status_code == 400
+
+
+def test_async_provider_is_awaited_by_turn_endpoint() -> None:
+    provider = AsyncMockProvider()
+    with TestClient(create_app(provider=provider, session_store=SessionStore())) as client:
+        session_id = client.post("/v1/session/start", json={"task": "move pointer"}).json()["session_id"]
+        resp = client.post(
+            "/v1/turn",
+            json={
+                "session_id": session_id,
+                "task": "move pointer",
+                "screen": {"image_base64": SAMPLE_PNG_BASE64, "width": 100, "height": 100},
+                "context": {"step_index": 0},
+            },
+        )
+    assert resp.status_code == 200
+    assert resp.json()["action"] == {"action": "move", "parameters": {"x": 5, "y": 6}}
+    assert provider.calls == 1
+
+
+def test_identical_screens_reuse_cached_perception(monkeypatch) -> None:
+    calls = []
+
+    def fake_analyze(_screen, **_kwargs):
+        calls.append(1)
+        return PerceptionSnapshot(tokens=[], candidates=[])
+
+    monkeypatch.setattr("apps.planner_api.service.analyze_screen", fake_analyze)
+    monkeypatch.setattr("apps.planner_api.main._perception_cache_from_env", lambda: PerceptionCache())
+    client = _new_client()
+    session_id = client.post("/v1/session/start", json={"task": "open browser"}).json()["session_id"]
+    payload = {
+        "session_id": session_id,
+        "task": "open browser",
+        "screen": {"image_base64": SAMPLE_PNG_BASE64, "width": 1920, "height": 1080},
+        "context": {"step_index": 1},
+    }
+    assert client.post("/v1/turn", json=payload).status_code == 200
+    assert client.post("/v1/turn", json=payload).status_code == 200
+    assert len(calls) == 1
+    assert client.get("/v1/stats").json()["perception_cache"]["hits"] == 1
+
+
+def test_evicted_session_drops_its_cached_perception() -> None:
+    store = SessionStore(limits=SessionLimits(max_sessions=1))
+    cache = PerceptionCache()
+    service = PlannerService(provider=MockProvider(), session_store=store, perception_cache=cache)
+    first = service.start_session(StartSessionRequest(task="first")).session_id
+    cache.put("d1", PerceptionSnapshot(tokens=[], candidates=[]), namespace=first)
+    service.start_session(StartSessionRequest(task="second"))
+
+    assert store.sweep() == [first]
+    assert cache.get("d1", namespace=first) is None
+
+def test_incremental_ocr_passes_previous_frame_and_delta_tiles(monkeypatch) -> None:
+    seen = []
+
+    def fake_analyze(_screen, prior=None, dirty=None, **_kwargs):
+        seen.append((prior, dirty))
+        return PerceptionSnapshot(tokens=[OCRToken(text="File", bbox=(0, 0, 10, 8), confidence=0.9)], candidates=[])
+
+    monkeypatch.setattr("apps.planner_api.service.analyze_screen", fake_analyze)
+    monkeypatch.setenv("DESKTOP_AGENT_INCREMENTAL_OCR", "1")
+    monkeypatch.setenv("DESKTOP_AGENT_PERCEPTION_CACHE_MB", "0")
+    client = _new_client()
+    session_id = client.post("/v1/session/start", json={"task": "open browser"}).json()["session_id"]
+    frame = _png_base64(Image.new("RGB", (64, 32), "white"))
+    full = {
+        "session_id": session_id,
+        "task": "open browser",
+        "screen": {"image_base64": frame, "width": 64, "height": 32},
+        "context": {"step_index": 0},
+    }
+    assert client.post("/v1/turn", json=full).status_code == 200
+    assert client.post("/v1/turn", json={**full, "screen": {**full["screen"], "frame_id": "f1"}}).status_code == 200
+    tile = _png_base64(Image.new("RGB", (16, 16), "black"))
+    delta_screen = {
+        "width": 64,
+        "height": 32,
+        "mode": "delta",
+        "frame_id": "f2",
+        "base_frame_id": "f1",
+        "tiles": [{"x": 16, "y": 16, "width": 16, "height": 16, "image_base64": tile}],
+    }
+    assert client.post("/v1/turn", json={**full, "screen": delta_screen}).status_code == 200
+
+    assert seen[0] == (None, None)
+    prior, dirty = seen[1]
+    assert [t.text for t in prior.tokens] == ["File"] and dirty is None
+    prior, dirty = seen[2]
+    assert prior.image.size == (64, 32) and dirty == [(16, 16, 32, 32)]
+
+
+def test_perception_level_skips_unneeded_stages(monkeypatch) -> None:
+    levels = []
+
+    def fake_analyze(_screen, level="full", timings=None, **_kwargs):
+        levels.append(level)
+        timings["ocr"] = 0.01
+        return PerceptionSnapshot(tokens=[OCRToken(text="captcha", bbox=(0, 0, 5, 5), confidence=0.9)])
+
+    monkeypatch.setattr("apps.planner_api.service.analyze_screen", fake_analyze)
+    client = _new_client()
+    payload = {
+        "task": "open browser",
+        "screen": {"image_base64": SAMPLE_PNG_BASE64, "width": 1920, "height": 1080},
+        "context": {"step_index": 0},
+    }
+    blind = client.post(
+        "/v1/session/start", json={"task": "open browser", "constraints": {"perception_level": "none"}}
+    ).json()["session_id"]
+    lookups = []
+    get = SessionStore.get
+
+    def counting_get(self, session_id):
+        lookups.append(session_id)
+        return get(self, session_id)
+
+    monkeypatch.setattr(SessionStore, "get", counting_get)
+    resp = client.post("/v1/turn", json={**payload, "session_id": blind})
+    assert resp.json()["action"]["action"] == "click"
+    assert len(lookups) == 1
+    # Turn constraints without a level, as `executor run` sends by default, keep the session's.
+    resp = client.post("/v1/turn", json={**payload, "session_id": blind, "constraints": {"max_steps": 10}})
+    assert resp.json()["action"]["action"] == "click"
+    assert levels == []
+
+    screened = client.post("/v1/session/start", json={"task": "open browser"}).json()["session_id"]
+    resp = client.post(
+        "/v1/turn",
+        json={**payload, "session_id": screened, "constraints": {"perception_level": "captcha-only"}},
+    )
+    assert resp.json()["action"]["action"] == "fail"
+    assert levels == ["captcha-only"]
+    stages = client.get("/v1/stats").json()["perception_stages"]
+    assert stages["ocr"]["calls"] == 1 and stages["captcha_scan"]["calls"] == 1
+
+
+def test_msgpack_bodies_round_trip_through_executor_client(monkeypatch) -> None:
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(
+        "apps.planner_api.service.analyze_screen", lambda _screen, **_kwargs: PerceptionSnapshot(tokens=[], candidates=[])
+    )
+    server = _new_client()
+    with PlannerApiClient("http://testserver", transport=server._transport, wire_codec="msgpack") as client:
+        session = client.start_session(StartSessionRequest(task="open browser"))
+        response = client.turn(
+            TurnRequest(
+                session_id=session.session_id,
+                task="open browser",
+                screen={"image_base64": SAMPLE_PNG_BASE64, "width": 1920, "height": 1080},
+                context={"step_index": 1},
+            )
+        )
+    assert response.action.action == "click"
+
+    raw = server.post(
+        "/v1/session/start",
+        content=msgpack.packb({"task": "open editor"}),
+        headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack;q=0.9, application/json;q=0.5"},
+    )
+    assert raw.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(raw.content)["session_id"]
+    assert server.post("/v1/session/start", content=b"task", headers={"Content-Type": "text/plain"}).status_code == 415
+
+
+def test_loop_guard_stops_repeated_action_on_unchanged_screen() -> None:
+    class RecordingProvider(MockProvider):
+        def __init__(self) -> None:
+            self.inputs: list[ProviderInput] = []
+
+        def plan_next_action(self, payload: ProviderInput) -> ProviderOutput:
+            self.inputs.append(payload)
+            return super().plan_next_action(payload)
+
+    provider = RecordingProvider()
+    service = PlannerService(provider=provider, session_store=SessionStore(), loop_guard=2)
+    session_id = service.start_session(StartSessionRequest(task="open browser")).session_id
+
+    def _turn(step_index: int, last_status: str | None = None):
+        context = {"step_index": step_index}
+        if last_status:
+            context["last_result"] = {"status": last_status, "message": "done"}
+        return service.turn(
+            TurnRequest.model_validate(
+                {
+                    "session_id": session_id,
+                    "task": "open browser",
+                    "screen": {"image_base64": SAMPLE_PNG_BASE64, "width": 1920, "height": 1080},
+                    "context": context,
+                }
+            )
+        )
+
+    assert _turn(0).action.action == "click"
+    assert _turn(1, "executed").action.action == "click"
+    stopped = _turn(2, "executed")
+    service.close()
+
+    assert stopped.action.action == "fail"
+    assert len(provider.inputs) == 2
+    steps = provider.inputs[1].recent_steps
+    assert [(step.action, step.outcome) for step in steps] == [("click", "executed")]
+    assert steps[0].to_dict(provider.inputs[1].screen_digest)["same_screen"] is True
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+
+from packages.perception.columns import TokenColumns, top_k_indices
+from packages.perception.grounding import ground_columns
+from packages.perception.ocr import OCRToken
+from packages.perception.pipeline import PerceptionSnapshot
+
+
+def test_top_k_matches_stable_sort_prefix_with_ties() -> None:
+    rng = random.Random(11)
+    scores = np.array([rng.choice([0.2, 0.5, 0.6, 0.9]) for _ in range(300)])
+    full = np.argsort(-scores, kind="stable")
+    for k in (0, 1, 7, 150, 300, 500):
+        assert top_k_indices(scores, k).tolist() == full[:k].tolist()
+
+
+def test_columnar_snapshot_materialises_views_lazily() -> None:
+    tokens = [
+        OCRToken(text="Sign", bbox=(0, 0, 40, 16), confidence=0.4),
+        OCRToken(text="in", bbox=(45, 0, 60, 16), confidence=0.8),
+        OCRToken(text="notes", bbox=(0, 50, 50, 66), confidence=0.95),
+    ]
+    columns = TokenColumns.from_tokens(tokens)
+    snapshot = PerceptionSnapshot(token_columns=columns, candidate_columns=ground_columns(columns))
+
+    assert snapshot.token_texts == ["Sign", "in", "notes"]
+    top = snapshot.top_candidates(2)
+    assert [(c.text, c.kind, c.center) for c in top] == [("notes", "text", (25, 58)), ("in", "text", (52, 8))]
+    assert [c.text for c in snapshot.candidates] == ["notes", "in", "Sign in", "Sign"]
+    assert snapshot.tokens == tokens
+
+
+def test_list_backed_snapshot_still_constructible() -> None:
+    snapshot = PerceptionSnapshot(tokens=[OCRToken(text="OK", bbox=(1, 2, 3, 4), confidence=1.0)], candidates=[])
+    assert snapshot.token_texts == ["OK"]
+    assert snapshot.token_columns.bboxes.tolist() == [[1, 2, 3, 4]]
+    assert snapshot.top_candidates(5) == []
+
+
+def test_snapshots_compare_by_content_whatever_their_form() -> None:
+    tokens = [OCRToken(text="OK", bbox=(1, 2, 30, 16), confidence=0.9)]
+    columns = TokenColumns.from_tokens(tokens)
+    columnar = PerceptionSnapshot(token_columns=columns, candidate_columns=ground_columns(columns))
+    listed = PerceptionSnapshot(tokens=list(tokens), candidates=list(columnar.candidates))
+
+    assert columnar == listed
+    assert columnar != PerceptionSnapshot(tokens=tokens, candidates=[])
+    assert repr(listed).startswith("PerceptionSnapshot(tokens=[OCRToken(text='OK'")
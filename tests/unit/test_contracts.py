@@ -3,8 +3,9 @@ from __future__ import annotations
 import pytest
 from pydantic import TypeAdapter, ValidationError
 
-from packages.contracts.models import DesktopAction
-from packages.contracts.normalization import normalize_action
+from apps.executor.adapters.input import DesktopInputExecutor
+from packages.contracts.models import DesktopAction, parse_action
+from packages.contracts.normalization import normalize_action, scale_action_coordinates
 
 
 def test_rejects_unsupported_speak_action() -> None:
@@ -22,3 +23,20 @@ def test_coordinate_normalization_clamps_to_screen() -> None:
 def test_hotkey_validation_rejects_unknown_key() -> None:
     with pytest.raises(ValueError):
         normalize_action({"action": "hotkey", "parameters": {"keys": ["ctrl", "weirdkey"]}}, width=100, height=100)
+
+
+def test_drag_scaling_leaves_capture_space_action_untouched() -> None:
+    action = normalize_action({"action": "drag", "parameters": {"from": [10, 20], "to": [100, 50]}}, width=200, height=100)
+    scaled = scale_action_coordinates(action, (200, 100), (400, 200))
+    assert scaled.parameters.from_ == (20, 40)
+    assert scaled.parameters.to == (200, 100)
+    assert action.parameters.to == (100, 50)
+
+
+def test_parse_action_passes_typed_actions_through() -> None:
+    action = parse_action({"action": "click", "parameters": {"x": 3, "y": 4}})
+
+    assert parse_action(action) is action
+    assert DesktopInputExecutor(dry_run=True).execute(action) == "dry-run:click"
+    with pytest.raises(ValidationError):
+        parse_action({"action": "click", "parameters": {"x": "left"}})
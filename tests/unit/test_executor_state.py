@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from apps.executor.state import SessionRuntimeState, StateJournal
+
+
+def _state(session_id: str, step_index: int = 0) -> dict:
+    return SessionRuntimeState(session_id=session_id, task="task", step_index=step_index).to_dict()
+
+
+def test_journal_appends_and_replays_last_record_per_session(tmp_path) -> None:
+    path = tmp_path / "state.jsonl"
+    journal = StateJournal(path, legacy_path=None, durable=False)
+    for step in range(3):
+        journal.put("a", _state("a", step))
+    journal.put("b", _state("b"))
+    assert journal.delete("b") is True
+    assert journal.delete("b") is False
+
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 5
+    reopened = StateJournal(path, legacy_path=None, durable=False)
+    assert reopened.get("a")["step_index"] == 2
+    assert reopened.get("b") is None
+
+
+def test_torn_tail_is_skipped_and_not_merged_into_next_record(tmp_path) -> None:
+    path = tmp_path / "state.jsonl"
+    StateJournal(path, legacy_path=None, durable=False).put("a", _state("a", 1))
+    with path.open("ab") as fh:
+        fh.write(b'{"op":"put","session_id":"a","state":{"session_id"')
+
+    journal = StateJournal(path, legacy_path=None, durable=False)
+    assert journal.get("a")["step_index"] == 1
+    journal.put("b", _state("b"))
+    assert StateJournal(path, legacy_path=None, durable=False).get("b") is not None
+
+
+def test_compaction_keeps_one_line_per_live_session(tmp_path) -> None:
+    path = tmp_path / "state.jsonl"
+    journal = StateJournal(path, legacy_path=None, compact_min=10, compact_ratio=2, durable=False)
+    for step in range(10):
+        journal.put("a", _state("a", step))
+        journal.put("b", _state("b", step))
+
+    assert len(path.read_text(encoding="utf-8").splitlines()) <= 10
+    reopened = StateJournal(path, legacy_path=None, durable=False)
+    assert (reopened.get("a")["step_index"], reopened.get("b")["step_index"]) == (9, 9)
+
+
+def test_legacy_state_file_is_imported_once(tmp_path) -> None:
+    legacy = tmp_path / "state.json"
+    legacy.write_text(json.dumps({"old": _state("old", 4)}), encoding="utf-8")
+    path = tmp_path / "state.jsonl"
+
+    journal = StateJournal(path, legacy_path=legacy, durable=False)
+    assert journal.get("old")["step_index"] == 4
+    assert journal.delete("old") is True
+    assert StateJournal(path, legacy_path=legacy, durable=False).get("old") is None
+
+
+def test_journals_sharing_a_file_lose_no_records_across_compactions(tmp_path) -> None:
+    path = tmp_path / "state.jsonl"
+    journals = [StateJournal(path, legacy_path=None, compact_min=8, compact_ratio=1.5, durable=False) for _ in range(2)]
+
+    def write(worker: int) -> None:
+        for step in range(100):
+            journals[worker].put(f"{worker}-{step % 20}", _state(f"{worker}-{step % 20}", step))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(write, range(2)))
+
+    reopened = StateJournal(path, legacy_path=None, durable=False)
+    for worker in range(2):
+        assert [reopened.get(f"{worker}-{i}")["step_index"] for i in range(20)] == list(range(80, 100))
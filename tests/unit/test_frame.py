@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from packages.contracts.models import ScreenCapture
+from packages.perception import Frame
+
+
+def _png(image: Image.Image) -> bytes:
+    buf = BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_frame_decodes_lazily_and_reuses_arrival_payload() -> None:
+    text = base64.b64encode(_png(Image.new("RGB", (40, 20), "red"))).decode("ascii")
+    frame = Frame.from_screen(ScreenCapture(image_base64=text, width=40, height=20))
+
+    assert not frame.decoded
+    assert frame.base64 is text
+    assert bytes(frame.view()) == base64.b64decode(text)
+    assert not frame.decoded
+
+    image = frame.image
+    assert frame.decoded
+    assert frame.image is image
+    assert image.getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_frame_from_image_encodes_png_once() -> None:
+    frame = Frame(image=Image.new("RGB", (8, 8), "blue"))
+
+    data = frame.data
+    assert frame.data is data
+    assert Image.open(BytesIO(data)).format == "PNG"
+    assert base64.b64decode(frame.base64) == data
+
+
+def test_downscaled_variants_are_cached_per_size() -> None:
+    frame = Frame(image=Image.new("RGB", (400, 200), "white"))
+
+    small = frame.downscaled(100)
+    assert small.size == (100, 50)
+    assert frame.downscaled(100) is small
+    assert frame.downscaled(1000) is frame.image
+
+
+def test_frame_requires_a_payload() -> None:
+    with pytest.raises(ValueError):
+        Frame()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from packages.perception.grounding import TermMatcher, cluster_lines, generate_ui_candidates
+from packages.perception.ocr import OCRToken
+
+
+def _token(text: str, x: int, y: int, width: int = 40, conf: float = 0.9) -> OCRToken:
+    return OCRToken(text=text, bbox=(x, y, x + width, y + 16), confidence=conf)
+
+
+def test_cluster_lines_splits_rows_and_wide_gaps() -> None:
+    tokens = [_token("in", 50, 101), _token("Sign", 0, 100), _token("Help", 400, 100), _token("Next", 0, 200)]
+    runs = [[t.text for t in run] for run in cluster_lines(tokens)]
+    assert runs == [["Sign", "in"], ["Help"], ["Next"]]
+
+
+def test_phrase_candidates_from_default_vocabulary() -> None:
+    tokens = [_token("Sign", 0, 100, conf=0.4), _token("in", 50, 101), _token("Email:", 0, 200), _token("OK", 300, 300)]
+    candidates = generate_ui_candidates(tokens, 1920, 1080)
+    by_text = {c.text: c for c in candidates}
+
+    assert by_text["Sign in"].kind == "button"
+    assert by_text["Sign in"].bbox == (0, 100, 90, 117)
+    assert by_text["Sign in"].score == 0.6
+    assert by_text["Email:"].kind == "input"
+    assert by_text["OK"].kind == "button"
+    assert by_text["Sign"].kind == "text"
+
+
+def test_vocabulary_file_extends_terms(tmp_path) -> None:
+    vocab = tmp_path / "app.txt"
+    vocab.write_text("# app terms\nbutton run pipeline\ninput commit message\n", encoding="utf-8")
+    matcher = TermMatcher.from_files(vocab)
+    tokens = [_token("Run", 0, 0), _token("pipeline", 45, 0), _token("Save", 0, 50)]
+    kinds = {c.text: c.kind for c in generate_ui_candidates(tokens, 100, 100, matcher=matcher)}
+    assert kinds["Run pipeline"] == "button"
+    assert kinds["Save"] == "button"
+
+
+def test_trailing_colon_labels_stay_inputs() -> None:
+    tokens = [_token("Save:", 0, 0), _token("Name:", 0, 50), _token("Save", 0, 100)]
+    kinds = {c.text: c.kind for c in generate_ui_candidates(tokens, 100, 200)}
+    assert kinds == {"Save:": "input", "Name:": "input", "Save": "button"}
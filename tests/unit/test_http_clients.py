@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import httpx
+
+from apps.executor.client import PlannerApiClient
+from apps.planner_api.providers.base import ProviderInput
+from apps.planner_api.providers.cloud_vlm import CloudVLMProvider
+from packages.contracts.models import ConfirmRequest
+from packages.perception.frame import Frame
+
+
+def _payload() -> ProviderInput:
+    return ProviderInput(
+        task="open browser",
+        step_index=1,
+        width=100,
+        height=100,
+        active_window=None,
+        ocr_text=[],
+        candidate_text=[],
+        frame=Frame(base64_text="abc"),
+        last_result_message=None,
+    )
+
+
+def test_provider_reuses_one_pooled_client(monkeypatch) -> None:
+    monkeypatch.setenv("DESKTOP_AGENT_VLM_URL", "https://vlm.example/plan")
+    monkeypatch.setenv("DESKTOP_AGENT_VLM_API_KEY", "k")
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        body = {
+            "observation": "o",
+            "reasoning": "r",
+            "action": {"action": "wait", "parameters": {"seconds": 1}},
+        }
+        return httpx.Response(200, json=body)
+
+    provider = CloudVLMProvider(transport=httpx.MockTransport(handler))
+    provider.plan_next_action(_payload())
+    client = provider._client
+    provider.plan_next_action(_payload())
+    assert provider._client is client
+    assert [r.headers["Authorization"] for r in seen] == ["Bearer k", "Bearer k"]
+
+    provider.close()
+    assert provider._client is None
+
+
+def test_planner_api_client_uses_base_url_and_closes() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v1/session/s1/confirm"
+        return httpx.Response(200, json={"session_id": "s1", "confirmation_id": "c1", "status": "approved"})
+
+    with PlannerApiClient("http://planner/", transport=httpx.MockTransport(handler)) as client:
+        result = client.confirm("s1", ConfirmRequest(confirmation_id="c1"))
+    assert result.status == "approved"
+    assert client._client.is_closed
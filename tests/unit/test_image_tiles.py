@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from PIL import Image
+
+from packages.perception.image_utils import apply_tiles, diff_tiles
+
+
+def test_diff_tiles_reports_only_changed_tiles() -> None:
+    previous = Image.new("RGB", (300, 200), "white")
+    current = previous.copy()
+    current.putpixel((130, 10), (0, 0, 0))
+    current.putpixel((260, 150), (0, 0, 0))
+
+    boxes = diff_tiles(previous, current, tile_size=128)
+    assert boxes == [(128, 0, 256, 128), (256, 128, 300, 200)]
+
+
+def test_diff_tiles_identical_frames_are_clean() -> None:
+    frame = Image.new("RGB", (64, 64), "white")
+    assert diff_tiles(frame, frame.copy(), tile_size=16) == []
+
+
+def test_apply_tiles_rebuilds_current_frame() -> None:
+    previous = Image.new("RGB", (256, 256), "white")
+    current = previous.copy()
+    for x in range(0, 256, 3):
+        current.putpixel((x, 40), (255, 0, 0))
+
+    boxes = diff_tiles(previous, current, tile_size=32)
+    rebuilt = apply_tiles(previous, ((x1, y1, current.crop((x1, y1, x2, y2))) for x1, y1, x2, y2 in boxes))
+    assert rebuilt.tobytes() == current.tobytes()
+    assert previous.getpixel((0, 40)) == (255, 255, 255)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from PIL import Image
+
+from packages.perception import incremental
+from packages.perception.incremental import PriorFrame, extract_ocr_tokens_incremental, ocr_regions
+from packages.perception.ocr import OCRToken
+
+
+def _token(text: str, bbox: tuple[int, int, int, int]) -> OCRToken:
+    return OCRToken(text=text, bbox=bbox, confidence=0.9)
+
+
+def test_ocr_regions_grow_to_cover_intersecting_words() -> None:
+    tokens = [_token("Hello", (10, 10, 60, 30)), _token("World", (300, 300, 360, 320))]
+    regions = ocr_regions([(50, 0, 100, 40)], tokens, (400, 400), padding=4)
+    assert regions == [(10, 0, 104, 44)]
+
+
+def test_incremental_ocr_reads_only_changed_region(monkeypatch) -> None:
+    previous = Image.new("RGB", (400, 400), "white")
+    current = previous.copy()
+    current.putpixel((40, 20), (0, 0, 0))
+    prior = PriorFrame(image=previous, tokens=[_token("Hello", (10, 10, 60, 30)), _token("World", (300, 300, 360, 320))])
+
+    crops: list[tuple[int, int]] = []
+
+    def fake_ocr(image: Image.Image) -> list[OCRToken]:
+        crops.append(image.size)
+        return [_token("Hullo", (2, 3, 40, 20))]
+
+    monkeypatch.setattr(incremental, "extract_ocr_tokens", fake_ocr)
+    monkeypatch.setattr(incremental, "extract_ocr_tokens_batch", lambda images: [fake_ocr(image) for image in images])
+    tokens = extract_ocr_tokens_incremental(current, prior, tile_size=32, padding=0)
+
+    assert len(crops) == 1
+    assert crops[0][0] * crops[0][1] < 400 * 400
+    assert [t.text for t in tokens] == ["Hullo", "World"]
+    assert tokens[0].bbox == (12, 3, 50, 20)
+    assert tokens[1] is prior.tokens[1]
+
+
+def test_incremental_ocr_uses_given_dirty_boxes_and_falls_back(monkeypatch) -> None:
+    frame = Image.new("RGB", (200, 200), "white")
+    prior = PriorFrame(image=frame, tokens=[_token("Save", (150, 150, 190, 170))])
+    calls: list[tuple[int, int]] = []
+
+    def fake_ocr(image: Image.Image) -> list[OCRToken]:
+        calls.append(image.size)
+        return []
+
+    monkeypatch.setattr(incremental, "extract_ocr_tokens", fake_ocr)
+    monkeypatch.setattr(incremental, "extract_ocr_tokens_batch", lambda images: [fake_ocr(image) for image in images])
+
+    assert extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[]) == prior.tokens
+    assert calls == []
+
+    extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[(100, 100, 120, 140)], padding=0)
+    assert calls == [(20, 40)]
+
+    extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[(0, 0, 200, 180)])
+    assert calls[-1] == (200, 200)
+
+
+def test_roi_limited_prior_rereads_only_inside_the_roi() -> None:
+    frame = Image.new("RGB", (400, 400), "white")
+    roi = (0, 0, 200, 200)
+    prior = PriorFrame(image=frame, tokens=[_token("Save", (10, 10, 50, 30))], roi=roi)
+    read: list[tuple[int, int]] = []
+    full: list[tuple[int, int]] = []
+
+    def read_regions(crops: list[Image.Image]) -> list[list[OCRToken]]:
+        read.extend(crop.size for crop in crops)
+        return [[_token("Open", (0, 0, 30, 16))] for _ in crops]
+
+    def full_pass(image: Image.Image) -> list[OCRToken]:
+        full.append(image.size)
+        return []
+
+    options = {"padding": 0, "full_pass": full_pass, "read_regions": read_regions}
+    tokens = extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[(150, 150, 300, 300)], roi=roi, **options)
+    assert read == [(50, 50)]
+    assert [(t.text, t.bbox) for t in tokens] == [("Save", (10, 10, 50, 30)), ("Open", (150, 150, 180, 166))]
+
+    outside = extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[(300, 300, 350, 350)], roi=roi, **options)
+    assert outside == prior.tokens
+    assert read == [(50, 50)]
+
+    extract_ocr_tokens_incremental(frame.copy(), prior, dirty=[(150, 150, 160, 160)], roi=(0, 0, 300, 300), **options)
+    assert full == [(400, 400)]
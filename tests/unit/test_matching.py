@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import random
+
+from packages.matching import Automaton
+
+
+def test_automaton_finds_every_overlapping_match() -> None:
+    automaton = Automaton([("he", "he"), ("she", "she"), ("his", "his"), ("hers", "hers")]).build()
+    found = {(m.start, m.end, m.value) for m in automaton.iter_matches("ushers")}
+    assert found == {(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")}
+
+
+def test_automaton_matches_naive_search_on_random_text() -> None:
+    rng = random.Random(3)
+    patterns = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    automaton = Automaton((pattern, pattern) for pattern in patterns).build()
+    text = "".join(rng.choice("abc") for _ in range(500))
+    expected = {
+        (i, i + len(pattern), pattern) for pattern in patterns for i in range(len(text)) if text.startswith(pattern, i)
+    }
+    assert {(m.start, m.end, m.value) for m in automaton.iter_matches(text)} == expected
+
+
+def test_longest_matches_over_word_sequences() -> None:
+    automaton = Automaton([(("save",), "button"), (("save", "as"), "button"), (("as",), "text")]).build()
+    matches = automaton.longest_matches(["please", "save", "as", "draft", "as"])
+    assert [(m.start, m.end) for m in matches] == [(1, 3), (4, 5)]
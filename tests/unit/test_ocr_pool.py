@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from PIL import Image
+
+from packages.perception import ocr
+from packages.perception.ocr import OCRToken, OCRWorkerPool
+
+
+def test_pool_batch_keeps_input_order_and_counts_work(monkeypatch) -> None:
+    def fake_tokens(image: Image.Image, lang: str) -> list[OCRToken]:
+        return [OCRToken(text=f"{lang}:{image.width}", bbox=(0, 0, 1, 1), confidence=1.0)]
+
+    monkeypatch.setattr(ocr, "_tesserocr_available", lambda: False)
+    monkeypatch.setattr(ocr, "_pytesseract_tokens", fake_tokens)
+    pool = OCRWorkerPool(workers=2, lang="deu")
+    try:
+        results = pool.map(Image.new("L", (width, 4)) for width in (3, 1, 2))
+        assert [tokens[0].text for tokens in results] == ["deu:3", "deu:1", "deu:2"]
+        assert pool.stats() == {"backend": "pytesseract", "workers": 2, "queued": 0, "running": 0, "completed": 3}
+    finally:
+        pool.close()
+
+
+def test_tesseract_path_probe_is_cached(monkeypatch) -> None:
+    probes = []
+
+    def fake_which(name: str) -> str:
+        probes.append(name)
+        return "/usr/bin/tesseract"
+
+    ocr._tesseract_cmd.cache_clear()
+    monkeypatch.setattr(ocr.shutil, "which", fake_which)
+    try:
+        assert ocr._tesseract_cmd() is None
+        assert ocr._tesseract_cmd() is None
+        assert probes == ["tesseract"]
+    finally:
+        ocr._tesseract_cmd.cache_clear()
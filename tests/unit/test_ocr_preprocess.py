@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from PIL import Image, ImageDraw
+
+from packages.perception import preprocess
+from packages.perception.ocr import OCRToken
+from packages.perception.preprocess import OCRPreprocess, extract_ocr_tokens_preprocessed, text_regions
+
+
+def _screen_with_label() -> Image.Image:
+    image = Image.new("RGB", (400, 300), "white")
+    ImageDraw.Draw(image).text((220, 200), "Submit order", fill="black")
+    return image
+
+
+def test_text_regions_find_only_the_label() -> None:
+    regions = text_regions(_screen_with_label().convert("L"), block=16)
+    assert len(regions) == 1
+    x1, y1, x2, y2 = regions[0]
+    assert x1 <= 220 and y1 <= 200 and x2 >= 280 and y2 >= 208
+    assert (x2 - x1) * (y2 - y1) < 400 * 300 // 10
+
+
+def test_preprocessed_ocr_maps_boxes_back_to_screen(monkeypatch) -> None:
+    seen: list[Image.Image] = []
+
+    def fake_batch(images):
+        seen.extend(images)
+        return [[OCRToken(text="Submit", bbox=(0, 0, 10, 5), confidence=0.9)] for _ in images]
+
+    monkeypatch.setattr(preprocess, "extract_ocr_tokens_batch", fake_batch)
+    config = OCRPreprocess(max_long_edge=100, detect_regions=False)
+    tokens = extract_ocr_tokens_preprocessed(_screen_with_label(), config, roi=(200, 100, 400, 300))
+
+    assert [image.mode for image in seen] == ["L"]
+    assert seen[0].size == (100, 100)
+    assert tokens[0].bbox == (200, 100, 220, 110)
+
+
+def test_blank_frame_skips_ocr(monkeypatch) -> None:
+    monkeypatch.setattr(preprocess, "extract_ocr_tokens_batch", lambda images: [[] for _ in images])
+    assert text_regions(Image.new("L", (128, 128), 255)) == []
+    assert extract_ocr_tokens_preprocessed(Image.new("RGB", (128, 128), "white")) == []
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from packages.perception.cache import PerceptionCache, snapshot_nbytes
+from packages.perception.ocr import OCRToken
+from packages.perception.pipeline import PerceptionSnapshot
+
+
+def _snapshot(text: str) -> PerceptionSnapshot:
+    return PerceptionSnapshot(tokens=[OCRToken(text=text, bbox=(0, 0, 10, 10), confidence=0.9)], candidates=[])
+
+
+def test_exact_hits_are_scoped_per_session() -> None:
+    cache = PerceptionCache(scope="session")
+    cache.put("d1", _snapshot("a"), namespace="s1")
+    assert cache.get("d1", namespace="s1").tokens[0].text == "a"
+    assert cache.get("d1", namespace="s2") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_respects_byte_budget() -> None:
+    size = snapshot_nbytes(_snapshot("a"))
+    cache = PerceptionCache(max_bytes=size * 2, scope="global")
+    cache.put("d1", _snapshot("a"))
+    cache.put("d2", _snapshot("b"))
+    cache.get("d1")
+    cache.put("d3", _snapshot("c"))
+    assert cache.get("d2") is None
+    assert cache.get("d1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_near_duplicate_lookup_uses_hamming_distance() -> None:
+    cache = PerceptionCache(near_duplicate_bits=2, scope="global")
+    cache.put("d1", _snapshot("a"), phash=0b1111_0000)
+    assert cache.get_similar(0b1111_0011) is not None
+    assert cache.get_similar(0b0000_1111) is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_near_duplicate_scan_is_bounded_per_namespace() -> None:
+    cache = PerceptionCache(near_duplicate_bits=0, similar_window=2)
+    cache.put("d1", _snapshot("a"), namespace="s1", phash=1)
+    cache.put("d2", _snapshot("b"), namespace="s1", phash=2)
+    cache.put("d3", _snapshot("c"), namespace="s1", phash=3)
+    cache.put("d4", _snapshot("d"), namespace="s2", phash=4)
+
+    assert cache.get_similar(1, namespace="s1") is None
+    assert cache.get_similar(3, namespace="s1").tokens[0].text == "c"
+    assert cache.get_similar(4, namespace="s1") is None
+    cache.discard_namespace("s2")
+    assert cache.get_similar(4, namespace="s2") is None
+    assert cache.stats()["entries"] == 3
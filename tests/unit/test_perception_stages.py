@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from PIL import Image
+
+from packages.contracts.models import ScreenCapture
+from packages.perception import pipeline
+from packages.perception.ocr import OCRToken
+from packages.perception.pipeline import PerceptionRun
+
+
+def test_stages_run_lazily_and_are_timed(monkeypatch) -> None:
+    calls = []
+
+    def fake_ocr(image: Image.Image) -> list[OCRToken]:
+        calls.append(image.size)
+        return [OCRToken(text="Save", bbox=(0, 0, 10, 10), confidence=0.9)]
+
+    monkeypatch.setattr(pipeline, "extract_ocr_tokens", fake_ocr)
+    screen = ScreenCapture(image_bytes=b"unused", width=8, height=8)
+    run = PerceptionRun(screen, image=Image.new("RGB", (8, 8)))
+    assert run.timings == {}
+
+    assert run.captcha is False
+    assert set(run.timings) == {"ocr", "captcha_scan"}
+    assert run.snapshot("captcha-only").top_candidates(5) == []
+
+    snapshot = run.snapshot()
+    assert [c.kind for c in snapshot.candidates] == ["button"]
+    assert set(run.timings) == {"ocr", "captcha_scan", "grounding"}
+    assert calls == [(8, 8)]
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import os
+import time
+
 from packages.contracts.normalization import normalize_action
+from packages.policy import PolicyEngine, RuleSet, RuleSource
 from packages.policy.risk import classify_risk
 
 
@@ -14,3 +18,38 @@ def test_risk_classification_sensitive_for_credentials() -> None:
     action = normalize_action({"action": "type", "parameters": {"text": "my password is test"}}, width=10, height=10)
     risk = classify_risk(action=action, task="sign in", observation="", reasoning="")
     assert risk == "sensitive"
+
+
+def test_rule_set_reports_every_hit_in_one_scan() -> None:
+    hits = RuleSet.from_files().scan("Delete the registry Token")
+
+    assert hits.categories == {"destructive", "confirm", "sensitive"}
+    assert hits.terms("confirm") == ["delete", "registry"]
+
+
+def test_engine_resumes_task_scan_across_the_join() -> None:
+    engine = PolicyEngine(RuleSet.from_files())
+    action = normalize_action({"action": "click", "parameters": {"x": 1, "y": 1}}, width=10, height=10)
+
+    assert engine.classify_risk(action, "clean up: drop", "database tables", "", session_id="s1") == "destructive"
+    assert engine.classify_risk(action, "clean up: drop", "old rows", "", session_id="s1") == "low"
+    decision = engine.evaluate(action, "open docs", "solve the captcha", "", None, None, session_id="s1")
+    assert (decision.status, decision.risk) == ("block", "destructive")
+
+
+def test_rule_source_reloads_changed_files(tmp_path) -> None:
+    rules_file = tmp_path / "rules.txt"
+    rules_file.write_text("# extra terms\nconfirm payroll\n", encoding="utf-8")
+    source = RuleSource([rules_file], check_interval=0)
+    engine = PolicyEngine(source)
+    action = normalize_action({"action": "click", "parameters": {"x": 1, "y": 1}}, width=10, height=10)
+
+    assert engine.evaluate(action, "open payroll", "", "", None, None).status == "confirm"
+    rules_file.write_text("block payroll\n", encoding="utf-8")
+    os.utime(rules_file, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    assert engine.evaluate(action, "open payroll", "", "", None, None).status == "block"
+    assert source.reloads == 1
+
+    rules_file.write_text("bogus line\n", encoding="utf-8")
+    os.utime(rules_file, ns=(time.time_ns(), time.time_ns() + 2_000_000_000))
+    assert engine.evaluate(action, "open payroll", "", "", None, None).status == "block"
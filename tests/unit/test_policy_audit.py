@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from packages.policy.audit import audit_records
+
+_CLICK = {"action": "click", "parameters": {"x": 5, "y": 5}}
+
+
+def _records() -> list[str]:
+    records = [
+        {"action": _CLICK, "task": "open docs", "decision": {"status": "allow", "risk": "low"}},
+        {"action": _CLICK, "task": "open payroll", "decision": {"status": "allow", "risk": "low"}},
+        {"action": _CLICK, "task": "delete cache", "decision": "allow"},
+        {"action": _CLICK, "task": "open notes"},
+    ]
+    lines = [json.dumps(record) for record in records]
+    lines.insert(2, "")
+    lines.append('{"action": {"action": "speak"}}')
+    return [line + "\n" for line in lines]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_audit_writes_diffs_in_input_order(tmp_path, workers: int) -> None:
+    rules = tmp_path / "rules.txt"
+    rules.write_text("block payroll\n", encoding="utf-8")
+    out = io.StringIO()
+
+    stats = audit_records(_records(), out, workers=workers, chunk_size=2, rule_paths=[str(rules)])
+
+    diffs = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [diff["line"] for diff in diffs] == [2, 4, 6]
+    assert diffs[0]["current"]["status"] == "block"
+    assert diffs[1]["recorded"] == {"status": "allow", "risk": None}
+    assert diffs[1]["current"]["status"] == "confirm"
+    assert "error" in diffs[2]
+    assert (stats.records, stats.changed, stats.unrecorded, stats.errors) == (5, 2, 1, 1)
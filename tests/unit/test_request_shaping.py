@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from apps.planner_api.providers import ProviderInput, RequestBudget, RequestShaper
+from apps.planner_api.providers.shaping import select_text
+from packages.perception import Frame
+
+
+def _payload(image: Image.Image, **overrides) -> ProviderInput:
+    fields = {
+        "task": "save the report",
+        "step_index": 1,
+        "width": image.width,
+        "height": image.height,
+        "active_window": None,
+        "ocr_text": [],
+        "candidate_text": [],
+        "frame": Frame(image=image),
+        "last_result_message": None,
+    }
+    return ProviderInput(**{**fields, **overrides})
+
+
+def test_select_text_ranks_by_task_overlap_and_dedupes() -> None:
+    texts = ["File", "Edit", "Save", "file", "Report.docx", "Save  ", "View"]
+
+    assert select_text(texts, "save the report", max_tokens=100, max_items=10) == [
+        "File",
+        "Edit",
+        "Save",
+        "Report.docx",
+        "View",
+    ]
+    # With room for two strings, the task-relevant ones win, still in input order.
+    assert select_text(texts, "save the report", max_tokens=5, max_items=10) == ["Save", "Report.docx"]
+
+
+def test_unconstrained_budget_forwards_capture_untouched() -> None:
+    payload = _payload(Image.new("RGB", (64, 32), "white"))
+
+    shaped = RequestShaper(RequestBudget()).shape(payload)
+
+    assert shaped.image_base64 is payload.frame.base64
+    assert (shaped.width, shaped.height, shaped.scale) == (64, 32, (1.0, 1.0))
+
+
+def test_image_is_downscaled_to_fit_byte_budget_and_actions_map_back() -> None:
+    noise = Image.effect_noise((1600, 900), 80).convert("RGB")
+    budget = RequestBudget(max_image_bytes=60_000, max_long_edge=1200, codec="jpeg")
+
+    shaped = RequestShaper(budget).shape(_payload(noise))
+
+    data = base64.b64decode(shaped.image_base64)
+    assert len(data) <= 60_000
+    assert Image.open(BytesIO(data)).format == "JPEG"
+    assert max(shaped.width, shaped.height) <= 1200
+    action = {"action": "click", "parameters": {"x": shaped.width // 2, "y": shaped.height // 2}}
+    x, y = shaped.restore_action(action)["parameters"].values()
+    assert abs(x - 800) <= 2 and abs(y - 450) <= 2
+
+
+def test_each_axis_maps_back_with_its_own_scale() -> None:
+    budget = RequestBudget(max_long_edge=100, codec="png")
+
+    shaped = RequestShaper(budget).shape(_payload(Image.new("RGB", (1000, 333), "white")))
+
+    assert (shaped.width, shaped.height) == (100, 33)
+    assert shaped.to_capture(100, 33) == (1000, 333)
+
+
+def test_crop_to_active_window_offsets_coordinates() -> None:
+    image = Image.new("RGB", (400, 300), "white")
+    budget = RequestBudget(codec="png", crop_to_active_window=True)
+
+    shaped = RequestShaper(budget).shape(_payload(image, active_window_bounds=(100, 50, 300, 250)))
+
+    assert (shaped.width, shaped.height, shaped.offset) == (200, 200, (100, 50))
+    drag = {"action": "drag", "parameters": {"from": [0, 0], "to": [10, 20]}}
+    assert shaped.restore_action(drag)["parameters"] == {"from": (100, 50), "to": (110, 70)}
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from apps.planner_api.session_sqlite import SqliteSessionStore
+from apps.planner_api.session_store import SessionLimits
+from packages.contracts.models import Constraints
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_stores_on_one_file_share_sessions(tmp_path) -> None:
+    path = tmp_path / "sessions.db"
+    first = SqliteSessionStore(path)
+    second = SqliteSessionStore(path)
+
+    state = first.create("open notepad", Constraints(max_steps=7))
+    loaded = second.get(state.session_id)
+
+    assert loaded is not None
+    assert (loaded.task, loaded.constraints.max_steps) == ("open notepad", 7)
+    confirmation_id = second.put_pending_confirmation(state.session_id, "fp")
+    assert first.approve_confirmation(state.session_id, confirmation_id) is True
+    assert second.is_approved(state.session_id, "fp") is True
+    assert second.get(state.session_id).pending_confirmations == {}
+    first.update_history(state.session_id, lambda history: history.append(0, "click", "ab" * 32, "cd" * 16, "low", 5.0))
+    assert second.update_history(state.session_id, lambda history: history.count("ab" * 32, "cd" * 16)) == 1
+    assert second.get("missing") is None
+    with pytest.raises(KeyError):
+        second.is_approved("missing", "fp")
+
+
+def test_concurrent_approvals_succeed_once(tmp_path) -> None:
+    path = tmp_path / "sessions.db"
+    stores = [SqliteSessionStore(path) for _ in range(4)]
+    state = stores[0].create("delete file", None)
+    confirmation_id = stores[0].put_pending_confirmation(state.session_id, "fp")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pool.map(lambda i: stores[i % 4].approve_confirmation(state.session_id, confirmation_id), range(8))
+        )
+
+    assert results.count(True) == 1
+    assert stores[0].reject_confirmation(state.session_id, confirmation_id) is False
+
+
+def test_sweep_expires_sessions_and_confirmations(tmp_path) -> None:
+    clock = FakeClock()
+    limits = SessionLimits(ttl_seconds=100, idle_seconds=50, max_sessions=2, confirmation_ttl_seconds=30)
+    store = SqliteSessionStore(tmp_path / "sessions.db", limits, cache_seconds=0, touch_seconds=0, clock=clock)
+    evicted: list[str] = []
+    store.on_evict(evicted.append)
+
+    old = store.create("a", None)
+    clock.now += 20
+    idle = store.create("b", None)
+    busy = store.create("c", None)
+    fresh = store.create("d", None)
+    store.put_pending_confirmation(busy.session_id, "fp")
+    clock.now += 60
+    store.get(busy.session_id)
+    store.get(fresh.session_id)
+    store.get(old.session_id)
+    clock.now += 25
+
+    store.sweep()
+
+    assert set(evicted) == {old.session_id, idle.session_id}
+    assert store.get(busy.session_id).pending_confirmations == {}
+    store.create("e", None)
+    assert store.sweep() == [fresh.session_id]
+    stats = store.stats()
+    assert (stats["sessions"], stats["evicted_ttl"], stats["evicted_idle"], stats["evicted_lru"]) == (2, 1, 1, 1)
+    assert stats["expired_confirmations"] == 1
+    assert stats["bytes"] > 0
+
+
+def test_evictions_by_another_worker_reach_local_listeners(tmp_path) -> None:
+    clock = FakeClock()
+    path = tmp_path / "sessions.db"
+    sweeper = SqliteSessionStore(path, SessionLimits(idle_seconds=50), cache_seconds=0, clock=clock)
+    worker = SqliteSessionStore(path, cache_seconds=0, clock=clock)
+    evicted: list[str] = []
+    worker.on_evict(evicted.append)
+
+    swept = worker.create("a", None)
+    missed = worker.create("b", None)
+    clock.now += 60
+    assert set(sweeper.sweep()) == {swept.session_id, missed.session_id}
+
+    assert worker.get(missed.session_id) is None
+    assert evicted == [missed.session_id]
+    assert worker.sweep() == []
+    assert evicted == [missed.session_id, swept.session_id]
+
+
+def test_close_closes_every_thread_connection(tmp_path) -> None:
+    store = SqliteSessionStore(tmp_path / "sessions.db")
+    state = store.create("a", None)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: store.is_approved(state.session_id, "fp"), range(4)))
+    conns = list(store._conns)
+
+    store.close()
+
+    assert len(conns) >= 2
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_record_step_confirms_unapproved_actions_and_keeps_the_cache(tmp_path) -> None:
+    store = SqliteSessionStore(tmp_path / "sessions.db", cache_seconds=60)
+    state = store.create("a", None)
+    store.get(state.session_id)
+
+    def append(history) -> None:
+        history.append(0, "click", "ab" * 32, "cd" * 16, "sensitive", 5.0)
+
+    confirmation_id = store.record_step(state.session_id, "fp", True, append)
+    assert confirmation_id is not None
+    refreshed = store.get(state.session_id)
+    assert refreshed.pending_confirmations == {confirmation_id: "fp"}
+    assert refreshed.history.count("ab" * 32, "cd" * 16) == 1
+
+    assert store.approve_confirmation(state.session_id, confirmation_id) is True
+    assert store.record_step(state.session_id, "fp", True, append) is None
+    assert store.record_step(state.session_id, "other", False, append) is None
+    assert store.update_history(state.session_id, lambda history: history.count("ab" * 32, "cd" * 16)) == 3
+    with pytest.raises(KeyError):
+        store.record_step("missing", "fp", True, append)
+
+
+def test_read_cache_is_bounded_lru(tmp_path) -> None:
+    store = SqliteSessionStore(tmp_path / "sessions.db", SessionLimits(max_sessions=2), cache_size=10)
+    ids = [store.create(task, None).session_id for task in "abc"]
+    for session_id in ids:
+        store.get(session_id)
+    store.get(ids[1])
+
+    assert list(store._cache) == [ids[2], ids[1]]
+    store.sweep()
+    assert store._known == {ids[1], ids[2]}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from apps.planner_api.session_store import SessionLimits, SessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sweep_expires_by_ttl_idle_and_lru() -> None:
+    clock = FakeClock()
+    store = SessionStore(SessionLimits(ttl_seconds=100, idle_seconds=50, max_sessions=2), clock=clock)
+    evicted: list[str] = []
+    store.on_evict(evicted.append)
+
+    old = store.create("a", None)
+    clock.now += 20
+    idle = store.create("b", None)
+    busy = store.create("c", None)
+    fresh = store.create("d", None)
+    clock.now += 60
+    store.get(busy.session_id)
+    store.get(fresh.session_id)
+    assert store.get(old.session_id) is not None
+    clock.now += 25
+
+    store.sweep()
+
+    assert set(evicted) == {old.session_id, idle.session_id}
+    store.get(busy.session_id)
+    store.create("e", None)
+    assert store.sweep() == [fresh.session_id]
+    stats = store.stats()
+    assert (stats["sessions"], stats["evicted_ttl"], stats["evicted_idle"], stats["evicted_lru"]) == (2, 1, 1, 1)
+
+
+def test_stale_confirmations_expire_and_reject_goes_through_store() -> None:
+    clock = FakeClock()
+    store = SessionStore(SessionLimits(confirmation_ttl_seconds=60, max_approved=2), clock=clock)
+    session = store.create("task", None)
+    stale = store.put_pending_confirmation(session.session_id, "fp-stale")
+    clock.now += 45
+    kept = store.put_pending_confirmation(session.session_id, "fp-kept")
+    rejected = store.put_pending_confirmation(session.session_id, "fp-rejected")
+    clock.now += 30
+
+    store.sweep()
+
+    assert store.approve_confirmation(session.session_id, stale) is False
+    assert store.reject_confirmation(session.session_id, rejected) is True
+    assert store.approve_confirmation(session.session_id, kept) is True
+    assert store.stats()["expired_confirmations"] == 1
+    assert store.stats()["pending_confirmations"] == 0
+
+    for fingerprint in ("fp-1", "fp-2"):
+        store.approve_confirmation(session.session_id, store.put_pending_confirmation(session.session_id, fingerprint))
+    assert not store.is_approved(session.session_id, "fp-kept")
+    assert store.is_approved(session.session_id, "fp-2")
+
+
+def test_concurrent_confirmations_on_one_session_are_not_lost() -> None:
+    store = SessionStore(SessionLimits(max_approved=10_000), stripes=4)
+    session = store.create("task", None)
+    others = [store.create("other", None) for _ in range(8)]
+    barrier = threading.Barrier(8)
+
+    def _worker(worker: int) -> int:
+        barrier.wait()
+        approved = 0
+        for i in range(200):
+            fingerprint = f"fp-{worker}-{i}"
+            confirmation_id = store.put_pending_confirmation(session.session_id, fingerprint)
+            store.get(others[worker].session_id)
+            approved += store.approve_confirmation(session.session_id, confirmation_id)
+            approved += store.approve_confirmation(session.session_id, confirmation_id)
+        return approved
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(_worker, range(8)))
+
+    assert sum(results) == 1600
+    stats = store.stats()
+    assert (stats["sessions"], stats["pending_confirmations"], stats["approved_fingerprints"]) == (9, 0, 1600)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import sys
+import types
+
+from PIL import Image
+
+from apps.executor.adapters.input import DesktopInputExecutor
+from apps.executor.adapters.settle import SettleDetector
+
+
+def _frames(*colors: str):
+    frames = [Image.new("RGB", (320, 180), color) for color in colors]
+
+    def grab() -> Image.Image:
+        return frames.pop(0) if len(frames) > 1 else frames[0]
+
+    return grab
+
+
+def test_settles_once_frames_stop_changing() -> None:
+    detector = SettleDetector(timeout_seconds=1.0, poll_interval=0.001, grab=_frames("white", "gray", "black"))
+    assert detector.wait() is True
+
+
+def test_require_change_times_out_on_static_screen() -> None:
+    detector = SettleDetector(timeout_seconds=0.05, poll_interval=0.001, grab=_frames("white"))
+    assert detector.wait(require_change=True) is False
+    assert detector.wait() is True
+
+
+def test_small_noise_does_not_count_as_change() -> None:
+    noisy = Image.new("RGB", (320, 180), "white")
+    noisy.putpixel((10, 10), (250, 250, 250))
+    frames = [Image.new("RGB", (320, 180), "white"), noisy]
+    detector = SettleDetector(grab=lambda: frames[0])
+    first = detector.frame_hash()
+    frames.pop(0)
+    assert detector.frame_hash() == first
+
+
+def test_dry_run_wait_does_not_poll_the_screen() -> None:
+    def grab() -> Image.Image:
+        raise AssertionError("dry-run wait grabbed the screen")
+
+    executor = DesktopInputExecutor(dry_run=True, settle=SettleDetector(grab=grab))
+    assert executor.execute({"action": "wait", "parameters": {"seconds": 5}}) == "dry-run:wait"
+
+
+def test_live_wait_returns_once_the_screen_settles(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "pyautogui", types.ModuleType("pyautogui"))
+    detector = SettleDetector(timeout_seconds=1.0, poll_interval=0.001, grab=_frames("white", "gray", "black"))
+    executor = DesktopInputExecutor(dry_run=False, settle=detector)
+    assert executor.execute({"action": "wait", "parameters": {"seconds": 5}}) == "executed:wait settled"
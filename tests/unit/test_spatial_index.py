@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import math
+import random
+
+from packages.contracts.normalization import normalize_action
+from packages.perception.grounding import UICandidate
+from packages.perception.spatial import CandidateGrid
+
+
+def _candidate(text: str, bbox: tuple[int, int, int, int], kind: str = "text", score: float = 0.5) -> UICandidate:
+    x1, y1, x2, y2 = bbox
+    return UICandidate(kind=kind, center=((x1 + x2) // 2, (y1 + y2) // 2), text=text, bbox=bbox, score=score)
+
+
+def _box_distance(x: int, y: int, bbox: tuple[int, int, int, int]) -> float:
+    return math.hypot(max(bbox[0] - x, 0, x - bbox[2]), max(bbox[1] - y, 0, y - bbox[3]))
+
+
+def test_grid_queries_match_linear_scan() -> None:
+    rng = random.Random(7)
+    candidates = []
+    for i in range(200):
+        x, y = rng.randrange(0, 1900), rng.randrange(0, 1060)
+        candidates.append(_candidate(f"t{i}", (x, y, x + rng.randrange(5, 120), y + rng.randrange(5, 30)), score=rng.random()))
+    grid = CandidateGrid(candidates, cell=64)
+
+    for _ in range(50):
+        x, y = rng.randrange(0, 1920), rng.randrange(0, 1080)
+        assert {c.text for c in grid.at(x, y)} == {c.text for c in candidates if _box_distance(x, y, c.bbox) == 0}
+        expected = sorted(_box_distance(x, y, c.bbox) for c in candidates)[:3]
+        assert [_box_distance(x, y, c.bbox) for c in grid.nearest(x, y, k=3)] == expected
+
+    rect = (500, 300, 900, 500)
+    inside = {c.text for c in grid.in_rect(rect)}
+    assert inside == {
+        c.text for c in candidates if c.bbox[0] <= 900 and 500 <= c.bbox[2] and c.bbox[1] <= 500 and 300 <= c.bbox[3]
+    }
+
+
+def test_click_snaps_to_nearby_button_only() -> None:
+    grid = CandidateGrid(
+        [
+            _candidate("Save", (100, 100, 140, 120), kind="button", score=0.9),
+            _candidate("Report", (300, 100, 360, 120)),
+        ]
+    )
+    snap = grid.snapper(radius=20, kinds=("button",))
+
+    near = normalize_action({"action": "click", "parameters": {"x": 150, "y": 125}}, 1920, 1080, snap=snap)
+    assert (near.parameters.x, near.parameters.y) == (120, 110)
+
+    far = normalize_action({"action": "click", "parameters": {"x": 330, "y": 125}}, 1920, 1080, snap=snap)
+    assert (far.parameters.x, far.parameters.y) == (330, 125)
+
+    moved = normalize_action({"action": "move", "parameters": {"x": 150, "y": 125}}, 1920, 1080, snap=snap)
+    assert (moved.parameters.x, moved.parameters.y) == (150, 125)
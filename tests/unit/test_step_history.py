@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from apps.planner_api.step_history import StepHistory
+
+SCREEN_A = "aa" * 16
+SCREEN_B = "bb" * 16
+CLICK = "c1" * 32
+WAIT = "d2" * 32
+
+
+def _fill(history: StepHistory, steps: list[tuple[str, str]]) -> None:
+    for step_index, (fingerprint, screen) in enumerate(steps):
+        history.record_outcome("executed")
+        history.append(step_index, "click", fingerprint, screen, "low", 12.5)
+
+
+def test_ring_buffer_keeps_newest_steps_in_fixed_memory() -> None:
+    history = StepHistory(capacity=4)
+    nbytes = history.nbytes
+    _fill(history, [(CLICK, SCREEN_A)] * 3 + [(WAIT, SCREEN_B)] * 3)
+
+    assert len(history) == 4
+    assert history.nbytes == nbytes
+    assert [step.step_index for step in history.recent()] == [2, 3, 4, 5]
+    assert [step.outcome for step in history.recent(2)] == ["executed", "pending"]
+    assert history.count(CLICK, SCREEN_A) == 1
+    assert history.count(WAIT, SCREEN_B) == 3
+
+    restored = StepHistory.from_bytes(history.to_bytes(), capacity=4)
+    assert restored.recent() == history.recent()
+
+
+def test_stalled_counts_trailing_repeats_on_the_same_screen() -> None:
+    history = StepHistory()
+    _fill(history, [(WAIT, SCREEN_A), (CLICK, SCREEN_B), (CLICK, SCREEN_A), (CLICK, SCREEN_A)])
+
+    assert history.stalled(SCREEN_A) == 2
+    assert history.stalled(SCREEN_B) == 0
+    assert history.record_outcome("failed") is True
+    assert history.record_outcome("executed") is False
+    assert history.stalled(SCREEN_A) == 0
+    assert history.recent(1)[0].to_dict(SCREEN_A)["same_screen"] is True
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from packages.contracts.codecs import JSON_CODEC, MSGPACK_CODEC, codec_for_content_type, negotiate
+from packages.contracts.models import TurnRequest
+from packages.contracts.wire import decode_turn_frame, encode_turn_frame, turn_request_to_json
+from tests.fixtures.sample_data import SAMPLE_PNG_BASE64
+
+SAMPLE_PNG = base64.b64decode(SAMPLE_PNG_BASE64)
+
+
+def _request(**screen) -> TurnRequest:
+    return TurnRequest.model_validate(
+        {
+            "session_id": "sess1",
+            "task": "open browser",
+            "screen": {"width": 10, "height": 10, **screen},
+            "context": {"step_index": 0},
+        }
+    )
+
+
+def test_turn_frame_round_trip_keeps_raw_bytes() -> None:
+    req = _request(
+        image_bytes=SAMPLE_PNG,
+        frame_id="f1",
+    )
+    decoded = decode_turn_frame(b"".join(encode_turn_frame(req)))
+    assert decoded.screen.image_bytes == SAMPLE_PNG
+    assert decoded.screen.image_base64 == ""
+    assert decoded.screen.frame_id == "f1"
+
+
+def test_turn_frame_carries_delta_tiles_in_order() -> None:
+    tiles = [
+        {"x": 0, "y": 0, "width": 1, "height": 1, "image_bytes": SAMPLE_PNG},
+        {"x": 5, "y": 5, "width": 1, "height": 1, "image_base64": SAMPLE_PNG_BASE64},
+    ]
+    req = _request(mode="delta", base_frame_id="f1", frame_id="f2", tiles=tiles)
+    decoded = decode_turn_frame(b"".join(encode_turn_frame(req)))
+    assert [(t.x, t.image_bytes) for t in decoded.screen.tiles] == [(0, SAMPLE_PNG), (5, SAMPLE_PNG)]
+
+
+def test_truncated_turn_frame_is_rejected() -> None:
+    body = b"".join(encode_turn_frame(_request(image_bytes=SAMPLE_PNG)))
+    with pytest.raises(ValueError):
+        decode_turn_frame(body[:-3])
+
+
+def test_json_dump_inlines_binary_images() -> None:
+    payload = turn_request_to_json(_request(image_bytes=SAMPLE_PNG))
+    assert payload["screen"]["image_base64"] == SAMPLE_PNG_BASE64
+    assert "image_bytes" not in payload["screen"]
+
+
+def test_negotiate_prefers_highest_q_available_codec() -> None:
+    assert negotiate(None) is JSON_CODEC
+    assert negotiate("text/html, */*") is JSON_CODEC
+    assert negotiate("application/json;q=0.4, application/msgpack") is (MSGPACK_CODEC or JSON_CODEC)
+    assert negotiate("application/msgpack;q=0") is JSON_CODEC
+    assert codec_for_content_type("application/json; charset=utf-8") is JSON_CODEC
+    assert codec_for_content_type("text/plain") is None